@@ -12,6 +12,8 @@ Features:
 Usage:
     python data/generate_dummy_data.py
 
+generate_customers(n) builds the same table in memory, e.g. for benchmarks.
+
 Output:
     customer_engagement_dataset_extended.csv (~50 MB)
     customer_engagement_dataset_extended.parquet (~10 MB)
@@ -33,13 +35,7 @@ OUTPUT_CSV = "customer_engagement_dataset_extended.csv"
 OUTPUT_PARQUET = "customer_engagement_dataset_extended.parquet"
 
 # Initialize
-np.random.seed(RANDOM_SEED)
 fake = Faker()
-Faker.seed(RANDOM_SEED)
-
-print(f"🚀 Generating {NUM_CUSTOMERS:,} customer records...")
-print(f"   Random seed: {RANDOM_SEED}")
-print()
 
 
 def generate_customer_ids(n):
@@ -306,39 +302,38 @@ def validate_data(df):
         return True
 
 
-def main():
-    """Main execution"""
-    start_time = datetime.now()
-    
+def generate_customers(n, customer_ids=None):
+    """Generate n customer records as a DataFrame (uses the global NumPy seed)"""
     # Generate features
-    customer_ids = generate_customer_ids(NUM_CUSTOMERS)
-    age, gender, location = generate_demographics(NUM_CUSTOMERS)
+    if customer_ids is None:
+        customer_ids = generate_customer_ids(n)
+    age, gender, location = generate_demographics(n)
     tenure_months, sessions_last_7_days, session_duration_avg_minutes, engagement_score = \
-        generate_tenure_and_engagement(NUM_CUSTOMERS)
+        generate_tenure_and_engagement(n)
     
     swipes_right_last_30_days, matches_last_30_days, match_success_rate, \
         connections_sent, connections_received, total_connections = \
-        generate_dating_features(NUM_CUSTOMERS)
+        generate_dating_features(n)
     
     posts_last_30_days, stories_last_30_days, followers_count, \
         following_count, profile_views_received, content_virality_score = \
-        generate_social_features(NUM_CUSTOMERS, engagement_score)
+        generate_social_features(n, engagement_score)
     
     gig_applications_sent, gig_applications_received, active_gigs_count, \
         transaction_revenue_last_90_days, avg_job_completion_rating = \
-        generate_gig_features(NUM_CUSTOMERS)
+        generate_gig_features(n)
     
-    influence_score, risk_score = generate_influence_risk(NUM_CUSTOMERS)
+    influence_score, risk_score = generate_influence_risk(n)
     
     avg_sentiment_score, network_centrality, content_diversity_score, \
         session_consistency_score, last_7_day_engagement_trend, trust_score, \
         response_time_avg_hours, peak_activity_hour, referral_count, \
         time_since_first_transaction_days, premium_features_used_count, \
         social_influence_tier = \
-        generate_advanced_features(NUM_CUSTOMERS, engagement_score, tenure_months, followers_count)
+        generate_advanced_features(n, engagement_score, tenure_months, followers_count)
     
     churn_30_day, lifetime_value_usd, content_category_primary = \
-        generate_prediction_targets(NUM_CUSTOMERS, engagement_score, tenure_months, sessions_last_7_days)
+        generate_prediction_targets(n, engagement_score, tenure_months, sessions_last_7_days)
     
     # Create DataFrame
     print("\n📦 Creating DataFrame...")
@@ -404,6 +399,22 @@ def main():
         'content_category_primary': content_category_primary,
     })
     
+    return df
+
+
+def main():
+    """Main execution"""
+    start_time = datetime.now()
+    
+    np.random.seed(RANDOM_SEED)
+    Faker.seed(RANDOM_SEED)
+    
+    print(f"🚀 Generating {NUM_CUSTOMERS:,} customer records...")
+    print(f"   Random seed: {RANDOM_SEED}")
+    print()
+    
+    df = generate_customers(NUM_CUSTOMERS)
+    
     # Validate
     validate_data(df)
     
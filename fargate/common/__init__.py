@@ -0,0 +1 @@
+# Shared code for the training, batch inference and real-time prediction paths
@@ -0,0 +1,247 @@
+"""
+Declarative feature specification shared by training, batch inference and
+the real-time API
+
+The model input is the raw numeric customer columns followed by eight
+derived features. FeatureSpec compiles the spec into a float32 NumPy kernel
+that writes every column straight into one preallocated matrix (no
+intermediate DataFrames), optionally folding in the fitted StandardScaler.
+transform_row() is the single-customer path.
+
+Real-time requests are first encoded to a canonical row (encode_row: the
+input columns in spec order as float64, validated), which both builds the
+model matrix (transform_values) and, packed into a fixed binary layout, keys
+the prediction cache (row_key), whatever the order or extra keys of the
+request's dict.
+"""
+
+import hashlib
+import json
+import math
+import struct
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# Raw numeric columns of the customers table used as model inputs, in model order
+RAW_FEATURES = [
+    'age', 'tenure_months', 'sessions_last_7_days', 'session_duration_avg_minutes',
+    'swipes_right_last_30_days', 'matches_last_30_days', 'match_success_rate',
+    'connections_sent', 'connections_received', 'total_connections',
+    'posts_last_30_days', 'stories_last_30_days', 'followers_count', 'following_count',
+    'profile_views_received', 'content_virality_score', 'gig_applications_sent',
+    'gig_applications_received', 'active_gigs_count', 'transaction_revenue_last_90_days',
+    'avg_job_completion_rating', 'influence_score', 'risk_score', 'avg_sentiment_score',
+    'network_centrality', 'content_diversity_score', 'session_consistency_score',
+    'last_7_day_engagement_trend', 'trust_score', 'response_time_avg_hours',
+    'peak_activity_hour', 'referral_count', 'time_since_first_transaction_days',
+    'premium_features_used_count'
+]
+
+
+class DerivedFeature(NamedTuple):
+    """One engineered feature
+
+    kind is 'ratio' (a / (b + 1)), 'product' (a * b) or 'rate'
+    ((a + b) / period).
+    """
+    name: str
+    kind: str
+    inputs: Tuple[str, str]
+    period: float = 1.0
+
+
+DERIVED_FEATURES = [
+    # Engagement features
+    DerivedFeature('engagement_per_session', 'ratio', ('engagement_score', 'sessions_last_7_days')),
+    DerivedFeature('avg_session_value', 'product',
+                   ('session_duration_avg_minutes', 'engagement_score')),
+    # Social features
+    DerivedFeature('follower_following_ratio', 'ratio', ('followers_count', 'following_count')),
+    DerivedFeature('content_activity_rate', 'rate',
+                   ('posts_last_30_days', 'stories_last_30_days'), 30.0),
+    # Dating features
+    DerivedFeature('match_efficiency', 'ratio',
+                   ('matches_last_30_days', 'swipes_right_last_30_days')),
+    DerivedFeature('connection_rate', 'ratio', ('total_connections', 'tenure_months')),
+    # Gig features
+    DerivedFeature('gig_success_rate', 'ratio', ('active_gigs_count', 'gig_applications_sent')),
+    DerivedFeature('revenue_per_gig', 'ratio',
+                   ('transaction_revenue_last_90_days', 'active_gigs_count')),
+]
+
+
+def _column(data, name: str) -> np.ndarray:
+    """One input column as float32, with nulls (including pandas NA) as NaN"""
+    values = data[name]
+    if hasattr(values, 'to_numpy'):
+        return values.to_numpy(dtype=np.float32, na_value=np.nan)
+    return np.asarray(values, dtype=np.float32)
+
+
+def _scalar(value) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _derive_scalar(feature: DerivedFeature, a: float, b: float) -> float:
+    try:
+        if feature.kind == 'ratio':
+            return a / (b + 1)
+        if feature.kind == 'product':
+            return a * b
+        return (a + b) / feature.period
+    except ZeroDivisionError:
+        return 0.0
+
+
+class FeatureSpec:
+    """Compiled feature pipeline: raw columns in, float32 model matrix out"""
+
+    def __init__(self, raw_features: Sequence[str] = RAW_FEATURES,
+                 derived_features: Sequence[DerivedFeature] = DERIVED_FEATURES):
+        self.raw_features = list(raw_features)
+        self.derived_features = list(derived_features)
+        self.columns: List[str] = self.raw_features + [f.name for f in self.derived_features]
+        inputs = dict.fromkeys(self.raw_features)
+        for feature in self.derived_features:
+            inputs.update(dict.fromkeys(feature.inputs))
+        self.input_columns: List[str] = list(inputs)
+        self._layout = struct.Struct(f"<{len(self.input_columns)}d")
+        # Seeded with the input columns, so cache keys change whenever the schema does
+        self._key_seed = hashlib.sha256(json.dumps(self.input_columns).encode())
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    def check_schema(self, feature_columns: Sequence[str]):
+        """Raise if a model was trained on a different column order than this spec"""
+        feature_columns = list(feature_columns)
+        if feature_columns != self.columns:
+            missing = [c for c in self.columns if c not in feature_columns]
+            extra = [c for c in feature_columns if c not in self.columns]
+            raise ValueError(
+                f"Model feature schema does not match the feature spec "
+                f"(missing={missing}, extra={extra}, order_matches={not missing and not extra})"
+            )
+
+    def check_inputs(self, available_columns: Sequence[str]):
+        """Raise if any input column needed by the spec is absent"""
+        missing = [c for c in self.input_columns if c not in set(available_columns)]
+        if missing:
+            raise ValueError(f"Missing input columns: {missing}")
+
+    def transform(self, data, scaler=None) -> np.ndarray:
+        """(rows, features) float32 matrix from a DataFrame, Arrow table or dict of columns
+
+        Non-finite values become 0. When a fitted StandardScaler is given its
+        mean/scale are applied in place instead of through scaler.transform().
+        """
+        n_rows = len(data[self.input_columns[0]])
+        out = np.empty((n_rows, self.n_features), dtype=np.float32, order='F')
+        cache: Dict[str, np.ndarray] = {}
+
+        def col(name: str) -> np.ndarray:
+            if name not in cache:
+                cache[name] = _column(data, name)
+            return cache[name]
+
+        for j, name in enumerate(self.raw_features):
+            out[:, j] = col(name)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for offset, feature in enumerate(self.derived_features):
+                target = out[:, len(self.raw_features) + offset]
+                a, b = col(feature.inputs[0]), col(feature.inputs[1])
+                if feature.kind == 'ratio':
+                    np.add(b, 1, out=target)
+                    np.divide(a, target, out=target)
+                elif feature.kind == 'product':
+                    np.multiply(a, b, out=target)
+                else:
+                    np.add(a, b, out=target)
+                    target /= feature.period
+
+        np.nan_to_num(out, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        if scaler is not None:
+            out -= scaler.mean_.astype(np.float32)
+            out /= scaler.scale_.astype(np.float32)
+        return out
+
+    def transform_row(self, features: Dict, scaler=None) -> np.ndarray:
+        """Single-customer fast path: dict of raw values -> (1, features) float32 matrix"""
+        values = [_scalar(features.get(name)) for name in self.raw_features]
+        for feature in self.derived_features:
+            left, right = (_scalar(features.get(name)) for name in feature.inputs)
+            values.append(_derive_scalar(feature, left, right))
+
+        row = np.array([v if math.isfinite(v) else 0.0 for v in values], dtype=np.float32)
+        if scaler is not None:
+            row = ((row - scaler.mean_) / scaler.scale_).astype(np.float32)
+        return row.reshape(1, -1)
+
+    def transform_rows(self, rows: Sequence[Dict], scaler=None) -> np.ndarray:
+        """Many dicts of raw values (one per customer) -> (rows, features) float32 matrix"""
+        return self.transform_values([self.encode_row(row) for row in rows], scaler)
+
+    def encode_row(self, features: Dict) -> Tuple[float, ...]:
+        """Canonical raw inputs of one customer: input_columns order, float64, missing/null as NaN
+
+        Keys outside the spec are ignored (they do not reach the model); a
+        value that is not a number raises ValueError.
+        """
+        values = []
+        for name in self.input_columns:
+            value = features.get(name)
+            if value is None:
+                values.append(math.nan)
+                continue
+            try:
+                value = float(value) + 0.0  # -0.0 -> 0.0
+            except (TypeError, ValueError):
+                raise ValueError(f"Feature {name} must be a number, got {value!r}") from None
+            values.append(value if value == value else math.nan)
+        return tuple(values)
+
+    def row_key(self, values: Tuple[float, ...]) -> str:
+        """Cache key of an encoded row: hash of its fixed binary layout (16 hex chars)"""
+        digest = self._key_seed.copy()
+        digest.update(self._layout.pack(*values))
+        return digest.hexdigest()[:16]
+
+    def transform_values(self, rows: Sequence[Tuple[float, ...]], scaler=None) -> np.ndarray:
+        """Encoded rows (encode_row) -> (rows, features) float32 matrix"""
+        if len(rows) == 1:
+            # The column kernel's per-call overhead dominates for one row
+            return self.transform_row(dict(zip(self.input_columns, rows[0])), scaler)
+        values = np.array(rows, dtype=np.float32).reshape(len(rows), len(self.input_columns))
+        return self.transform(dict(zip(self.input_columns, values.T)), scaler)
+
+
+class ScalerParams(NamedTuple):
+    """Mean and scale of a fitted StandardScaler, all transform() needs, as a small JSON artifact"""
+    mean_: np.ndarray
+    scale_: np.ndarray
+
+    @classmethod
+    def from_scaler(cls, scaler) -> 'ScalerParams':
+        return cls(np.asarray(scaler.mean_, dtype=np.float64),
+                   np.asarray(scaler.scale_, dtype=np.float64))
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({'mean': self.mean_.tolist(), 'scale': self.scale_.tolist()}, f)
+
+    @classmethod
+    def load(cls, path: str) -> 'ScalerParams':
+        with open(path) as f:
+            params = json.load(f)
+        return cls(np.asarray(params['mean'], dtype=np.float64),
+                   np.asarray(params['scale'], dtype=np.float64))
+
+
+# Default spec used by training, batch inference and the Lambda
+FEATURE_SPEC = FeatureSpec()
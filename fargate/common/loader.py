@@ -0,0 +1,154 @@
+"""
+Column-projected readers for the customers table
+
+Training and inference read only customer_id, the input columns of the
+feature spec and any extra columns they ask for, instead of SELECT *.
+
+- AthenaUnloadReader runs UNLOAD (SELECT <columns> ...) to a staging
+  prefix as Parquet and reads the result files straight from S3 with
+  PyArrow on a thread pool. This skips Athena's paginated result path.
+  The staging files are deleted once they have been read.
+
+snapshot()/read_file()/release() expose the same steps for callers that
+keep one snapshot across several reads (resumable inference runs).
+- LocalParquetReader has the same interface over local Parquet files
+  ({root}/{table}/*.parquet or {root}/{table}.parquet), for tests and
+  benchmarks.
+"""
+
+import glob
+import os
+import uuid
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence
+
+import awswrangler as wr
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import fs as pafs
+
+from common.features import FEATURE_SPEC
+
+logger = logging.getLogger(__name__)
+
+
+def projected_columns(*extra: str) -> List[str]:
+    """customer_id, every input column of the feature spec, then any extra columns"""
+    return list(dict.fromkeys(['customer_id', *FEATURE_SPEC.input_columns, *extra]))
+
+
+class _ParquetFilesReader(ABC):
+    """Reads a table's Parquet files in parallel; subclasses say where the files are"""
+
+    def __init__(self, filesystem: pafs.FileSystem, max_workers: int = 8, prefetch_files: int = 2):
+        self.filesystem = filesystem
+        self.max_workers = max_workers
+        self.prefetch_files = prefetch_files
+
+    @abstractmethod
+    def snapshot(self, table: str, columns: Sequence[str], key: Optional[str] = None) -> List[str]:
+        """Paths of Parquet files holding the projected table, in a stable order"""
+
+    def release(self, files: List[str]):
+        """Called once the files of a snapshot are no longer needed"""
+
+    def read_file(self, path: str, columns: Sequence[str]) -> pa.Table:
+        return pq.read_table(path, columns=list(columns), filesystem=self.filesystem)
+
+    def read(self, table: str, columns: Sequence[str]) -> pd.DataFrame:
+        """Whole table with only the given columns"""
+        files = self.snapshot(table, columns)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                tables = list(pool.map(lambda path: self.read_file(path, columns), files))
+        finally:
+            self.release(files)
+        if not tables:
+            return pd.DataFrame(columns=list(columns))
+        return pa.concat_tables(tables).to_pandas()
+
+    def iter_batches(self, table: str, columns: Sequence[str],
+                     batch_size: int) -> Iterator[pd.DataFrame]:
+        """Batches of at most batch_size rows, prefetching the next files while one is consumed"""
+        files = self.snapshot(table, columns)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.prefetch_files)) as pool:
+                pending = [pool.submit(self.read_file, path, columns)
+                           for path in files[:self.prefetch_files]]
+                next_file = len(pending)
+                while pending:
+                    data = pending.pop(0).result()
+                    if next_file < len(files):
+                        pending.append(pool.submit(self.read_file, files[next_file], columns))
+                        next_file += 1
+                    for batch in data.to_batches(max_chunksize=batch_size):
+                        yield batch.to_pandas()
+                    del data
+        finally:
+            self.release(files)
+
+
+class LocalParquetReader(_ParquetFilesReader):
+    """Customers table from local Parquet files"""
+
+    def __init__(self, root: str, max_workers: int = 4, prefetch_files: int = 2):
+        super().__init__(pafs.LocalFileSystem(), max_workers, prefetch_files)
+        self.root = root
+
+    def snapshot(self, table: str, columns: Sequence[str], key: Optional[str] = None) -> List[str]:
+        single = os.path.join(self.root, f"{table}.parquet")
+        if os.path.isfile(single):
+            return [os.path.abspath(single)]
+        files = sorted(glob.glob(os.path.join(self.root, table, '**', '*.parquet'), recursive=True))
+        if not files:
+            raise FileNotFoundError(f"No Parquet files for table {table} under {self.root}")
+        return [os.path.abspath(path) for path in files]
+
+
+class AthenaUnloadReader(_ParquetFilesReader):
+    """Customers table via Athena UNLOAD to Parquet, read directly from S3"""
+
+    def __init__(self, database: str, staging_path: str, workgroup: str = 'primary',
+                 region: Optional[str] = None, max_workers: int = 8, prefetch_files: int = 2):
+        filesystem = pafs.S3FileSystem(region=region) if region else pafs.S3FileSystem()
+        super().__init__(filesystem, max_workers, prefetch_files)
+        self.database = database
+        self.staging_path = staging_path.rstrip('/')
+        self.workgroup = workgroup
+
+    def snapshot(self, table: str, columns: Sequence[str], key: Optional[str] = None) -> List[str]:
+        """UNLOAD the projected table under key (a fresh id by default) and list the files"""
+        path = f"{self.staging_path}/{table}/{key or uuid.uuid4().hex}/"
+        # UNLOAD needs an empty prefix; clear leftovers of an attempt that died mid-UNLOAD
+        wr.s3.delete_objects(path)
+        select = ', '.join(f'"{column}"' for column in columns)
+        wr.athena.unload(
+            sql=f'SELECT {select} FROM "{self.database}"."{table}"',
+            path=path,
+            database=self.database,
+            file_format='PARQUET',
+            compression='SNAPPY',
+            workgroup=self.workgroup
+        )
+        files = sorted(wr.s3.list_objects(path))
+        logger.info(f"Unloaded {len(columns)} columns of {self.database}.{table} "
+                    f"to {len(files)} files under {path}")
+        # PyArrow's S3FileSystem takes bucket/key paths without the scheme
+        return [f[len('s3://'):] for f in files]
+
+    def release(self, files: List[str]):
+        if files:
+            wr.s3.delete_objects([f"s3://{f}" for f in files])
+
+
+def make_reader(backend: str, database: str, staging_path: str = None, local_dir: str = None,
+                workgroup: str = 'primary', region: Optional[str] = None) -> _ParquetFilesReader:
+    """Reader for DATA_BACKEND ('athena' or 'local')"""
+    if backend == 'local':
+        return LocalParquetReader(local_dir)
+    if backend == 'athena':
+        return AthenaUnloadReader(database, staging_path, workgroup=workgroup, region=region)
+    raise ValueError(f"Unknown data backend: {backend}")
@@ -0,0 +1,217 @@
+"""
+Buffered metrics publishing shared by training, inference and the API
+
+MetricsPublisher.put() only appends to an in-memory buffer. A background
+thread hands the buffer to a sink every flush_interval seconds, or as soon
+as batch_size data points are waiting, so no call site waits on a network
+round trip. close() (also run at interpreter exit) flushes what is left.
+
+Sinks:
+- CloudWatchSink: put_metric_data with up to 1000 data points per call
+- EmfSink: CloudWatch Embedded Metric Format JSON lines on stdout
+  (extracted into metrics by Lambda and the CloudWatch agent)
+- LocalFileSink: one JSON line per data point, for tests and local runs
+- NullSink: drops everything
+
+A failing sink is logged and counted; it never raises into the caller.
+"""
+
+import atexit
+import json
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# CloudWatch limits: data points per PutMetricData call, dimensions per datum,
+# metrics and values per EMF document
+MAX_DATA_PER_CALL = 1000
+MAX_DIMENSIONS = 30
+MAX_EMF_METRICS = 100
+
+
+# A data point is a dict: name, value, unit, timestamp (epoch seconds), dimensions
+Datum = Dict
+
+
+class NullSink:
+    """Drops every data point"""
+
+    def send(self, namespace: str, data: List[Datum]):
+        pass
+
+
+class LocalFileSink:
+    """Append data points as JSON lines to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, namespace: str, data: List[Datum]):
+        with open(self.path, 'a') as f:
+            for datum in data:
+                f.write(json.dumps({'namespace': namespace, **datum}) + '\n')
+
+
+class CloudWatchSink:
+    """put_metric_data in batches of up to 1000 data points"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def send(self, namespace: str, data: List[Datum]):
+        metric_data = [
+            {
+                'MetricName': d['name'],
+                'Value': d['value'],
+                'Unit': d['unit'],
+                'Timestamp': datetime.fromtimestamp(d['timestamp'], tz=timezone.utc),
+                'Dimensions': [{'Name': k, 'Value': str(v)} for k, v in d['dimensions'].items()]
+            }
+            for d in data
+        ]
+        for start in range(0, len(metric_data), MAX_DATA_PER_CALL):
+            self.client.put_metric_data(Namespace=namespace,
+                                        MetricData=metric_data[start:start + MAX_DATA_PER_CALL])
+
+
+class EmfSink:
+    """Embedded Metric Format: one JSON document per dimension set and flush"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, namespace: str, data: List[Datum]):
+        groups: Dict[tuple, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+        units: Dict[str, str] = {}
+        for d in data:
+            groups[tuple(sorted(d['dimensions'].items()))][d['name']].append(d['value'])
+            units[d['name']] = d['unit']
+
+        timestamp = int(time.time() * 1000)
+        for dimensions, metrics in groups.items():
+            names = list(metrics)
+            rounds = max(len(values) for values in metrics.values())
+            # At most 100 metrics per document and 100 values per metric
+            for start in range(0, len(names), MAX_EMF_METRICS):
+                batch = names[start:start + MAX_EMF_METRICS]
+                for offset in range(0, rounds, MAX_EMF_METRICS):
+                    values = {n: metrics[n][offset:offset + MAX_EMF_METRICS] for n in batch}
+                    values = {n: v if len(v) > 1 else v[0] for n, v in values.items() if v}
+                    if not values:
+                        continue
+                    document = {
+                        '_aws': {
+                            'Timestamp': timestamp,
+                            'CloudWatchMetrics': [{
+                                'Namespace': namespace,
+                                'Dimensions': [[k for k, _ in dimensions]],
+                                'Metrics': [{'Name': n, 'Unit': units[n]} for n in values]
+                            }]
+                        },
+                        **{k: str(v) for k, v in dimensions},
+                        **values
+                    }
+                    self.stream.write(json.dumps(document) + '\n')
+        self.stream.flush()
+
+
+class MetricsPublisher:
+    """Buffer data points and flush them to a sink from a background thread"""
+
+    def __init__(self, namespace: str, sink, dimensions: Optional[Dict[str, str]] = None,
+                 batch_size: int = MAX_DATA_PER_CALL, flush_interval: float = 10.0,
+                 background: bool = True):
+        self.namespace = namespace
+        self.sink = sink
+        self.dimensions = dict(dimensions or {})
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.published = 0
+        self.failed = 0
+        self._buffer: List[Datum] = []
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, name: str, value: float, unit: str = 'None',
+            dimensions: Optional[Dict[str, str]] = None, timestamp: Optional[float] = None):
+        """Queue one data point (never blocks on the sink)"""
+        merged = {**self.dimensions, **(dimensions or {})}
+        if len(merged) > MAX_DIMENSIONS:
+            raise ValueError(f"Metric {name} has {len(merged)} dimensions (max {MAX_DIMENSIONS})")
+        datum = {'name': name, 'value': float(value), 'unit': unit,
+                 'timestamp': timestamp or time.time(), 'dimensions': merged}
+        with self._lock:
+            self._buffer.append(datum)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            if self._thread is None:
+                self.flush()
+            else:
+                self._wake.set()
+
+    def flush(self):
+        """Send everything buffered so far"""
+        with self._lock:
+            data, self._buffer = self._buffer, []
+        if not data:
+            return
+        with self._send_lock:
+            try:
+                self.sink.send(self.namespace, data)
+                self.published += len(data)
+            except Exception as e:
+                self.failed += len(data)
+                logger.warning(f"Failed to publish {len(data)} metrics to {self.namespace}: {e}")
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the background thread and flush the remaining data points"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def make_publisher(namespace: str, sink: str = 'cloudwatch', region: Optional[str] = None,
+                   path: Optional[str] = None, **kwargs) -> MetricsPublisher:
+    """Publisher for METRICS_SINK ('cloudwatch', 'emf', 'file' or 'none')"""
+    if sink == 'cloudwatch':
+        import boto3
+        client = boto3.client('cloudwatch', region_name=region)
+        return MetricsPublisher(namespace, CloudWatchSink(client), **kwargs)
+    if sink == 'emf':
+        return MetricsPublisher(namespace, EmfSink(), **kwargs)
+    if sink == 'file':
+        return MetricsPublisher(namespace, LocalFileSink(path or 'metrics.jsonl'), **kwargs)
+    if sink == 'none':
+        kwargs.setdefault('background', False)
+        return MetricsPublisher(namespace, NullSink(), **kwargs)
+    raise ValueError(f"Unknown metrics sink: {sink}")
@@ -0,0 +1,183 @@
+"""
+Compiled tree ensemble evaluator for the XGBoost models
+
+compile_xgboost() flattens a trained gbtree booster into contiguous NumPy
+node arrays (feature, threshold, left, right, default_left, value), and
+CompiledTreeEnsemble scores a batch level by level across all trees at
+once. Scoring needs only NumPy, which avoids the DMatrix and sklearn
+wrapper overhead on small batches and lets the real-time path skip
+importing xgboost entirely.
+
+Leaves point back at themselves, so running max_depth levels leaves every
+(row, tree) pair on its leaf no matter how deep that tree is.
+"""
+
+import json
+from typing import List, Optional
+
+import numpy as np
+
+# Rows x trees handled per block; small blocks keep the gathers cache-resident
+BLOCK_ELEMENTS = 1 << 16
+
+_SUPPORTED_OBJECTIVES = {'reg:squarederror', 'binary:logistic'}
+
+
+class CompiledTreeEnsemble:
+    """Vectorized evaluator over flattened tree arrays
+
+    Node arrays are indexed globally across all trees; roots holds the node
+    index of each tree's root.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots,
+                 max_depth: int, base_margin: float, objective: str,
+                 feature_names: Optional[List[str]] = None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float32)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.base_margin = float(base_margin)
+        self.objective = objective
+        self.feature_names = list(feature_names) if feature_names else None
+        # children[2 * node + went_left] is the next node, so one gather replaces a where()
+        self._children = np.stack([self.right, self.left], axis=1).ravel()
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _as_matrix(self, X) -> np.ndarray:
+        if hasattr(X, 'columns') and self.feature_names is not None:
+            if list(X.columns) != self.feature_names:
+                raise ValueError("Feature columns do not match the order the model was trained on")
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def predict_margin(self, X) -> np.ndarray:
+        """Raw sum of leaf values plus base margin for each row"""
+        X = self._as_matrix(X)
+        n_rows, n_cols = X.shape
+        out = np.empty(n_rows, dtype=np.float32)
+        flat = X.ravel()
+        has_missing = bool(np.isnan(flat).any())
+        block = max(1, BLOCK_ELEMENTS // max(1, self.n_trees))
+
+        for start in range(0, n_rows, block):
+            stop = min(start + block, n_rows)
+            row_offsets = (np.arange(start, stop, dtype=np.int64) * n_cols)[:, None]
+            node = np.broadcast_to(self.roots, (stop - start, self.n_trees))
+            for _ in range(self.max_depth):
+                x = flat[row_offsets + self.feature[node]]
+                go_left = x < self.threshold[node]
+                if has_missing:
+                    go_left |= np.isnan(x) & self.default_left[node]
+                node = self._children[(node << 1) + go_left]
+            out[start:stop] = self.value[node].sum(axis=1, dtype=np.float64) + self.base_margin
+
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        """Same output as the sklearn wrapper's predict()"""
+        margin = self.predict_margin(X)
+        if self.objective == 'binary:logistic':
+            return (_sigmoid(margin) > 0.5).astype(np.int64)
+        return margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Same output as XGBClassifier.predict_proba() for binary:logistic"""
+        if self.objective != 'binary:logistic':
+            raise AttributeError(f"predict_proba is not available for {self.objective}")
+        p = _sigmoid(self.predict_margin(X))
+        return np.column_stack([1.0 - p, p])
+
+    def save(self, path: str):
+        """Write the compiled arrays to an .npz file"""
+        meta = {
+            'max_depth': self.max_depth,
+            'base_margin': self.base_margin,
+            'objective': self.objective,
+            'feature_names': self.feature_names
+        }
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                default_left=self.default_left, value=self.value, roots=self.roots,
+                meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+            )
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledTreeEnsemble':
+        """Read arrays written by save()"""
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes().decode())
+            return cls(
+                data['feature'], data['threshold'], data['left'], data['right'],
+                data['default_left'], data['value'], data['roots'], **meta
+            )
+
+
+def _sigmoid(margin: np.ndarray) -> np.ndarray:
+    return (1.0 / (1.0 + np.exp(-margin.astype(np.float64)))).astype(np.float32)
+
+
+def compile_xgboost(model) -> CompiledTreeEnsemble:
+    """Flatten a trained XGBRegressor/XGBClassifier (or Booster) into node arrays"""
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    learner = json.loads(booster.save_raw('json'))['learner']
+
+    objective = learner['objective']['name']
+    if objective not in _SUPPORTED_OBJECTIVES:
+        raise ValueError(f"Unsupported objective: {objective}")
+    if learner['gradient_booster']['name'] != 'gbtree':
+        raise ValueError("Only gbtree boosters can be compiled")
+
+    base_score = float(learner['learner_model_param']['base_score'])
+    base_margin = (np.log(base_score / (1.0 - base_score)) if objective == 'binary:logistic'
+                   else base_score)
+
+    features, thresholds, lefts, rights, defaults, values, roots = [], [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+
+    for tree in learner['gradient_booster']['model']['trees']:
+        left = np.asarray(tree['left_children'], dtype=np.int32)
+        right = np.asarray(tree['right_children'], dtype=np.int32)
+        split_conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        n_nodes = len(left)
+        local = np.arange(n_nodes, dtype=np.int32)
+        is_leaf = left == -1
+
+        features.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+        thresholds.append(np.where(is_leaf, 0.0, split_conditions).astype(np.float32))
+        lefts.append(np.where(is_leaf, local, left) + offset)
+        rights.append(np.where(is_leaf, local, right) + offset)
+        defaults.append(np.asarray(tree['default_left'], dtype=bool))
+        values.append(np.where(is_leaf, split_conditions, 0.0).astype(np.float32))
+        roots.append(offset)
+
+        max_depth = max(max_depth, _tree_depth(left, right))
+        offset += n_nodes
+
+    return CompiledTreeEnsemble(
+        np.concatenate(features), np.concatenate(thresholds),
+        np.concatenate(lefts), np.concatenate(rights),
+        np.concatenate(defaults), np.concatenate(values),
+        np.asarray(roots, dtype=np.int32), max_depth, base_margin, objective,
+        feature_names=learner.get('feature_names') or None
+    )
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth = 0
+    level = [0]
+    while level:
+        children = [c for n in level for c in (left[n], right[n]) if c != -1]
+        if children:
+            depth += 1
+        level = children
+    return depth
@@ -9,13 +9,30 @@ import os
 import json
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 
 import boto3
 import pandas as pd
 import numpy as np
 import joblib
-import awswrangler as wr
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from common.anomaly import score_anomalies
+from common.features import FEATURE_SPEC, ScalerParams
+from common.loader import make_reader, projected_columns
+from common.metrics import make_publisher
+from common.tree_ensemble import CompiledTreeEnsemble
+from utils.artifact_cache import ArtifactCache
+from utils.checkpoint import RunCheckpoint, chunk_key
+from utils.incremental import build_state, changed_rows, feature_fingerprints, merge_predictions
+from utils.output import PartitionedPredictionWriter, filesystem_for, register_partition
+from utils.pipeline import run_pipelined
+from utils.serving import ServingTableLoader
+from utils.sharding import ShardedScorer
+from utils.summary import PredictionSummary
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,148 +45,486 @@ GLUE_DATABASE_RAW = os.getenv('GLUE_DATABASE_RAW')
 GLUE_DATABASE_ML = os.getenv('GLUE_DATABASE_ML')
 MODELS_BUCKET = os.getenv('MODELS_BUCKET')
 RESULTS_BUCKET = os.getenv('RESULTS_BUCKET')
+# Predictions, run checkpoints and run records
+RESULTS_PATH = os.getenv('RESULTS_PATH') or f"s3://{RESULTS_BUCKET}"
+RUN_ID = os.getenv('RUN_ID')  # checkpointed mode: a restart with the same RUN_ID resumes the run
 MODEL_VERSION = os.getenv('MODEL_VERSION', 'v1.0')
+# xgboost | compiled (NumPy evaluator, faster below ~1K rows per call)
+MODEL_BACKEND = os.getenv('MODEL_BACKEND', 'xgboost')
+MODEL_CACHE_DIR = os.getenv('MODEL_CACHE_DIR', '/tmp/model-cache')
+# batch | streaming | pipelined | checkpointed | incremental
+INFERENCE_MODE = os.getenv('INFERENCE_MODE', 'batch')
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', '250000'))
+DATA_BACKEND = os.getenv('DATA_BACKEND', 'athena')  # athena (UNLOAD to Parquet) | local
+LOCAL_DATA_DIR = os.getenv('LOCAL_DATA_DIR', 'data/local')
+ATHENA_RESULTS_BUCKET = os.getenv('ATHENA_RESULTS_BUCKET')
+ATHENA_WORKGROUP = os.getenv('ATHENA_WORKGROUP', 'primary')
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '2'))  # chunks buffered between stages
+SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', '1'))  # >1 scores customer_id shards in processes
+NUM_SHARDS = int(os.getenv('NUM_SHARDS', '0')) or None
+MODEL_N_JOBS = int(os.getenv('MODEL_N_JOBS', '0')) or None  # threads per model in each worker
+OUTPUT_BUCKETS = int(os.getenv('OUTPUT_BUCKETS', '16'))  # prediction files per partition
+OUTPUT_ROW_GROUP_ROWS = int(os.getenv('OUTPUT_ROW_GROUP_ROWS', '131072'))
+PREDICTIONS_TABLE = os.getenv('PREDICTIONS_TABLE', 'predictions')
+SERVING_TABLE = os.getenv('SERVING_TABLE')  # DynamoDB table the predict Lambda reads by customer_id
+SERVING_SEGMENTS = int(os.getenv('SERVING_SEGMENTS', '8'))  # parallel BatchWriteItem workers
+METRICS_SINK = os.getenv('METRICS_SINK', 'cloudwatch')  # cloudwatch | emf | file | none
+METRICS_FILE = os.getenv('METRICS_FILE', 'metrics.jsonl')
 
 # Initialize AWS clients
 s3_client = boto3.client('s3', region_name=AWS_REGION)
-cloudwatch = boto3.client('cloudwatch', region_name=AWS_REGION)
+metrics = make_publisher('MLPipeline/Inference', METRICS_SINK, region=AWS_REGION, path=METRICS_FILE)
+
+
+def publish_metric(metric_name: str, value: float, unit: str = 'None', dimensions: dict = None):
+    """Queue a custom metric; the shared publisher sends it in batches"""
+    metrics.put(metric_name, value, unit, dimensions)
 
 
-def publish_metric(metric_name: str, value: float, unit: str = 'None'):
-    """Publish custom metric to CloudWatch"""
+def load_model_manifest() -> dict:
+    """Read the model manifest published by training (one GET, no LIST)"""
+    manifest_key = f"models/{MODEL_VERSION}/manifest.json"
     try:
-        cloudwatch.put_metric_data(
-            Namespace='MLPipeline/Inference',
-            MetricData=[
-                {'MetricName': metric_name, 'Value': value, 'Unit': unit, 'Timestamp': datetime.utcnow()}
-            ]
-        )
-    except Exception as e:
-        logger.warning(f"Failed to publish metric {metric_name}: {e}")
+        response = s3_client.get_object(Bucket=MODELS_BUCKET, Key=manifest_key)
+    except s3_client.exceptions.NoSuchKey:
+        raise FileNotFoundError(f"No model manifest at s3://{MODELS_BUCKET}/{manifest_key}")
+    manifest = json.loads(response['Body'].read())
+    FEATURE_SPEC.check_schema(manifest['feature_columns'])
+    logger.info(f"Using models from training run {manifest['training_run']} ({manifest_key})")
+    return manifest
+
+
+def _fetch_model(cache: ArtifactCache, model_name: str, artifact: dict):
+    """Download (on cache miss) and unpickle one artifact"""
+    model_path = cache.fetch(MODELS_BUCKET, artifact['key'], artifact['etag'],
+                             artifact.get('sha256'))
+    logger.info(f"Loaded {model_name} from s3://{MODELS_BUCKET}/{artifact['key']}")
+    if artifact.get('format') == 'compiled-npz':
+        return CompiledTreeEnsemble.load(model_path)
+    if artifact.get('format') == 'scaler-json':
+        return ScalerParams.load(model_path)
+    return joblib.load(model_path)
 
 
 def load_models_from_s3() -> dict:
-    """Load all trained models from S3"""
+    """Load all trained models from S3 (in parallel, through the local artifact cache)"""
     logger.info("Loading models from S3...")
+    start = time.time()
     
-    models = {}
-    model_names = ['engagement', 'churn', 'ltv', 'anomaly']
+    manifest = load_model_manifest()
+    cache = ArtifactCache(s3_client, MODEL_CACHE_DIR)
+    model_names = ['engagement', 'churn', 'ltv', 'anomaly', 'scaler']
+    artifacts = dict(manifest['artifacts'])
+    if MODEL_BACKEND == 'compiled':
+        artifacts.update(manifest.get('compiled_artifacts', {}))
     
-    for model_name in model_names:
-        # Find latest model file
-        prefix = f"models/{MODEL_VERSION}/{model_name}_"
-        response = s3_client.list_objects_v2(Bucket=MODELS_BUCKET, Prefix=prefix)
-        
-        if 'Contents' not in response:
-            raise FileNotFoundError(f"No models found for {model_name} in {prefix}")
-        
-        # Get latest model
-        latest = sorted(response['Contents'], key=lambda x: x['LastModified'], reverse=True)[0]
-        model_key = latest['Key']
-        
-        # Download and load model
-        model_path = f"/tmp/{model_name}.pkl"
-        s3_client.download_file(MODELS_BUCKET, model_key, model_path)
-        models[model_name] = joblib.load(model_path)
-        
-        logger.info(f"Loaded {model_name} model from s3://{MODELS_BUCKET}/{model_key}")
+    with ThreadPoolExecutor(max_workers=len(model_names)) as executor:
+        futures = {
+            name: executor.submit(_fetch_model, cache, name, artifacts[name])
+            for name in model_names
+        }
+        models = {name: future.result() for name, future in futures.items()}
+    models['manifest'] = manifest
     
-    # Load scaler
-    scaler_key = f"preprocessing/scaler_{MODEL_VERSION}.pkl"
-    scaler_path = "/tmp/scaler.pkl"
-    s3_client.download_file(MODELS_BUCKET, scaler_key, scaler_path)
-    models['scaler'] = joblib.load(scaler_path)
+    publish_metric('ModelCacheHits', cache.hits, 'Count')
+    publish_metric('ModelCacheMisses', cache.misses, 'Count')
+    publish_metric('ModelDownloadDuration', cache.download_seconds, 'Seconds')
+    publish_metric('ModelLoadDuration', time.time() - start, 'Seconds')
     
     return models
 
 
+# customer_id plus the raw columns the feature spec reads
+INPUT_COLUMNS = projected_columns()
+
+
+def data_reader():
+    """Column-projected reader for the customers table (Athena UNLOAD or local Parquet)"""
+    return make_reader(
+        DATA_BACKEND, GLUE_DATABASE_RAW,
+        staging_path=f"s3://{ATHENA_RESULTS_BUCKET}/unload/inference",
+        local_dir=LOCAL_DATA_DIR, workgroup=ATHENA_WORKGROUP, region=AWS_REGION
+    )
+
+
 def load_customer_data() -> pd.DataFrame:
-    """Load customer data from Athena"""
-    logger.info("Loading customer data from Athena...")
-    query = f"SELECT * FROM {GLUE_DATABASE_RAW}.customers"
-    df = wr.athena.read_sql_query(query, database=GLUE_DATABASE_RAW)
+    """Load the columns inference needs for every customer"""
+    logger.info(f"Loading customer data ({DATA_BACKEND}, {len(INPUT_COLUMNS)} columns)...")
+    df = data_reader().read('customers', INPUT_COLUMNS)
     logger.info(f"Loaded {len(df)} customer records")
     return df
 
 
+def load_customer_batches(batch_size: int = BATCH_SIZE):
+    """Stream the columns inference needs in chunks of at most batch_size rows"""
+    logger.info(f"Streaming customer data ({DATA_BACKEND}) in batches of {batch_size}...")
+    return data_reader().iter_batches('customers', INPUT_COLUMNS, batch_size)
+
+
 def prepare_features(df: pd.DataFrame, scaler) -> tuple:
     """Prepare features for inference"""
     logger.info("Preparing features...")
     
-    # Feature engineering (same as training)
-    df = df.copy()
-    df['engagement_per_session'] = df['engagement_score'] / (df['sessions_last_7_days'] + 1)
-    df['avg_session_value'] = df['session_duration_avg_minutes'] * df['engagement_score']
-    df['follower_following_ratio'] = df['followers_count'] / (df['following_count'] + 1)
-    df['content_activity_rate'] = (df['posts_last_30_days'] + df['stories_last_30_days']) / 30
-    df['match_efficiency'] = df['matches_last_30_days'] / (df['swipes_right_last_30_days'] + 1)
-    df['connection_rate'] = df['total_connections'] / (df['tenure_months'] + 1)
-    df['gig_success_rate'] = df['active_gigs_count'] / (df['gig_applications_sent'] + 1)
-    df['revenue_per_gig'] = df['transaction_revenue_last_90_days'] / (df['active_gigs_count'] + 1)
-    
-    df = df.replace([float('inf'), float('-inf')], 0).fillna(0)
-    
-    # Select feature columns
-    feature_cols = [col for col in df.columns if col not in [
-        'customer_id', 'engagement_score', 'churn_30_day', 
-        'lifetime_value_usd', 'gender', 'location', 'content_category_primary'
-    ]]
-    
-    X = df[feature_cols]
-    X_scaled = pd.DataFrame(scaler.transform(X), columns=X.columns, index=X.index)
+    # Shared feature spec (same kernel as training), scaler folded in
+    X_scaled = pd.DataFrame(FEATURE_SPEC.transform(df, scaler), columns=FEATURE_SPEC.columns,
+                            index=df.index)
     
     return df[['customer_id']], X_scaled
 
 
-def generate_predictions(customer_ids: pd.DataFrame, X: pd.DataFrame, models: dict) -> pd.DataFrame:
-    """Generate predictions for all models"""
+def _untimed(stage: str):
+    return nullcontext()
+
+
+def generate_predictions(customer_ids: pd.DataFrame, X: pd.DataFrame, models: dict,
+                         prediction_timestamp: str = None, timer=_untimed) -> pd.DataFrame:
+    """Generate predictions for all models
+
+    timer(stage) returns a context manager wrapped around each model, so
+    benchmarks can time the stages of the production code path.
+    """
     logger.info("Generating predictions...")
     
     results = customer_ids.copy()
     
     # Engagement predictions
-    results['predicted_engagement_score'] = models['engagement'].predict(X)
+    with timer('engagement'):
+        results['predicted_engagement_score'] = models['engagement'].predict(X)
     
     # Churn predictions
-    results['predicted_churn_probability'] = models['churn'].predict_proba(X)[:, 1]
-    results['predicted_churn'] = (results['predicted_churn_probability'] > 0.5).astype(int)
+    with timer('churn'):
+        results['predicted_churn_probability'] = models['churn'].predict_proba(X)[:, 1]
+        results['predicted_churn'] = (results['predicted_churn_probability'] > 0.5).astype(int)
     
     # LTV predictions
-    results['predicted_ltv_usd'] = models['ltv'].predict(X)
+    with timer('ltv'):
+        results['predicted_ltv_usd'] = models['ltv'].predict(X)
     
-    # Anomaly detection
-    results['anomaly_score'] = models['anomaly'].score_samples(X)
-    results['is_anomaly'] = (models['anomaly'].predict(X) == -1).astype(int)
+    # Anomaly detection (one pass over the forest for score and label)
+    with timer('anomaly'):
+        anomalies = score_anomalies(models['anomaly'], X)
+        results['anomaly_score'] = anomalies.score
+        results['is_anomaly'] = anomalies.is_anomaly
     
     # Add metadata
     results['model_version'] = MODEL_VERSION
-    results['prediction_timestamp'] = datetime.utcnow().isoformat()
+    results['prediction_timestamp'] = prediction_timestamp or datetime.utcnow().isoformat()
     
     return results
 
 
+def score_batch(df: pd.DataFrame, models: dict, prediction_timestamp: str = None,
+                timer=_untimed) -> pd.DataFrame:
+    """Run feature preparation and all models on one batch of customers"""
+    with timer('features'):
+        customer_ids, X_scaled = prepare_features(df, models['scaler'])
+    return generate_predictions(customer_ids, X_scaled, models, prediction_timestamp, timer)
+
+
+def _incremental_state_path(extension: str) -> str:
+    return f"{RESULTS_PATH}/state/{MODEL_VERSION}/incremental_state.{extension}"
+
+
+def load_incremental_state(training_run: str):
+    """Load the previous run's fingerprints and predictions if they were made by the same models"""
+    filesystem, meta_path = filesystem_for(_incremental_state_path('json'), AWS_REGION)
+    try:
+        with filesystem.open_input_stream(meta_path) as f:
+            meta = json.loads(f.read())
+    except FileNotFoundError:
+        logger.info("No incremental state found, scoring all customers")
+        return None
+    
+    if meta.get('training_run') != training_run:
+        logger.info(f"Models changed ({meta.get('training_run')} -> {training_run}), "
+                    f"scoring all customers")
+        return None
+    
+    _, state_path = filesystem_for(_incremental_state_path('parquet'), AWS_REGION)
+    return pq.read_table(state_path, filesystem=filesystem).to_pandas()
+
+
+def save_incremental_state(results: pd.DataFrame, fingerprints: np.ndarray, training_run: str):
+    """Persist fingerprints and predictions for the next incremental run"""
+    filesystem, state_path = filesystem_for(_incremental_state_path('parquet'), AWS_REGION)
+    _, meta_path = filesystem_for(_incremental_state_path('json'), AWS_REGION)
+    filesystem.create_dir(os.path.dirname(state_path), recursive=True)
+    state = pa.Table.from_pandas(build_state(results, fingerprints), preserve_index=False)
+    pq.write_table(state, state_path, filesystem=filesystem, compression='snappy')
+    # The metadata goes last: a state file without it is never read
+    meta = {
+        'training_run': training_run,
+        'rows': len(results),
+        'updated_at': datetime.utcnow().isoformat()
+    }
+    with filesystem.open_output_stream(meta_path) as f:
+        f.write(json.dumps(meta).encode())
+
+
+def run_incremental_inference(scorer: ShardedScorer, models: dict,
+                              df: pd.DataFrame = None) -> pd.DataFrame:
+    """Rescore only new or changed customers and reuse previous predictions for the rest"""
+    df = df if df is not None else load_customer_data()
+    training_run = models['manifest']['training_run']
+    
+    fingerprints = feature_fingerprints(df)
+    previous = load_incremental_state(training_run)
+    changed = changed_rows(df['customer_id'], fingerprints, previous)
+    logger.info(f"Incremental run: rescoring {int(changed.sum())} of {len(df)} customers")
+    
+    prediction_timestamp = datetime.utcnow().isoformat()
+    scored = scorer.score(df[changed], prediction_timestamp) if changed.any() else None
+    results = merge_predictions(df['customer_id'], changed, scored, previous)
+    
+    save_results_to_s3(results)
+    save_incremental_state(results, fingerprints, training_run)
+    publish_metric('CustomersRescored', int(changed.sum()), 'Count')
+    publish_metric('CustomersReused', int((~changed).sum()), 'Count')
+    return results
+
+
+def open_prediction_writer(run_date: str = None, run_id: str = None) -> PartitionedPredictionWriter:
+    """Writer for this run's model_version/run_date partition of the predictions table"""
+    now = datetime.utcnow()
+    return PartitionedPredictionWriter(
+        f"{RESULTS_PATH}/predictions",
+        model_version=MODEL_VERSION,
+        run_date=run_date or now.strftime('%Y-%m-%d'),
+        run_id=run_id or now.strftime('%Y%m%d_%H%M%S'),
+        num_buckets=OUTPUT_BUCKETS,
+        row_group_rows=OUTPUT_ROW_GROUP_ROWS,
+        region=AWS_REGION
+    )
+
+
+def register_predictions(writer: PartitionedPredictionWriter):
+    """Add the written partition to the Glue predictions table and, if set, the serving table"""
+    register_partition(
+        GLUE_DATABASE_ML, PREDICTIONS_TABLE, writer.base_path, writer.model_version, writer.run_date
+    )
+    if SERVING_TABLE:
+        load_serving_table(writer)
+    record_run_output(writer)
+
+
+def record_run_output(writer: PartitionedPredictionWriter):
+    """Record which partition the run wrote, for the QA and results Lambdas (they get the run ID)"""
+    path = f"{RESULTS_PATH}/run_outputs/{writer.run_id}.json"
+    filesystem, target = filesystem_for(path, AWS_REGION)
+    filesystem.create_dir(os.path.dirname(target), recursive=True)
+    record = {
+        'run_id': writer.run_id,
+        'model_version': writer.model_version,
+        'run_date': writer.run_date,
+        'rows': writer.rows_written,
+        'partition_path': writer.partition_path
+    }
+    with filesystem.open_output_stream(target) as f:
+        f.write(json.dumps(record).encode())
+
+
+def load_serving_table(writer: PartitionedPredictionWriter):
+    """Push this run's predictions into the DynamoDB table the real-time API serves from"""
+    filesystem, _ = filesystem_for(writer.base_path, AWS_REGION)
+    loader = ServingTableLoader(SERVING_TABLE, region=AWS_REGION, segments=SERVING_SEGMENTS)
+    stats = loader.load_files(writer.files, writer.model_version, writer.run_date, writer.run_id,
+                              filesystem)
+    publish_metric('ServingItemsLoaded', stats.items, 'Count')
+    publish_metric('ServingItemsRetried', stats.retried, 'Count')
+    publish_metric('ServingItemsFailed', stats.failed, 'Count')
+    publish_metric('ServingLoadDuration', stats.seconds, 'Seconds')
+
+
 def save_results_to_s3(results: pd.DataFrame):
-    """Save prediction results to S3 as Parquet"""
+    """Save prediction results to S3 as a partition of the predictions table"""
     logger.info("Saving results to S3...")
     
-    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-    results_key = f"predictions/{MODEL_VERSION}/predictions_{timestamp}.parquet"
+    summary = PredictionSummary()
+    with open_prediction_writer() as writer:
+        writer.write(results)
+        summary.update(results)
+    register_predictions(writer)
     
-    # Write to S3 via awswrangler
-    wr.s3.to_parquet(
-        df=results,
-        path=f"s3://{RESULTS_BUCKET}/{results_key}",
-        dataset=False,
-        compression='snappy'
+    logger.info(f"Saved {writer.rows_written} predictions to {writer.partition_path}")
+    
+    # Publish summary statistics
+    publish_run_summary(writer, summary)
+
+
+def publish_run_summary(writer: PartitionedPredictionWriter, summary: PredictionSummary):
+    """Write the run's distribution summary beside its partition and publish the headline metrics"""
+    path = (f"{RESULTS_PATH}/summaries/model_version={writer.model_version}/"
+            f"run_date={writer.run_date}/summary-{writer.run_id}.json")
+    filesystem, target = filesystem_for(path, AWS_REGION)
+    filesystem.create_dir(os.path.dirname(target), recursive=True)
+    document = summary.to_dict(model_version=writer.model_version, run_date=writer.run_date,
+                               run_id=writer.run_id)
+    with filesystem.open_output_stream(target) as f:
+        f.write(json.dumps(document).encode())
+    logger.info(f"Wrote prediction summary to {path}")
+    
+    rates = summary.rates()
+    publish_summary_metrics(summary.rows, rates['avg_engagement'], rates['churn_rate'],
+                            rates['anomaly_rate'])
+
+
+def publish_summary_metrics(count: int, avg_engagement: float, churn_rate: float,
+                            anomaly_rate: float):
+    """Publish prediction summary statistics"""
+    publish_metric('PredictionsGenerated', count, 'Count')
+    publish_metric('AvgPredictedEngagement', avg_engagement)
+    publish_metric('ChurnRate', churn_rate)
+    publish_metric('AnomalyRate', anomaly_rate)
+
+
+def build_scorer(models: dict) -> ShardedScorer:
+    """Create the scorer for this run (in-process unless SHARD_WORKERS > 1)"""
+    return ShardedScorer(
+        models,
+        score_batch,
+        max_workers=SHARD_WORKERS,
+        num_shards=NUM_SHARDS,
+        model_n_jobs=MODEL_N_JOBS
     )
+
+
+def run_streaming_inference(scorer: ShardedScorer, batches=None) -> int:
+    """Score customers batch by batch, appending each batch to the run's partition
+
+    Only one input batch and the writer's row-group buffers are alive at a
+    time, so peak memory is bounded by BATCH_SIZE and OUTPUT_ROW_GROUP_ROWS
+    instead of the size of the customers table.
+    """
+    prediction_timestamp = datetime.utcnow().isoformat()
+    batches = batches if batches is not None else load_customer_batches(BATCH_SIZE)
+    summary = PredictionSummary()
     
-    logger.info(f"Saved {len(results)} predictions to s3://{RESULTS_BUCKET}/{results_key}")
+    with open_prediction_writer() as writer:
+        for batch_number, df in enumerate(batches, start=1):
+            results = scorer.score(df, prediction_timestamp)
+            writer.write(results)
+            summary.update(results)
+            logger.info(f"Batch {batch_number}: scored {len(results)} customers "
+                        f"({summary.rows} total)")
+            del df, results
+    register_predictions(writer)
     
-    # Publish summary statistics
-    publish_metric('PredictionsGenerated', len(results), 'Count')
-    publish_metric('AvgPredictedEngagement', results['predicted_engagement_score'].mean())
-    publish_metric('ChurnRate', results['predicted_churn'].mean())
-    publish_metric('AnomalyRate', results['is_anomaly'].mean())
+    logger.info(f"Saved {writer.rows_written} predictions to {writer.partition_path}")
+    
+    publish_run_summary(writer, summary)
+    return writer.rows_written
+
+
+def run_pipelined_inference(scorer: ShardedScorer, batches=None) -> int:
+    """Streaming inference with the next batch loading and the previous one uploading while scoring
+
+    Same output as run_streaming_inference. Bounded queues keep at most
+    PIPELINE_QUEUE_SIZE batches waiting between stages, so memory stays
+    bounded when one stage is slower than the others.
+    """
+    prediction_timestamp = datetime.utcnow().isoformat()
+    batches = batches if batches is not None else load_customer_batches(BATCH_SIZE)
+    summary = PredictionSummary()
+    
+    def write(results: pd.DataFrame):
+        writer.write(results)
+        summary.update(results)
+        logger.info(f"Wrote {len(results)} predictions ({summary.rows} total)")
+    
+    with open_prediction_writer() as writer:
+        timing = run_pipelined(
+            batches,
+            lambda df: scorer.score(df, prediction_timestamp),
+            write,
+            queue_size=PIPELINE_QUEUE_SIZE
+        )
+    register_predictions(writer)
+    
+    logger.info(
+        f"Saved {writer.rows_written} predictions to {writer.partition_path} "
+        f"in {timing.wall_seconds:.1f}s "
+        f"(load {timing.load_seconds:.1f}s, score {timing.score_seconds:.1f}s, "
+        f"write {timing.write_seconds:.1f}s, overlap {timing.overlap:.2f}x)"
+    )
+    publish_metric('PipelineOverlap', timing.overlap)
+    
+    publish_run_summary(writer, summary)
+    return writer.rows_written
+
+
+def run_checkpointed_inference(scorer: ShardedScorer, models: dict, run_id: str = None,
+                               reader=None) -> int:
+    """Pipelined inference that checkpoints every chunk and resumes an interrupted run
+
+    Each scored chunk is persisted before it is marked complete in the run's
+    progress manifest. A restart with the same run ID reuses the pinned
+    input snapshot (no new Athena query), skips completed chunks and then
+    compacts all chunks into the predictions partition in one pass, so
+    readers only ever see a complete snapshot.
+    """
+    run_id = run_id or RUN_ID or datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    reader = reader or data_reader()
+    training_run = models['manifest']['training_run']
+    checkpoint = RunCheckpoint(RESULTS_PATH, MODEL_VERSION, run_id, region=AWS_REGION)
+    manifest = checkpoint.load()
+    
+    if manifest and manifest['training_run'] != training_run:
+        logger.warning(f"Run {run_id} was started with models {manifest['training_run']}, "
+                       f"starting over")
+        manifest = None
+    if manifest and manifest['status'] == 'complete':
+        logger.info(f"Run {run_id} already completed with {manifest['rows']} predictions")
+        return manifest['rows']
+    
+    if manifest is None:
+        now = datetime.utcnow()
+        manifest = checkpoint.begin(
+            training_run=training_run,
+            input_files=reader.snapshot('customers', INPUT_COLUMNS, key=run_id),
+            batch_size=BATCH_SIZE,
+            run_date=now.strftime('%Y-%m-%d'),
+            prediction_timestamp=now.isoformat()
+        )
+    else:
+        logger.info(f"Resuming run {run_id}: {len(manifest['chunks'])} chunks already scored")
+    
+    def pending_chunks():
+        for file_index, path in enumerate(manifest['input_files']):
+            if checkpoint.file_complete(file_index):
+                continue
+            table = reader.read_file(path, INPUT_COLUMNS)
+            batches = table.to_batches(max_chunksize=manifest['batch_size'])
+            checkpoint.record_file(file_index, len(batches))
+            for batch_index, batch in enumerate(batches):
+                key = chunk_key(file_index, batch_index)
+                if not checkpoint.is_complete(key):
+                    yield key, batch.to_pandas()
+    
+    timing = run_pipelined(
+        pending_chunks(),
+        lambda item: (item[0], scorer.score(item[1], manifest['prediction_timestamp'])),
+        lambda item: checkpoint.complete_chunk(*item),
+        queue_size=PIPELINE_QUEUE_SIZE
+    )
+    publish_metric('ChunksScored', timing.chunks, 'Count')
+    publish_metric('ChunksResumed', len(manifest['chunks']) - timing.chunks, 'Count')
+    
+    # Compact the checkpointed chunks into the predictions partition
+    summary = PredictionSummary()
+    with open_prediction_writer(run_date=manifest['run_date'], run_id=run_id) as writer:
+        for key in checkpoint.chunk_keys():
+            results = checkpoint.read_chunk(key)
+            writer.write(results)
+            summary.update(results)
+    register_predictions(writer)
+    checkpoint.finish(writer.rows_written)
+    reader.release(manifest['input_files'])
+    
+    logger.info(f"Saved {writer.rows_written} predictions to {writer.partition_path} "
+                f"(run {run_id})")
+    
+    publish_run_summary(writer, summary)
+    return writer.rows_written
 
 
 def main():
@@ -181,17 +536,28 @@ def main():
         # Load models
         models = load_models_from_s3()
         
-        # Load data
-        df = load_customer_data()
-        
-        # Prepare features
-        customer_ids, X_scaled = prepare_features(df, models['scaler'])
-        
-        # Generate predictions
-        results = generate_predictions(customer_ids, X_scaled, models)
-        
-        # Save results
-        save_results_to_s3(results)
+        with build_scorer(models) as scorer:
+            if INFERENCE_MODE == 'streaming':
+                # Load, score and write one batch at a time
+                run_streaming_inference(scorer)
+            elif INFERENCE_MODE == 'pipelined':
+                # Overlap loading, scoring and writing across batches
+                run_pipelined_inference(scorer)
+            elif INFERENCE_MODE == 'checkpointed':
+                # Pipelined, with per-chunk checkpoints so a restart resumes
+                run_checkpointed_inference(scorer, models)
+            elif INFERENCE_MODE == 'incremental':
+                # Score only new/changed customers, reuse the rest
+                run_incremental_inference(scorer, models)
+            else:
+                # Load data
+                df = load_customer_data()
+                
+                # Prepare features and generate predictions, one timestamp for every shard
+                results = scorer.score(df, datetime.utcnow().isoformat())
+                
+                # Save results
+                save_results_to_s3(results)
         
         # Publish metrics
         duration = time.time() - start_time
@@ -203,6 +569,9 @@ def main():
         logger.error(f"❌ Inference pipeline failed: {e}", exc_info=True)
         publish_metric('InferenceFailureCount', 1, 'Count')
         raise
+    finally:
+        # Send whatever is still buffered before the task exits
+        metrics.close()
 
 
 if __name__ == "__main__":
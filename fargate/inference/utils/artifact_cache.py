@@ -0,0 +1,89 @@
+"""
+Content-addressed on-disk cache for model artifacts stored in S3
+
+Artifacts are stored under a name derived from bucket, key and the S3
+ETag, so an unchanged object is never downloaded twice and a new
+upload under the same key gets a new cache entry. Downloads go to a private
+temporary file and are moved into place with an atomic rename, so
+concurrent tasks sharing the cache directory never see a partial file.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a local file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Local cache of S3 objects keyed by ETag"""
+
+    def __init__(self, s3_client, cache_dir: str):
+        self.s3_client = s3_client
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.download_seconds = 0.0
+        self.bytes_downloaded = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_path(self, bucket: str, key: str, etag: str) -> str:
+        """Local path for one version of an S3 object"""
+        digest = hashlib.sha256(f"{bucket}/{key}@{etag}".encode()).hexdigest()[:32]
+        suffix = os.path.splitext(key)[1]
+        return os.path.join(self.cache_dir, f"{digest}{suffix}")
+
+    def fetch(self, bucket: str, key: str, etag: Optional[str] = None,
+              sha256: Optional[str] = None) -> str:
+        """Return a local path for s3://bucket/key, downloading only on a miss
+
+        Pass the ETag from the model manifest when it is already known to skip
+        the HEAD request. When sha256 is given, a fresh download is verified
+        against it before it is admitted to the cache.
+        """
+        if etag is None:
+            etag = self.s3_client.head_object(Bucket=bucket, Key=key)['ETag']
+        etag = etag.strip('"')
+
+        path = self.cache_path(bucket, key, etag)
+        if os.path.exists(path):
+            with self._lock:
+                self.hits += 1
+            logger.info(f"Artifact cache hit for s3://{bucket}/{key}")
+            return path
+
+        start = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.download-')
+        os.close(fd)
+        try:
+            self.s3_client.download_file(bucket, key, tmp_path)
+            if sha256 is not None and file_sha256(tmp_path) != sha256:
+                raise ValueError(f"Checksum mismatch for s3://{bucket}/{key}")
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        elapsed = time.time() - start
+        with self._lock:
+            self.misses += 1
+            self.download_seconds += elapsed
+            self.bytes_downloaded += size
+        logger.info(f"Artifact cache miss for s3://{bucket}/{key} ({size} bytes in {elapsed:.2f}s)")
+        return path
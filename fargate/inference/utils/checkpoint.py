@@ -0,0 +1,128 @@
+"""
+Checkpoints for resumable batch inference runs
+
+A run is identified by its run ID. Its state lives under
+{root}/runs/{model_version}/{run_id}/:
+
+    progress.json            input snapshot, batch size, training run, run date,
+                             prediction timestamp, batches per input file and
+                             completed chunks with their row counts
+    chunks/{chunk}.parquet   scored output of one completed chunk
+
+A chunk is one batch of one input file, keyed "{file:05d}-{batch:05d}", so
+chunk boundaries are the same on every attempt as long as the input
+snapshot and batch size are reused (both are pinned in the manifest). A
+chunk's output is written before the manifest lists it, so every listed
+chunk has a complete file.
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import fs as pafs
+
+from utils.output import filesystem_for
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'progress.json'
+
+
+def chunk_key(file_index: int, batch_index: int) -> str:
+    return f"{file_index:05d}-{batch_index:05d}"
+
+
+class RunCheckpoint:
+    """Progress manifest and per-chunk outputs of one resumable run"""
+
+    def __init__(self, root: str, model_version: str, run_id: str, region: Optional[str] = None):
+        self.run_id = run_id
+        self.path = f"{root.rstrip('/')}/runs/{model_version}/{run_id}"
+        self._fs, self._dir = filesystem_for(self.path, region)
+        self._lock = threading.Lock()
+        self.manifest: Optional[Dict] = None
+
+    def _write_json(self, name: str, payload: Dict):
+        with self._fs.open_output_stream(f"{self._dir}/{name}") as f:
+            f.write(json.dumps(payload, indent=2).encode())
+
+    def load(self) -> Optional[Dict]:
+        """Manifest of an earlier attempt with this run ID, if any"""
+        path = f"{self._dir}/{MANIFEST_NAME}"
+        if self._fs.get_file_info(path).type == pafs.FileType.NotFound:
+            return None
+        with self._fs.open_input_stream(path) as f:
+            self.manifest = json.loads(f.read())
+        return self.manifest
+
+    def begin(self, training_run: str, input_files: List[str], batch_size: int,
+              run_date: str, prediction_timestamp: str) -> Dict:
+        """Start a new run, discarding any chunks left by an earlier attempt"""
+        self._fs.create_dir(f"{self._dir}/chunks", recursive=True)
+        self._fs.delete_dir_contents(f"{self._dir}/chunks", missing_dir_ok=True)
+        self.manifest = {
+            'run_id': self.run_id,
+            'status': 'running',
+            'training_run': training_run,
+            'input_files': input_files,
+            'batch_size': batch_size,
+            'run_date': run_date,
+            'prediction_timestamp': prediction_timestamp,
+            'file_batches': {},
+            'chunks': {},
+            'started_at': datetime.utcnow().isoformat()
+        }
+        self._write_json(MANIFEST_NAME, self.manifest)
+        return self.manifest
+
+    def is_complete(self, key: str) -> bool:
+        return key in self.manifest['chunks']
+
+    def file_complete(self, file_index: int) -> bool:
+        """True once every batch of an input file has a checkpointed output"""
+        n_batches = self.manifest['file_batches'].get(str(file_index))
+        return n_batches is not None and all(
+            self.is_complete(chunk_key(file_index, b)) for b in range(n_batches)
+        )
+
+    def record_file(self, file_index: int, n_batches: int):
+        """Remember how many batches an input file splits into"""
+        with self._lock:
+            self.manifest['file_batches'][str(file_index)] = n_batches
+            self._write_json(MANIFEST_NAME, self.manifest)
+
+    def complete_chunk(self, key: str, results: pd.DataFrame):
+        """Persist one chunk's output, then mark it complete in the manifest"""
+        table = pa.Table.from_pandas(results, preserve_index=False)
+        pq.write_table(table, f"{self._dir}/chunks/{key}.parquet", filesystem=self._fs,
+                       compression='snappy')
+        with self._lock:
+            self.manifest['chunks'][key] = len(results)
+            self.manifest['updated_at'] = datetime.utcnow().isoformat()
+            self._write_json(MANIFEST_NAME, self.manifest)
+
+    def chunk_keys(self) -> List[str]:
+        """Every chunk of the run in input order; raises if any input file is unfinished"""
+        keys = []
+        for file_index in range(len(self.manifest['input_files'])):
+            if not self.file_complete(file_index):
+                raise RuntimeError(f"Run {self.run_id} has unfinished input file {file_index}")
+            n_batches = self.manifest['file_batches'][str(file_index)]
+            keys.extend(chunk_key(file_index, b) for b in range(n_batches))
+        return keys
+
+    def read_chunk(self, key: str) -> pd.DataFrame:
+        return pq.read_table(f"{self._dir}/chunks/{key}.parquet", filesystem=self._fs).to_pandas()
+
+    def finish(self, rows: int):
+        """Mark the run complete and drop the chunk outputs"""
+        self.manifest.update(status='complete', rows=rows,
+                             finished_at=datetime.utcnow().isoformat())
+        self._write_json(MANIFEST_NAME, self.manifest)
+        self._fs.delete_dir_contents(f"{self._dir}/chunks", missing_dir_ok=True)
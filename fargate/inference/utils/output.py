@@ -0,0 +1,181 @@
+"""
+Partitioned, Athena-optimized writer for prediction output
+
+Layout:
+    {base}/model_version={version}/run_date={YYYY-MM-DD}/bucket-{NNNN}-{run_id}.parquet
+
+- model_version and run_date are Hive partition columns, so they are not
+  repeated in the files and downstream queries prune on them.
+- Rows are spread over a fixed number of files by a stable customer_id
+  hash. Each row group is sorted by customer_id, so its min/max statistics
+  let Athena skip row groups on customer_id lookups.
+- prediction_timestamp is constant within a run and dictionary-encoded.
+- Row groups are flushed at a fixed row count, so memory is bounded by
+  buckets x row_group_rows no matter how many batches are written.
+
+A rerun for the same version and date replaces the partition: new files
+are written first and stale files are removed only after every bucket has
+been closed.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional
+
+import awswrangler as wr
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import fs as pafs
+
+from utils.sharding import shard_assignments
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMNS = ['model_version', 'run_date']
+
+# Athena types of the data columns, used when the Glue table has to be created
+PREDICTION_COLUMN_TYPES = {
+    'customer_id': 'string',
+    'predicted_engagement_score': 'double',
+    'predicted_churn_probability': 'double',
+    'predicted_churn': 'int',
+    'predicted_ltv_usd': 'double',
+    'anomaly_score': 'double',
+    'is_anomaly': 'int',
+    'prediction_timestamp': 'string'
+}
+
+_ARROW_TYPES = {'string': pa.string(), 'double': pa.float64(), 'int': pa.int32()}
+
+
+def filesystem_for(path: str, region: Optional[str] = None):
+    """PyArrow filesystem and scheme-less root for an s3:// URI or a local path"""
+    if path.startswith('s3://'):
+        filesystem = pafs.S3FileSystem(region=region) if region else pafs.S3FileSystem()
+        return filesystem, path[len('s3://'):]
+    return pafs.LocalFileSystem(), path
+
+
+class PartitionedPredictionWriter:
+    """Write prediction batches into a model_version/run_date partition"""
+
+    def __init__(self, base_path: str, model_version: str, run_date: str, run_id: str,
+                 num_buckets: int = 16, row_group_rows: int = 131072, region: Optional[str] = None):
+        self.base_path = base_path.rstrip('/')
+        self.model_version = model_version
+        self.run_date = run_date
+        self.run_id = run_id
+        self.num_buckets = num_buckets
+        self.row_group_rows = row_group_rows
+        self.rows_written = 0
+        self.files: List[str] = []  # this run's files (scheme-less), set by close()
+        self.schema = pa.schema([(name, _ARROW_TYPES[t])
+                                 for name, t in PREDICTION_COLUMN_TYPES.items()])
+
+        self._fs, self._root = filesystem_for(self.base_path, region)
+
+        self._partition_dir = f"{self._root}/model_version={model_version}/run_date={run_date}"
+        self._fs.create_dir(self._partition_dir, recursive=True)
+        self._stale_files = [
+            info.path for info in self._fs.get_file_info(pafs.FileSelector(self._partition_dir))
+            if info.type == pafs.FileType.File and self.run_id not in os.path.basename(info.path)
+        ]
+        self._writers: Dict[int, pq.ParquetWriter] = {}
+        self._buffers: Dict[int, List[pd.DataFrame]] = {b: [] for b in range(num_buckets)}
+        self._buffered_rows = {b: 0 for b in range(num_buckets)}
+
+    @property
+    def partition_path(self) -> str:
+        prefix = 's3://' if self.base_path.startswith('s3://') else ''
+        return f"{prefix}{self._partition_dir}/"
+
+    def _file_path(self, bucket: int) -> str:
+        return f"{self._partition_dir}/bucket-{bucket:04d}-{self.run_id}.parquet"
+
+    def _flush(self, bucket: int):
+        if not self._buffered_rows[bucket]:
+            return
+        frame = pd.concat(self._buffers[bucket]).sort_values('customer_id', kind='stable')
+        self._buffers[bucket] = []
+        self._buffered_rows[bucket] = 0
+
+        table = pa.Table.from_pandas(frame[list(PREDICTION_COLUMN_TYPES)], schema=self.schema,
+                                     preserve_index=False)
+        if bucket not in self._writers:
+            self._writers[bucket] = pq.ParquetWriter(
+                self._file_path(bucket), self.schema, filesystem=self._fs,
+                compression='snappy', use_dictionary=['prediction_timestamp'], write_statistics=True
+            )
+        self._writers[bucket].write_table(table, row_group_size=self.row_group_rows)
+        self.rows_written += len(frame)
+
+    def write(self, results: pd.DataFrame):
+        """Buffer a batch by bucket and flush every bucket that reached a full row group"""
+        if results.empty:
+            return
+        buckets = shard_assignments(results['customer_id'], self.num_buckets)
+        for bucket in np.unique(buckets):
+            part = results[buckets == bucket]
+            self._buffers[bucket].append(part)
+            self._buffered_rows[bucket] += len(part)
+            if self._buffered_rows[bucket] >= self.row_group_rows:
+                self._flush(bucket)
+
+    def close(self) -> List[str]:
+        """Flush remaining rows, close every file and drop files from earlier runs"""
+        for bucket in range(self.num_buckets):
+            self._flush(bucket)
+        for writer in self._writers.values():
+            writer.close()
+        written = [self._file_path(b) for b in sorted(self._writers)]
+        self._writers = {}
+        self.files = written
+
+        for path in self._stale_files:
+            self._fs.delete_file(path)
+        if self._stale_files:
+            logger.info(f"Replaced {len(self._stale_files)} files from an earlier run "
+                        f"in {self.partition_path}")
+        return written
+
+    def abort(self):
+        """Close open files and remove this run's partial output"""
+        for bucket, writer in self._writers.items():
+            writer.close()
+            self._fs.delete_file(self._file_path(bucket))
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def register_partition(database: str, table: str, base_path: str, model_version: str,
+                       run_date: str):
+    """Create the partitioned Glue table if needed and register one partition"""
+    base_path = base_path.rstrip('/') + '/'
+    if not wr.catalog.does_table_exist(database=database, table=table):
+        wr.catalog.create_parquet_table(
+            database=database,
+            table=table,
+            path=base_path,
+            columns_types=PREDICTION_COLUMN_TYPES,
+            partitions_types={column: 'string' for column in PARTITION_COLUMNS},
+            compression='snappy',
+            description='Batch predictions partitioned by model version and run date'
+        )
+    partition_path = f"{base_path}model_version={model_version}/run_date={run_date}/"
+    wr.catalog.add_parquet_partitions(
+        database=database,
+        table=table,
+        partitions_values={partition_path: [model_version, run_date]},
+        compression='snappy'
+    )
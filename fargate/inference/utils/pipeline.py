@@ -0,0 +1,134 @@
+"""
+Producer/consumer pipelining of load, score and write
+
+run_pipelined() overlaps the three stages of streaming inference:
+
+    loader thread  --inputs-->  calling thread (score)  --outputs-->  writer thread
+
+Both queues are bounded, so a slow stage blocks the one in front of it and
+at most queue_size chunks wait between any two stages (backpressure). With
+I/O on the side threads and scoring (NumPy/XGBoost, which release the GIL)
+in the caller, wall time approaches max(load, score, write) instead of
+their sum.
+
+The first exception raised by any stage stops the others and is re-raised
+in the caller once every thread has exited.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Iterable
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+class PipelineStats:
+    """Chunk count and busy seconds per stage for one pipelined run"""
+
+    def __init__(self):
+        self.chunks = 0
+        self.load_seconds = 0.0
+        self.score_seconds = 0.0
+        self.write_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    @property
+    def overlap(self) -> float:
+        """Busy time across stages divided by wall time (1.0 means no overlap)"""
+        busy = self.load_seconds + self.score_seconds + self.write_seconds
+        return busy / self.wall_seconds if self.wall_seconds else 0.0
+
+
+def run_pipelined(source: Iterable, process: Callable, sink: Callable,
+                  queue_size: int = 2) -> PipelineStats:
+    """Feed source through process() into sink() with each stage on its own thread"""
+    inputs: queue.Queue = queue.Queue(maxsize=queue_size)
+    outputs: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    stats = PipelineStats()
+
+    def fail(exc: BaseException):
+        errors.append(exc)
+        stop.set()
+
+    def put(q: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue):
+        while True:
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+
+    def load():
+        chunks = None
+        try:
+            chunks = iter(source)
+            while not stop.is_set():
+                start = time.perf_counter()
+                chunk = next(chunks, _DONE)
+                stats.load_seconds += time.perf_counter() - start
+                if chunk is _DONE or not put(inputs, chunk):
+                    break
+        except BaseException as exc:
+            fail(exc)
+        finally:
+            if hasattr(chunks, 'close'):
+                try:
+                    chunks.close()
+                except Exception:
+                    pass
+            put(inputs, _DONE)
+
+    def write():
+        try:
+            while True:
+                result = get(outputs)
+                if result is _DONE or stop.is_set():
+                    break
+                start = time.perf_counter()
+                sink(result)
+                stats.write_seconds += time.perf_counter() - start
+        except BaseException as exc:
+            fail(exc)
+
+    loader = threading.Thread(target=load, name='pipeline-load', daemon=True)
+    writer = threading.Thread(target=write, name='pipeline-write', daemon=True)
+    wall = time.perf_counter()
+    loader.start()
+    writer.start()
+
+    try:
+        while not stop.is_set():
+            chunk = get(inputs)
+            if chunk is _DONE:
+                break
+            start = time.perf_counter()
+            result = process(chunk)
+            stats.score_seconds += time.perf_counter() - start
+            stats.chunks += 1
+            del chunk
+            if not put(outputs, result):
+                break
+        put(outputs, _DONE)
+    except BaseException as exc:
+        fail(exc)
+    finally:
+        loader.join()
+        writer.join()
+        stats.wall_seconds = time.perf_counter() - wall
+
+    if errors:
+        raise errors[0]
+    return stats
@@ -0,0 +1,170 @@
+"""
+Bulk load of batch predictions into the DynamoDB serving table
+
+One item per customer_id holds the latest batch run's outputs, grouped by
+model as the predict Lambda returns them:
+
+    customer_id, model_version, run_date, run_id, prediction_timestamp, ttl,
+    outputs = {engagement: {...}, churn: {...}, ltv: {...}, anomaly: {...}}
+
+The run's Parquet files are split into segments that load in parallel.
+Each segment reads only the prediction columns, row group by row group,
+and sends BatchWriteItem requests of 25 items. A batch keeps only the last
+item of a repeated customer_id, since DynamoDB rejects a batch with two puts
+of one key. Items DynamoDB returns as unprocessed (throttling) are retried
+with exponential backoff and full jitter; anything still unprocessed after
+max_retries, or in a batch the call rejects, is counted as failed.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import boto3
+import pyarrow.parquet as pq
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+# Output columns of each model, as in the Lambda's responses
+MODEL_OUTPUT_COLUMNS = {
+    'engagement': ['predicted_engagement_score'],
+    'churn': ['predicted_churn_probability', 'predicted_churn'],
+    'ltv': ['predicted_ltv_usd'],
+    'anomaly': ['anomaly_score', 'is_anomaly'],
+}
+
+# DynamoDB limit on items per BatchWriteItem call
+BATCH_WRITE_LIMIT = 25
+
+
+class LoadStats:
+    """Counters of one bulk load"""
+
+    def __init__(self):
+        self.items = 0
+        self.retried = 0
+        self.failed = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items: int = 0, retried: int = 0, failed: int = 0):
+        with self._lock:
+            self.items += items
+            self.retried += retried
+            self.failed += failed
+
+
+def _number(value) -> Optional[Dict]:
+    value = float(value)
+    if not math.isfinite(value):
+        return None
+    return {'N': repr(int(value)) if value.is_integer() else repr(value)}
+
+
+class ServingTableLoader:
+    """Write prediction Parquet files into the serving table in parallel BatchWriteItem segments"""
+
+    def __init__(self, table_name: str, region: Optional[str] = None, segments: int = 8,
+                 max_retries: int = 8, base_backoff: float = 0.05, max_backoff: float = 5.0,
+                 ttl_days: int = 3, client=None):
+        self.table_name = table_name
+        self.segments = segments
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.ttl_days = ttl_days
+        # Throttled calls are also retried inside botocore; unprocessed items are handled below
+        config = Config(retries={'max_attempts': 10, 'mode': 'adaptive'},
+                        max_pool_connections=max(10, segments))
+        self.client = client or boto3.client('dynamodb', region_name=region, config=config)
+
+    def items(self, table, model_version: str, run_date: str, run_id: str,
+              ttl: int) -> Iterator[Dict]:
+        """DynamoDB items (low-level attribute values) for one Arrow table of predictions"""
+        columns = {name: table.column(name).to_pylist() for name in table.column_names}
+        for row in range(table.num_rows):
+            outputs = {}
+            for model_name, output_columns in MODEL_OUTPUT_COLUMNS.items():
+                values = {}
+                for name in output_columns:
+                    number = _number(columns[name][row]) if columns[name][row] is not None else None
+                    if number is not None:
+                        values[name] = number
+                if values:
+                    outputs[model_name] = {'M': values}
+            yield {
+                'customer_id': {'S': str(columns['customer_id'][row])},
+                'model_version': {'S': model_version},
+                'run_date': {'S': run_date},
+                'run_id': {'S': run_id},
+                'prediction_timestamp': {'S': str(columns['prediction_timestamp'][row])},
+                'ttl': {'N': str(ttl)},
+                'outputs': {'M': outputs},
+            }
+
+    def _write_batch(self, items: List[Dict], stats: LoadStats):
+        """BatchWriteItem, retrying unprocessed items with exponential backoff and full jitter"""
+        items = list({item['customer_id']['S']: item for item in items}.values())
+        pending = [{'PutRequest': {'Item': item}} for item in items]
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.batch_write_item(RequestItems={self.table_name: pending})
+            except (ClientError, BotoCoreError) as e:
+                stats.add(items=len(items) - len(pending), failed=len(pending))
+                logger.error(f"BatchWriteItem of {len(pending)} items failed: {e}")
+                return
+            pending = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not pending:
+                stats.add(items=len(items))
+                return
+            if attempt < self.max_retries:
+                stats.add(retried=len(pending))
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+                time.sleep(random.uniform(0, backoff))
+        stats.add(items=len(items) - len(pending), failed=len(pending))
+        logger.error(f"{len(pending)} items still unprocessed after {self.max_retries} retries")
+
+    def _load_segment(self, files: List[str], filesystem, model_version: str, run_date: str,
+                      run_id: str, ttl: int, stats: LoadStats):
+        columns = ['customer_id', 'prediction_timestamp']
+        columns += [c for cs in MODEL_OUTPUT_COLUMNS.values() for c in cs]
+        for path in files:
+            parquet = pq.ParquetFile(filesystem.open_input_file(path) if filesystem else path)
+            for row_group in range(parquet.num_row_groups):
+                batch = []
+                for item in self.items(parquet.read_row_group(row_group, columns=columns),
+                                       model_version, run_date, run_id, ttl):
+                    batch.append(item)
+                    if len(batch) == BATCH_WRITE_LIMIT:
+                        self._write_batch(batch, stats)
+                        batch = []
+                if batch:
+                    self._write_batch(batch, stats)
+
+    def load_files(self, files: List[str], model_version: str, run_date: str, run_id: str,
+                   filesystem=None) -> LoadStats:
+        """Load every row of the given prediction files, one segment of files per worker"""
+        stats = LoadStats()
+        start = time.perf_counter()
+        ttl = int(time.time()) + self.ttl_days * 86400
+        segments = [files[i::self.segments] for i in range(min(self.segments, len(files)))]
+        with ThreadPoolExecutor(max_workers=max(1, len(segments))) as executor:
+            futures = [
+                executor.submit(self._load_segment, segment, filesystem, model_version, run_date,
+                                run_id, ttl, stats)
+                for segment in segments
+            ]
+            for future in futures:
+                future.result()
+        stats.seconds = time.perf_counter() - start
+        logger.info(
+            f"Loaded {stats.items} predictions into {self.table_name} in {stats.seconds:.1f}s "
+            f"({len(segments)} segments, {stats.retried} retried, {stats.failed} failed)"
+        )
+        return stats
@@ -0,0 +1,233 @@
+"""
+Mergeable prediction-distribution summaries built while scoring
+
+PredictionSummary is updated with each scored chunk and never revisits
+earlier rows. Every part is mergeable (summaries of shards or chunks add
+up to the summary of the whole run):
+
+- moments: count, NaN count, sum, sum of squares, min and max per column
+- histograms over fixed bin edges, with underflow/overflow counts
+- a log-bucket quantile sketch per column (DDSketch-style): a quantile
+  estimate is within relative_accuracy of a true value at that rank
+- row counts per segment (engagement band x churn flag x anomaly flag)
+
+to_dict() is a compact JSON document written next to the predictions so
+drift and QA checks do not need a second pass or an Athena query.
+"""
+
+import math
+from collections import Counter
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Fixed histogram edges per scored column (values outside go to under/overflow)
+HISTOGRAM_EDGES = {
+    'predicted_engagement_score': np.linspace(0.0, 1.0, 21),
+    'predicted_churn_probability': np.linspace(0.0, 1.0, 21),
+    'predicted_ltv_usd': np.array([0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000],
+                                  dtype=float),
+    'anomaly_score': np.linspace(-1.0, 0.0, 21),
+}
+
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+# Engagement bands used for segment counts (upper bounds, exclusive)
+ENGAGEMENT_BANDS = [(0.3, 'low'), (0.7, 'medium'), (math.inf, 'high')]
+
+
+class QuantileSketch:
+    """Log-bucket quantile sketch with bounded relative error, mergeable by adding counts"""
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Counter = Counter()
+        self.negative: Counter = Counter()
+        self.zero = 0
+        self.count = 0
+
+    def _keys(self, magnitudes: np.ndarray) -> Counter:
+        buckets = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        keys, counts = np.unique(buckets, return_counts=True)
+        return Counter(dict(zip(keys.tolist(), counts.tolist())))
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        positive = values[values > self.min_value]
+        negative = values[values < -self.min_value]
+        self.zero += len(values) - len(positive) - len(negative)
+        if len(positive):
+            self.positive.update(self._keys(positive))
+        if len(negative):
+            self.negative.update(self._keys(-negative))
+
+    def merge(self, other: 'QuantileSketch'):
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero += other.zero
+        self.count += other.count
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'zero': self.zero,
+            'positive': {str(k): v for k, v in sorted(self.positive.items())},
+            'negative': {str(k): v for k, v in sorted(self.negative.items())},
+        }
+
+
+class ColumnSummary:
+    """Moments, fixed-edge histogram and quantile sketch of one column"""
+
+    def __init__(self, edges: Sequence[float], relative_accuracy: float = 0.01):
+        self.edges = np.asarray(edges, dtype=float)
+        self.count = 0
+        self.nan_count = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        # [underflow, bin 0 .. bin n-1, overflow]
+        self.histogram = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        nan = np.isnan(values)
+        self.nan_count += int(nan.sum())
+        values = values[~nan]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_squares += float(np.dot(values, values))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        # side='right' puts a value equal to an edge into the bin that starts there;
+        # the last edge closes the last bin
+        bins = np.searchsorted(self.edges, values, side='right')
+        bins[values == self.edges[-1]] = len(self.edges) - 1
+        self.histogram += np.bincount(bins, minlength=len(self.histogram))
+        self.sketch.update(values)
+
+    def merge(self, other: 'ColumnSummary'):
+        self.count += other.count
+        self.nan_count += other.nan_count
+        self.total += other.total
+        self.total_squares += other.total_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.histogram += other.histogram
+        self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict:
+        variance = self.total_squares / self.count - self.mean ** 2 if self.count else 0.0
+        return {
+            'count': self.count,
+            'nan_count': self.nan_count,
+            'mean': self.mean,
+            'std': math.sqrt(max(variance, 0.0)),
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'quantiles': {f"p{round(q * 100):02d}": self.sketch.quantile(q) for q in QUANTILES},
+            'histogram': {
+                'edges': self.edges.tolist(),
+                'underflow': int(self.histogram[0]),
+                'counts': self.histogram[1:-1].tolist(),
+                'overflow': int(self.histogram[-1]),
+            },
+            'sketch': self.sketch.to_dict(),
+        }
+
+
+def _segments(results: pd.DataFrame) -> Counter:
+    engagement = results['predicted_engagement_score'].to_numpy(dtype=np.float64)
+    band_index = np.searchsorted([upper for upper, _ in ENGAGEMENT_BANDS], engagement, side='right')
+    band_index = np.minimum(band_index, len(ENGAGEMENT_BANDS) - 1)
+    codes = (band_index * 4
+             + results['predicted_churn'].to_numpy(dtype=np.int64) * 2
+             + results['is_anomaly'].to_numpy(dtype=np.int64))
+    values, counts = np.unique(codes, return_counts=True)
+    segments = Counter()
+    for code, count in zip(values.tolist(), counts.tolist()):
+        band = ENGAGEMENT_BANDS[code // 4][1]
+        segments[f"engagement={band}|churn={(code // 2) % 2}|anomaly={code % 2}"] = count
+    return segments
+
+
+class PredictionSummary:
+    """Streaming, mergeable summary of a run's predictions"""
+
+    def __init__(self, edges: Dict[str, Sequence[float]] = None, relative_accuracy: float = 0.01):
+        edges = edges or HISTOGRAM_EDGES
+        self.columns = {name: ColumnSummary(e, relative_accuracy) for name, e in edges.items()}
+        self.segments: Counter = Counter()
+        self.rows = 0
+        self.churn_count = 0
+        self.anomaly_count = 0
+
+    def update(self, results: pd.DataFrame):
+        """Fold one scored chunk into the summary"""
+        self.rows += len(results)
+        self.churn_count += int(results['predicted_churn'].sum())
+        self.anomaly_count += int(results['is_anomaly'].sum())
+        for name, column in self.columns.items():
+            column.update(results[name].to_numpy())
+        self.segments.update(_segments(results))
+
+    def merge(self, other: 'PredictionSummary'):
+        self.rows += other.rows
+        self.churn_count += other.churn_count
+        self.anomaly_count += other.anomaly_count
+        for name, column in self.columns.items():
+            column.merge(other.columns[name])
+        self.segments.update(other.segments)
+
+    def rates(self) -> Dict[str, float]:
+        """Values behind the CloudWatch summary metrics"""
+        if not self.rows:
+            return {'avg_engagement': 0.0, 'churn_rate': 0.0, 'anomaly_rate': 0.0}
+        return {
+            'avg_engagement': self.columns['predicted_engagement_score'].mean,
+            'churn_rate': self.churn_count / self.rows,
+            'anomaly_rate': self.anomaly_count / self.rows,
+        }
+
+    def to_dict(self, **metadata) -> Dict:
+        return {
+            **metadata,
+            'rows': self.rows,
+            **self.rates(),
+            'columns': {name: column.to_dict() for name, column in self.columns.items()},
+            'segments': dict(sorted(self.segments.items())),
+        }
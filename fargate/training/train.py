@@ -15,6 +15,7 @@ Includes fairness checks and SHAP explainability.
 import os
 import json
 import time
+import hashlib
 import logging
 from datetime import datetime
 from typing import Dict, List, Tuple
@@ -35,8 +36,13 @@ import shap
 import joblib
 import awswrangler as wr
 
+from common.anomaly import score_anomalies
+from common.features import ScalerParams
+from common.loader import make_reader
+from common.metrics import make_publisher
+from common.tree_ensemble import compile_xgboost
 from fairness import calculate_fairness_metrics
-from preprocess import load_data_from_athena, engineer_features
+from preprocess import load_training_data, engineer_features
 
 # Configure logging
 logging.basicConfig(
@@ -53,28 +59,23 @@ GLUE_DATABASE_PROCESSED = os.getenv('GLUE_DATABASE_PROCESSED')
 FEATURES_BUCKET = os.getenv('FEATURES_BUCKET')
 MODELS_BUCKET = os.getenv('MODELS_BUCKET')
 MODEL_VERSION = os.getenv('MODEL_VERSION', 'v1.0')
+MODEL_POINTER_KEY = os.getenv('MODEL_POINTER_KEY', 'models/current.json')  # release the API serves
+PROMOTE_MODEL = os.getenv('PROMOTE_MODEL', 'true').lower() == 'true'
+DATA_BACKEND = os.getenv('DATA_BACKEND', 'athena')  # athena (UNLOAD to Parquet) | local
+LOCAL_DATA_DIR = os.getenv('LOCAL_DATA_DIR', 'data/local')
+ATHENA_RESULTS_BUCKET = os.getenv('ATHENA_RESULTS_BUCKET')
+ATHENA_WORKGROUP = os.getenv('ATHENA_WORKGROUP', 'primary')
+METRICS_SINK = os.getenv('METRICS_SINK', 'cloudwatch')  # cloudwatch | emf | file | none
+METRICS_FILE = os.getenv('METRICS_FILE', 'metrics.jsonl')
 
 # Initialize AWS clients
 s3_client = boto3.client('s3', region_name=AWS_REGION)
-cloudwatch = boto3.client('cloudwatch', region_name=AWS_REGION)
+metrics = make_publisher('MLPipeline/Training', METRICS_SINK, region=AWS_REGION, path=METRICS_FILE)
 
 
-def publish_metric(metric_name: str, value: float, unit: str = 'None'):
-    """Publish custom metric to CloudWatch"""
-    try:
-        cloudwatch.put_metric_data(
-            Namespace='MLPipeline/Training',
-            MetricData=[
-                {
-                    'MetricName': metric_name,
-                    'Value': value,
-                    'Unit': unit,
-                    'Timestamp': datetime.utcnow()
-                }
-            ]
-        )
-    except Exception as e:
-        logger.warning(f"Failed to publish metric {metric_name}: {e}")
+def publish_metric(metric_name: str, value: float, unit: str = 'None', dimensions: dict = None):
+    """Queue a custom metric; the shared publisher sends it in batches"""
+    metrics.put(metric_name, value, unit, dimensions)
 
 
 def train_engagement_model(X_train, X_test, y_train, y_test, protected_features) -> Dict:
@@ -238,17 +239,13 @@ def train_anomaly_model(X_train, X_test) -> Dict:
     
     model.fit(X_train)
     
-    # Predictions (-1 for anomaly, 1 for normal)
-    y_pred_train = model.predict(X_train)
-    y_pred_test = model.predict(X_test)
-    
-    # Anomaly scores
-    anomaly_scores_train = model.score_samples(X_train)
-    anomaly_scores_test = model.score_samples(X_test)
+    # Anomaly scores and labels (one pass over the forest per split)
+    anomalies_train = score_anomalies(model, X_train)
+    anomalies_test = score_anomalies(model, X_test)
     
     # Metrics
-    anomaly_rate_train = (y_pred_train == -1).sum() / len(y_pred_train)
-    anomaly_rate_test = (y_pred_test == -1).sum() / len(y_pred_test)
+    anomaly_rate_train = anomalies_train.is_anomaly.mean()
+    anomaly_rate_test = anomalies_test.is_anomaly.mean()
     
     logger.info(f"Anomaly Model - Test Anomaly Rate: {anomaly_rate_test:.4f}")
     publish_metric('AnomalyModel_AnomalyRate', anomaly_rate_test)
@@ -262,18 +259,37 @@ def train_anomaly_model(X_train, X_test) -> Dict:
     }
 
 
-def save_models_to_s3(models: Dict):
-    """Save all trained models to S3"""
+def upload_artifact(local_path: str, key: str) -> Dict:
+    """Upload a model artifact and describe it for the model manifest"""
+    sha256 = hashlib.sha256()
+    with open(local_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    
+    s3_client.upload_file(local_path, MODELS_BUCKET, key)
+    head = s3_client.head_object(Bucket=MODELS_BUCKET, Key=key)
+    
+    return {
+        'key': key,
+        'sha256': sha256.hexdigest(),
+        'etag': head['ETag'].strip('"'),
+        'size_bytes': head['ContentLength'],
+        'format': 'joblib'
+    }
+
+
+def save_models_to_s3(models: Dict, timestamp: str) -> Dict:
+    """Save all trained models to S3 and return their manifest entries"""
     logger.info("Saving models to S3...")
     
-    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    artifacts = {}
     
     for model_name, model_data in models.items():
         # Save model
         model_key = f"models/{MODEL_VERSION}/{model_name}_{timestamp}.pkl"
         model_path = f"/tmp/{model_name}.pkl"
         joblib.dump(model_data['model'], model_path)
-        s3_client.upload_file(model_path, MODELS_BUCKET, model_key)
+        artifacts[model_name] = upload_artifact(model_path, model_key)
         logger.info(f"Saved {model_name} to s3://{MODELS_BUCKET}/{model_key}")
         
         # Save metrics
@@ -292,6 +308,100 @@ def save_models_to_s3(models: Dict):
             Body=json.dumps(metrics_data, indent=2, default=str)
         )
         logger.info(f"Saved {model_name} metrics to s3://{MODELS_BUCKET}/{metrics_key}")
+    
+    return artifacts
+
+
+def export_compiled_models(models: Dict, scaler: StandardScaler, X_check: pd.DataFrame,
+                           timestamp: str) -> Dict:
+    """Flatten the XGBoost models into NumPy node arrays and upload them
+
+    Each compiled model is checked against the booster on X_check before it
+    is published, so consumers can switch backends without changing output.
+    The scaler is exported alongside as JSON, so the compiled set loads
+    without sklearn or joblib (the predict Lambda's cold start path).
+    """
+    logger.info("Exporting compiled tree ensembles...")
+    
+    compiled_artifacts = {}
+    
+    for model_name in ['engagement', 'churn', 'ltv']:
+        model = models[model_name]['model']
+        compiled = compile_xgboost(model)
+        
+        if model_name == 'churn':
+            expected = model.predict_proba(X_check)[:, 1]
+            max_diff = np.abs(compiled.predict_proba(X_check)[:, 1] - expected).max()
+        else:
+            max_diff = np.abs(compiled.predict(X_check) - model.predict(X_check)).max()
+        if max_diff > 1e-4:
+            raise ValueError(f"Compiled {model_name} model deviates from booster by {max_diff}")
+        
+        compiled_key = f"models/{MODEL_VERSION}/{model_name}_{timestamp}.npz"
+        compiled_path = f"/tmp/{model_name}_compiled.npz"
+        compiled.save(compiled_path)
+        compiled_artifacts[model_name] = dict(upload_artifact(compiled_path, compiled_key),
+                                              format='compiled-npz')
+        logger.info(
+            f"Exported {model_name} ({compiled.n_trees} trees, depth {compiled.max_depth}, "
+            f"max deviation {max_diff:.2e}) to s3://{MODELS_BUCKET}/{compiled_key}"
+        )
+    
+    scaler_key = f"preprocessing/scaler_{MODEL_VERSION}_{timestamp}.json"
+    scaler_path = f"/tmp/scaler_{MODEL_VERSION}.json"
+    ScalerParams.from_scaler(scaler).save(scaler_path)
+    compiled_artifacts['scaler'] = dict(upload_artifact(scaler_path, scaler_key),
+                                        format='scaler-json')
+    
+    return compiled_artifacts
+
+
+def publish_model_manifest(artifacts: Dict, compiled_artifacts: Dict,
+                           feature_columns: List[str], timestamp: str) -> str:
+    """Publish the model manifest consumers use to resolve artifacts
+
+    The manifest is written once under an immutable, timestamped key and then
+    copied to models/{MODEL_VERSION}/manifest.json, which batch inference and
+    the predict Lambda read with a single GET instead of listing prefixes.
+    Returns the immutable key.
+    """
+    manifest = {
+        'model_version': MODEL_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'training_run': timestamp,
+        'feature_columns': feature_columns,
+        'artifacts': artifacts,
+        'compiled_artifacts': compiled_artifacts
+    }
+    body = json.dumps(manifest, indent=2)
+    
+    history_key = f"models/{MODEL_VERSION}/manifests/manifest_{timestamp}.json"
+    manifest_key = f"models/{MODEL_VERSION}/manifest.json"
+    for key in (history_key, manifest_key):
+        s3_client.put_object(Bucket=MODELS_BUCKET, Key=key, Body=body,
+                             ContentType='application/json')
+    
+    logger.info(f"Published model manifest to s3://{MODELS_BUCKET}/{manifest_key}")
+    return history_key
+
+
+def promote_model_version(manifest_key: str, timestamp: str):
+    """Point the predict API at this training run's manifest
+
+    The pointer names the training run as well as MODEL_VERSION, so a
+    retrain under an unchanged version still moves it; warm containers load
+    the new models in the background and swap.
+    """
+    body = json.dumps({
+        'model_version': MODEL_VERSION,
+        'training_run': timestamp,
+        'manifest_key': manifest_key,
+        'promoted_at': datetime.utcnow().isoformat()
+    })
+    s3_client.put_object(Bucket=MODELS_BUCKET, Key=MODEL_POINTER_KEY, Body=body,
+                         ContentType='application/json')
+    logger.info(f"Promoted model version {MODEL_VERSION}, training run {timestamp} "
+                f"(s3://{MODELS_BUCKET}/{MODEL_POINTER_KEY})")
 
 
 def main():
@@ -302,21 +412,20 @@ def main():
     try:
         # 1. Load data from Athena
         logger.info("Loading data from Athena...")
-        df = load_data_from_athena(GLUE_DATABASE_RAW, 'customers')
+        reader = make_reader(
+            DATA_BACKEND, GLUE_DATABASE_RAW,
+            staging_path=f"s3://{ATHENA_RESULTS_BUCKET}/unload/training",
+            local_dir=LOCAL_DATA_DIR, workgroup=ATHENA_WORKGROUP, region=AWS_REGION
+        )
+        df = load_training_data(reader)
         logger.info(f"Loaded {len(df)} customer records")
         
         # 2. Feature engineering
         logger.info("Engineering features...")
-        df_features = engineer_features(df)
+        X = engineer_features(df)
         
         # 3. Split features and targets
-        feature_cols = [col for col in df_features.columns if col not in [
-            'customer_id', 'engagement_score', 'churn_30_day', 
-            'lifetime_value_usd', 'gender', 'location'
-        ]]
-        
-        X = df_features[feature_cols]
-        protected_features = df_features[['gender']]  # For fairness analysis
+        protected_features = df[['gender']]  # For fairness analysis
         
         # Scale features
         scaler = StandardScaler()
@@ -327,19 +436,17 @@ def main():
         )
         
         # Save scaler
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
         scaler_path = f"/tmp/scaler_{MODEL_VERSION}.pkl"
         joblib.dump(scaler, scaler_path)
-        s3_client.upload_file(
-            scaler_path,
-            MODELS_BUCKET,
-            f"preprocessing/scaler_{MODEL_VERSION}.pkl"
-        )
+        scaler_artifact = upload_artifact(
+            scaler_path, f"preprocessing/scaler_{MODEL_VERSION}_{timestamp}.pkl")
         
         # Initialize models dictionary
         models = {}
         
         # 4. Train Engagement Model
-        y_engagement = df_features['engagement_score']
+        y_engagement = df['engagement_score']
         X_train, X_test, y_train, y_test, pf_train, pf_test = train_test_split(
             X_scaled, y_engagement, protected_features,
             test_size=0.2, random_state=42
@@ -349,7 +456,7 @@ def main():
         )
         
         # 5. Train Churn Model
-        y_churn = df_features['churn_30_day']
+        y_churn = df['churn_30_day']
         X_train, X_test, y_train, y_test, pf_train, pf_test = train_test_split(
             X_scaled, y_churn, protected_features,
             test_size=0.2, random_state=42
@@ -359,7 +466,7 @@ def main():
         )
         
         # 6. Train LTV Model
-        y_ltv = df_features['lifetime_value_usd']
+        y_ltv = df['lifetime_value_usd']
         X_train, X_test, y_train, y_test, pf_train, pf_test = train_test_split(
             X_scaled, y_ltv, protected_features,
             test_size=0.2, random_state=42
@@ -372,8 +479,14 @@ def main():
         X_train, X_test = train_test_split(X_scaled, test_size=0.2, random_state=42)
         models['anomaly'] = train_anomaly_model(X_train, X_test)
         
-        # 8. Save all models to S3
-        save_models_to_s3(models)
+        # 8. Save all models to S3, export compiled ensembles and publish the manifest
+        artifacts = save_models_to_s3(models, timestamp)
+        artifacts['scaler'] = scaler_artifact
+        compiled_artifacts = export_compiled_models(models, scaler, X_test.head(1000), timestamp)
+        manifest_key = publish_model_manifest(artifacts, compiled_artifacts, list(X.columns),
+                                              timestamp)
+        if PROMOTE_MODEL:
+            promote_model_version(manifest_key, timestamp)
         
         # 9. Publish overall training metrics
         duration = time.time() - start_time
@@ -386,6 +499,9 @@ def main():
         logger.error(f"❌ Training pipeline failed: {e}", exc_info=True)
         publish_metric('TrainingFailureCount', 1, 'Count')
         raise
+    finally:
+        # Send whatever is still buffered before the task exits
+        metrics.close()
 
 
 if __name__ == "__main__":
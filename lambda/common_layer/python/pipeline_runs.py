@@ -0,0 +1,36 @@
+"""
+Shared helpers for the pipeline's post-inference Lambdas (deployed as the common layer)
+
+Lambda adds the layer's python/ directory to sys.path, so handlers import
+this module by name.
+"""
+
+import json
+import re
+
+# Partition values are interpolated into Athena SQL, so only these shapes are accepted
+RUN_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+MODEL_VERSION_PATTERN = re.compile(r'^v\d+(\.\d+){1,2}$')
+
+
+def run_partition(event: dict, s3_client, results_bucket: str) -> tuple:
+    """(model_version, run_date) of the inference run's predictions partition
+
+    The pipeline passes the run ID and the partition comes from the record
+    inference wrote; manual invocations can name the partition instead.
+    Either way both values are checked before they reach a query.
+    """
+    if event.get('run_id'):
+        key = f"run_outputs/{event['run_id']}.json"
+        record = json.loads(s3_client.get_object(Bucket=results_bucket, Key=key)['Body'].read())
+        model_version, run_date = record['model_version'], record['run_date']
+    elif event.get('model_version') and event.get('run_date'):
+        model_version, run_date = event['model_version'], event['run_date']
+    else:
+        raise ValueError("Event needs a run_id, or a model_version and run_date")
+
+    if not isinstance(model_version, str) or not MODEL_VERSION_PATTERN.match(model_version):
+        raise ValueError(f"Invalid model_version: {model_version!r}")
+    if not isinstance(run_date, str) or not RUN_DATE_PATTERN.match(run_date):
+        raise ValueError(f"Invalid run_date: {run_date!r}")
+    return model_version, run_date
@@ -2,18 +2,22 @@
 Create QA Table Lambda: Sample 400 records for manual review
 """
 
+import logging
 import os
+
 import boto3
-import logging
+from pipeline_runs import run_partition  # common layer
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 athena_client = boto3.client('athena')
+s3_client = boto3.client('s3')
 
 ENV = os.getenv('ENV', 'dev')
 ATHENA_WORKGROUP = os.getenv('ATHENA_WORKGROUP')
 GLUE_DATABASE_ML = os.getenv('GLUE_DATABASE_ML')
+RESULTS_BUCKET = os.getenv('RESULTS_BUCKET')
 QA_SAMPLE_SIZE = int(os.getenv('QA_SAMPLE_SIZE', '400'))
 
 
@@ -22,6 +26,9 @@ def lambda_handler(event, context):
     logger.info("Creating QA table...")
     
     try:
+        model_version, run_date = run_partition(event, s3_client, RESULTS_BUCKET)
+        logger.info(f"Reading predictions of model {model_version}, run date {run_date}")
+        
         # Stratified sampling query (100 per quartile)
         query = f"""
         CREATE TABLE {GLUE_DATABASE_ML}.qa_sample
@@ -30,6 +37,7 @@ def lambda_handler(event, context):
         SELECT * FROM (
             SELECT *, NTILE(4) OVER (ORDER BY predicted_engagement_score) as quartile
             FROM {GLUE_DATABASE_ML}.predictions
+            WHERE model_version = '{model_version}' AND run_date = '{run_date}'
         )
         WHERE MOD(ABS(xxhash64(customer_id)), 10) = 0
         LIMIT {QA_SAMPLE_SIZE}
@@ -2,14 +2,17 @@
 Create Results Table Lambda: Join original features + predictions
 """
 
+import logging
 import os
+
 import boto3
-import logging
+from pipeline_runs import run_partition  # common layer
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 athena_client = boto3.client('athena')
+s3_client = boto3.client('s3')
 
 ENV = os.getenv('ENV', 'dev')
 ATHENA_WORKGROUP = os.getenv('ATHENA_WORKGROUP')
@@ -23,6 +26,9 @@ def lambda_handler(event, context):
     logger.info("Creating results table...")
     
     try:
+        model_version, run_date = run_partition(event, s3_client, RESULTS_BUCKET)
+        logger.info(f"Reading predictions of model {model_version}, run date {run_date}")
+        
         query = f"""
         CREATE TABLE {GLUE_DATABASE_ML}.predictions_final
         WITH (format='PARQUET', external_location='s3://{RESULTS_BUCKET}/final/')
@@ -40,6 +46,8 @@ def lambda_handler(event, context):
         FROM {GLUE_DATABASE_RAW}.customers c
         LEFT JOIN {GLUE_DATABASE_ML}.predictions p
         ON c.customer_id = p.customer_id
+        AND p.model_version = '{model_version}'
+        AND p.run_date = '{run_date}'
         """
         
         response = athena_client.start_query_execution(
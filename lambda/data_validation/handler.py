@@ -36,7 +36,8 @@ def lambda_handler(event, context):
             }]
         )
         
-        logger.info(f"✅ Data validation completed: quality score = {validation_results['quality_score']}")
+        logger.info(f"✅ Data validation completed: "
+                    f"quality score = {validation_results['quality_score']}")
         
         return {
             'statusCode': 200,
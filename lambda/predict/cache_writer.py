@@ -0,0 +1,152 @@
+"""
+Cache writes off the response path
+
+CacheWriter buffers DynamoDB cache items (bounded; later writes of a key
+replace earlier ones) and writes them with BatchWriteItem, retrying
+unprocessed items. Who calls flush() depends on where the code runs:
+
+- Lambda: AfterResponse registers an internal extension, so Lambda does not
+  freeze the environment until the extension has finished its work for the
+  invocation. The flush runs after the handler has returned (the response is
+  already on its way) and before the freeze.
+- Elsewhere (the prediction server, local runs): a background thread
+  flushes shortly after items arrive.
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# DynamoDB limit on items per BatchWriteItem call
+BATCH_WRITE_LIMIT = 25
+
+
+class CacheWriter:
+    """Bounded buffer of cache items, written in BatchWriteItem calls by flush()
+
+    put() never blocks on DynamoDB. Beyond max_pending buffered items new
+    ones are dropped (counted in dropped); items still unprocessed after
+    retries, or in a failed call, are counted in failed.
+    """
+
+    def __init__(self, table_name: str, dynamodb,
+                 key_names: Sequence[str] = ('customer_id', 'feature_hash'),
+                 max_pending: int = 10000, retries: int = 5,
+                 on_flush: Optional[Callable[[int, int, int], None]] = None):
+        self.table_name = table_name
+        self.dynamodb = dynamodb
+        self.key_names = tuple(key_names)
+        self.max_pending = max_pending
+        self.retries = retries
+        self.on_flush = on_flush
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._pending: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def put(self, items: Iterable[dict]):
+        """Buffer items for the next flush"""
+        with self._lock:
+            for item in items:
+                key = tuple(item[name] for name in self.key_names)
+                if key not in self._pending and len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._pending[key] = item
+        self._wake.set()
+
+    def flush(self):
+        """Write everything buffered so far; returns (written, failed)"""
+        with self._send_lock:
+            with self._lock:
+                items = list(self._pending.values())
+                self._pending.clear()
+                dropped = self.dropped - self._reported_dropped
+                self._reported_dropped = self.dropped
+            failed = sum(self._write(items[start:start + BATCH_WRITE_LIMIT])
+                         for start in range(0, len(items), BATCH_WRITE_LIMIT))
+            with self._lock:
+                self.written += len(items) - failed
+                self.failed += failed
+            if self.on_flush and (items or dropped):
+                self.on_flush(len(items) - failed, failed, dropped)
+            return len(items) - failed, failed
+
+    def _write(self, items: list) -> int:
+        """One BatchWriteItem call, retrying unprocessed items; returns the number not written"""
+        request = {self.table_name: [{'PutRequest': {'Item': item}} for item in items]}
+        try:
+            for attempt in range(self.retries):
+                response = self.dynamodb.batch_write_item(RequestItems=request)
+                request = response.get('UnprocessedItems')
+                if not request:
+                    return 0
+                time.sleep(0.05 * 2 ** attempt)
+            return len(request[self.table_name])
+        except Exception as e:
+            logger.warning(f"Failed to write {len(items)} cache items: {e}")
+            return len(items)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self, linger_seconds: float = 0.05):
+        """Flush from a background thread, linger_seconds after each batch's first item arrives"""
+        def run():
+            while True:
+                self._wake.wait()
+                time.sleep(linger_seconds)
+                self._wake.clear()
+                self.flush()
+
+        threading.Thread(target=run, name='cache-writer', daemon=True).start()
+
+
+class AfterResponse:
+    """Lambda internal extension running callback after each invocation, before the freeze
+
+    The handler calls invocation_done() when it returns; the extension then
+    runs callback and only then asks the Extensions API for the next event,
+    which is what lets Lambda freeze the environment.
+    """
+
+    def __init__(self, runtime_api: str, callback: Callable[[], None],
+                 name: str = 'predict-cache-writer'):
+        self.base_url = f"http://{runtime_api}/2020-01-01/extension"
+        self.callback = callback
+        self._done = threading.Semaphore(0)
+        request = urllib.request.Request(
+            f"{self.base_url}/register", data=json.dumps({'events': ['INVOKE']}).encode(),
+            headers={'Lambda-Extension-Name': name}, method='POST'
+        )
+        with urllib.request.urlopen(request) as response:
+            self.extension_id = response.headers['Lambda-Extension-Identifier']
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def invocation_done(self):
+        self._done.release()
+
+    def _next_event(self) -> dict:
+        request = urllib.request.Request(f"{self.base_url}/event/next",
+                                         headers={'Lambda-Extension-Identifier': self.extension_id})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    def _run(self):
+        while True:
+            self._next_event()  # blocks until the next invocation starts
+            self._done.acquire()
+            try:
+                self.callback()
+            except Exception as e:
+                logger.warning(f"After-response work failed: {e}")
@@ -1,15 +1,77 @@
 """
-Predict Lambda: Real-time prediction API with DynamoDB caching
+Predict Lambda: Real-time prediction API with a two-tier prediction cache
+
+Request shapes:
+- {"customer_features": {...}, "model_name": "churn"}: one model's raw predict()
+- {"customer_features": {...}, "model_names": [...]}: several models from one
+  feature vector, with the batch pipeline's outputs (churn probability and
+  label, anomaly score and label)
+- {"customers": [...], "model_names": [...]}: up to MAX_BATCH_SIZE customers
+- {"customer_id": "...", "model_names": [...]}: the latest batch run's
+  predictions from the SERVING_TABLE; live scoring only when the customer
+  is missing there and customer_features are included
+
+customer_features are encoded against the feature spec (column order by
+name, values validated as numbers; other keys ignored) and the cache key is
+a hash of the encoded row's fixed binary layout.
+
+Multi-model and batch requests cache one combined item per feature hash
+holding every model's outputs, so a request costs one cache read and one
+cache write whatever the number of models.
+
+Lookups go to an in-process LRU (warm containers, microseconds) first and
+to DynamoDB (shared, milliseconds) second; DynamoDB hits are promoted into
+the LRU. Both tiers honour CACHE_TTL_SECONDS and the model release. New results
+go into the LRU at once and into DynamoDB after the response has been
+returned (cache_writer.py), so latency_ms covers lookups and scoring only.
+Identical misses already being scored by another thread (same release,
+model set and feature hash), and concurrent first loads of a model, wait for
+that computation and share its result (single_flight.py).
+
+Cold start: with MODEL_FORMAT=compiled the scaler and tree models are the
+JSON/npz artifacts training exports, which load with NumPy alone (no
+sklearn, xgboost or joblib import, no unpickling). EAGER_MODELS are loaded
+during init, which runs before the first request and with full CPU, rather
+than on the first request's critical path. Pickled models (the anomaly
+forest, or MODEL_FORMAT=pickle) import joblib only when first needed. The
+first invocation publishes InitDuration (init after the imports) and
+FirstInvokeLatency.
+
+Model rollout: the served models come from the MODEL_POINTER_KEY object
+(written by training), read at init and re-checked at most every
+MODEL_CHECK_SECONDS on a background thread. The pointer names a release:
+a model version plus the training run that published it, so retraining
+under the same MODEL_VERSION is a new release too. A new release's models
+load in the background and are swapped in atomically between requests; each
+request is pinned to one release, which is part of every cache key.
+
+server.py serves the same API from a long-running container, micro-batching
+concurrent single-customer requests through predict_rows and score_customers.
 """
 
-import os
 import json
-import hashlib
+import logging
+import os
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from decimal import Decimal
+
 import boto3
-import logging
-import joblib
 import numpy as np
+from cache_writer import AfterResponse, CacheWriter
+# Shared with training and batch inference; bundled by `make package-lambda-predict`
+from common.anomaly import score_anomalies
+from common.features import FEATURE_SPEC, ScalerParams
+from common.metrics import make_publisher
+from common.tree_ensemble import CompiledTreeEnsemble
+from local_cache import LocalCache
+from single_flight import SingleFlight
+
+# Init work after the imports (Lambda's REPORT Init Duration covers the imports too)
+_INIT_STARTED = time.perf_counter()
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -20,112 +82,755 @@ dynamodb = boto3.resource('dynamodb')
 ENV = os.getenv('ENV', 'dev')
 MODELS_BUCKET = os.getenv('MODELS_BUCKET')
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE')
-MODEL_VERSION = os.getenv('MODEL_VERSION', 'v1.0')
+MODEL_VERSION = os.getenv('MODEL_VERSION', 'v1.0')  # initial version; the pointer below can move it
+# {"model_version", "training_run", "manifest_key"} of the release to serve; '' disables reloads
+MODEL_POINTER_KEY = os.getenv('MODEL_POINTER_KEY', 'models/current.json')
+MODEL_CHECK_SECONDS = int(os.getenv('MODEL_CHECK_SECONDS', '60'))
 CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', '3600'))
+# Cache items awaiting write; beyond it they are dropped
+CACHE_WRITE_BUFFER = int(os.getenv('CACHE_WRITE_BUFFER', '10000'))
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '500'))  # customers per batch request
+LOCAL_CACHE_SIZE = int(os.getenv('LOCAL_CACHE_SIZE', '10000'))  # in-process entries; 0 disables
+METRICS_SINK = os.getenv('METRICS_SINK', 'emf')  # Lambda extracts EMF from the function logs
+MODEL_FORMAT = os.getenv('MODEL_FORMAT', 'compiled')  # compiled (JSON/npz, NumPy only) | pickle
+EAGER_MODELS = [m for m in os.getenv('EAGER_MODELS', 'scaler,engagement,churn,ltv').split(',') if m]
+SERVING_TABLE = os.getenv('SERVING_TABLE')  # batch predictions by customer_id (batch inference)
+
+# DynamoDB limits per BatchGetItem call and retries for unprocessed keys
+BATCH_GET_LIMIT = 100
+BATCH_GET_RETRIES = 5
+
+# Sort key of the combined per-customer item holding every model's outputs
+OUTPUTS_KEY = 'outputs'
+# Local cache slot for a customer_id's batch predictions
+BATCH_KEY = 'batch'
+LOOKUP_MODELS = ['engagement', 'churn', 'ltv', 'anomaly']
+LABEL_OUTPUTS = {'predicted_churn', 'is_anomaly'}
 
 table = dynamodb.Table(DYNAMODB_TABLE)
+serving_table = dynamodb.Table(SERVING_TABLE) if SERVING_TABLE else None
+metrics = make_publisher('MLPipeline/Predict', METRICS_SINK, background=False)
+
+# Release of the served models: "{model_version}@{training_run}" once read from the pointer
+# (just the version without one, e.g. when the pointer is disabled)
+MODEL_RELEASE = MODEL_VERSION
+
+# Loaded models and manifests per release (the active one and the one before it, or the one being
+# loaded); _model_cache is the active release's models
+_loaded_releases = {MODEL_RELEASE: {}}
+_model_cache = _loaded_releases[MODEL_RELEASE]
+_manifests = {}
+_manifest_keys = {}  # release -> immutable manifest key from the pointer
+_first_invoke = True
+
+# Release a request is served with, pinned on entry so a swap never mixes releases within a request
+_request_release: ContextVar = ContextVar('request_release', default=None)
+_version_lock = threading.Lock()
+_version_check = None  # background pointer check / preload (Future)
+_next_version_check = time.time() + MODEL_CHECK_SECONDS
+_reloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-reload')
+
+# First cache tier, keyed (model_release, feature_hash, model_name or OUTPUTS_KEY);
+# lookups per tier since cold start
+local_cache = LocalCache(LOCAL_CACHE_SIZE, CACHE_TTL_SECONDS)
+_cache_lookups = Counter()
+
+# Concurrent identical work in this process (server threads, background reloads) runs once and is
+# shared
+in_flight = SingleFlight()  # predictions, keyed (model_release, slot, feature_hash)
+model_loads = SingleFlight()  # model loads, keyed (model_release, model_name)
 
-# Global model cache (Lambda warm start optimization)
-_model_cache = {}
+
+class RequestError(ValueError):
+    """Malformed request (returned as 400)"""
+
+
+class CustomerNotFound(LookupError):
+    """No batch predictions and nothing to score live (returned as 404)"""
 
 
 def lambda_handler(event, context):
     """Handle real-time prediction requests"""
     start_time = time.time()
+    version_token = None
     
     try:
+        version_token = pin_model_version()
         # Parse request
-        body = json.loads(event.get('body', '{}'))
-        features = body.get('customer_features', {})
-        model_name = body.get('model_name', 'engagement')
-        
-        # Generate feature hash for caching
-        feature_hash = hashlib.sha256(json.dumps(features, sort_keys=True).encode()).hexdigest()[:16]
-        
-        # Check cache
-        cached_prediction = get_cached_prediction(feature_hash, model_name)
-        if cached_prediction:
-            logger.info("Cache hit")
-            return format_response(200, {
-                'prediction': cached_prediction,
-                'cached': True,
-                'latency_ms': (time.time() - start_time) * 1000
-            })
+        body = json.loads(event.get('body') or '{}')
+        if 'customers' in body:
+            return format_response(200, predict_batch(body, start_time))
+        if 'customer_id' in body:
+            return format_response(200, predict_by_customer_id(body, start_time))
+        if 'model_names' in body:
+            return format_response(200, predict_models(body, start_time))
+        row = encode_features(body.get('customer_features', {}))
+        model_name = check_model_names([body.get('model_name', 'engagement')])[0]
         
-        # Load model and predict
-        model = load_model(model_name)
-        feature_vector = prepare_features(features)
-        prediction = float(model.predict([feature_vector])[0])
-        
-        # Cache result
-        cache_prediction(feature_hash, model_name, prediction)
-        
-        latency = (time.time() - start_time) * 1000
-        logger.info(f"Prediction completed in {latency:.2f}ms")
-        
-        return format_response(200, {
-            'prediction': prediction,
-            'model_name': model_name,
-            'model_version': MODEL_VERSION,
-            'cached': False,
-            'latency_ms': latency
-        })
+        # Cache lookup, then predict and cache on a miss
+        [(prediction, tier)] = predict_rows([row], model_name)
+        response = single_response(prediction, tier, model_name, start_time)
+        if tier:
+            logger.info(f"Cache hit ({tier})")
+        else:
+            logger.info(f"Prediction completed in {response['latency_ms']:.2f}ms")
+        return format_response(200, response)
         
+    except RequestError as e:
+        return format_response(400, {'error': str(e)})
+    except CustomerNotFound as e:
+        return format_response(404, {'error': str(e)})
     except Exception as e:
         logger.error(f"❌ Prediction failed: {e}", exc_info=True)
         return format_response(500, {'error': str(e)})
+    finally:
+        if version_token is not None:
+            unpin_model_version(version_token)
+        record_first_invoke(start_time)
+        metrics.flush()
+        if after_response is not None:
+            after_response.invocation_done()
+
+
+def record_first_invoke(start_time: float):
+    """Report init duration against the first request's latency, once per container"""
+    global _first_invoke
+    if not _first_invoke:
+        return
+    _first_invoke = False
+    latency = (time.time() - start_time) * 1000
+    logger.info(f"Cold start: init {INIT_DURATION_MS:.1f}ms, first invoke {latency:.1f}ms "
+                f"(models loaded at init: {sorted(_model_cache)})")
+    metrics.put('InitDuration', INIT_DURATION_MS, 'Milliseconds', {'ModelFormat': MODEL_FORMAT})
+    metrics.put('FirstInvokeLatency', latency, 'Milliseconds', {'ModelFormat': MODEL_FORMAT})
+
+
+def model_outputs(model_name: str, model, X: np.ndarray) -> dict:
+    """Output columns of one model over X, named as in the batch predictions table"""
+    if model_name == 'churn':
+        probability = model.predict_proba(X)[:, 1]
+        return {'predicted_churn_probability': probability,
+                'predicted_churn': (probability > 0.5).astype(int)}
+    if model_name == 'anomaly':
+        anomalies = score_anomalies(model, X)
+        return {'anomaly_score': anomalies.score, 'is_anomaly': anomalies.is_anomaly}
+    if model_name == 'engagement':
+        return {'predicted_engagement_score': model.predict(X)}
+    if model_name == 'ltv':
+        return {'predicted_ltv_usd': model.predict(X)}
+    return {'prediction': model.predict(X)}
+
+
+def check_model_names(model_names) -> list:
+    if not isinstance(model_names, list) or not model_names:
+        raise RequestError("model_names must be a non-empty list")
+    artifacts = load_manifest()['artifacts']
+    unknown = [m for m in model_names
+               if not isinstance(m, str) or m not in artifacts or m == 'scaler']
+    if unknown:
+        raise RequestError(f"Unknown models: {unknown}")
+    return list(dict.fromkeys(model_names))
+
+
+def score_customers(encoded_rows: list, model_names: list):
+    """Outputs of every requested model per customer, plus each customer's cache status
+
+    One cache read for all customers, one feature matrix for those missing
+    any model, one vectorized call per model over its misses and one cache
+    write of the merged outputs. Misses another thread is already computing
+    are waited for instead.
+    """
+    values_by_hash = dict(encoded_rows)
+    hashes = [feature_hash for feature_hash, _ in encoded_rows]
+
+    cached = get_cached_outputs(list(values_by_hash))
+    outputs = {h: dict(cached.get(h, {})) for h in values_by_hash}
+    missing = [h for h in values_by_hash if any(m not in outputs[h] for m in model_names)]
+
+    def compute(missing: list) -> dict:
+        X = FEATURE_SPEC.transform_values([values_by_hash[h] for h in missing],
+                                          load_model('scaler'))
+        for model_name in model_names:
+            rows = [i for i, h in enumerate(missing) if model_name not in outputs[missing[i]]]
+            if rows:
+                columns = model_outputs(model_name, load_model(model_name), X[rows])
+                for j, i in enumerate(rows):
+                    outputs[missing[i]][model_name] = {
+                        name: int(values[j]) if name in LABEL_OUTPUTS else float(values[j])
+                        for name, values in columns.items()
+                    }
+        cache_outputs({h: outputs[h] for h in missing})
+        return {h: outputs[h] for h in missing}
+
+    if missing:
+        outputs.update(compute_once((OUTPUTS_KEY, tuple(model_names)), missing, compute))
+
+    results = []
+    for feature_hash in hashes:
+        hits = sum(m in cached.get(feature_hash, {}) for m in model_names)
+        status = 'hit' if hits == len(model_names) else 'partial' if hits else 'miss'
+        results.append(({m: outputs[feature_hash][m] for m in model_names}, status))
+    return results, len(missing)
+
+
+def predict_models(body: dict, start_time: float) -> dict:
+    """Several models for one customer from a single feature vector"""
+    model_names = check_model_names(body['model_names'])
+    row = encode_features(body.get('customer_features', {}))
+    [(outputs, status)], _ = score_customers([row], model_names)
+    response = models_response(model_names, outputs, status, start_time)
+    logger.info(f"Scored {len(model_names)} models in {response['latency_ms']:.2f}ms "
+                f"(cache {status})")
+    return response
+
+
+def predict_rows(rows: list, model_name: str) -> list:
+    """One model's raw predict() per encoded row and the cache tier that answered (None if computed)
+
+    One cache lookup for all rows and one vectorized predict over the misses
+    (those not already being computed by another thread).
+    """
+    hashes = [feature_hash for feature_hash, _ in rows]
+    cached = get_cached_predictions(list(dict.fromkeys(hashes)), model_name)
+    missing = {h: values for h, values in rows if h not in cached}
+
+    def compute(hashes: list) -> dict:
+        X = FEATURE_SPEC.transform_values([missing[h] for h in hashes], load_model('scaler'))
+        computed = dict(zip(hashes, (float(p) for p in load_model(model_name).predict(X))))
+        cache_predictions(model_name, computed)
+        return computed
+
+    computed = compute_once(model_name, list(missing), compute) if missing else {}
+    return [cached[h] if h in cached else (computed[h], None) for h in hashes]
+
+
+def compute_once(slot, missing: list, compute) -> dict:
+    """compute(hashes) -> {hash: result} for missing hashes no other thread computes; share the rest
+
+    slot tells apart computations of the same feature hash (a model name, or
+    the model set of a multi-model request).
+    """
+    release = model_release()
+    leading, waiting = in_flight.begin((release, slot, h) for h in missing)
+    mine = [key[-1] for key in leading]
+    try:
+        results = compute(mine) if mine else {}
+    except BaseException as e:
+        in_flight.finish(dict.fromkeys(leading), e)
+        raise
+    in_flight.finish({key: results[key[-1]] for key in leading})
+    if waiting:
+        metrics.put('CoalescedPredictions', len(waiting), 'Count')
+    for key, call in waiting.items():
+        results[key[-1]] = call.result()
+    return results
+
+
+def single_response(prediction: float, tier, model_name: str, start_time: float) -> dict:
+    """Response body of a single-model request"""
+    latency = (time.time() - start_time) * 1000
+    if tier:
+        return {'prediction': prediction, 'cached': True, 'cache_tier': tier, 'latency_ms': latency}
+    return {
+        'prediction': prediction,
+        'model_name': model_name,
+        'model_version': model_version(),
+        'cached': False,
+        'latency_ms': latency
+    }
+
+
+def models_response(model_names: list, outputs: dict, status: str, start_time: float) -> dict:
+    """Response body of a multi-model request"""
+    return {
+        'outputs': outputs,
+        'model_names': model_names,
+        'model_version': model_version(),
+        'cached': status == 'hit',
+        'cache_status': status,
+        'latency_ms': (time.time() - start_time) * 1000
+    }
+
+
+def predict_by_customer_id(body: dict, start_time: float) -> dict:
+    """Serve a customer's latest batch predictions, scoring live only when they are missing"""
+    customer_id = str(body['customer_id'])
+    model_names = check_model_names(body.get('model_names') or LOOKUP_MODELS)
+
+    batch = get_batch_predictions(customer_id)
+    if batch is not None and all(m in batch['outputs'] for m in model_names):
+        metrics.put('ServingLookups', 1, 'Count', {'Source': 'batch'})
+        return {
+            'customer_id': customer_id,
+            'outputs': {m: batch['outputs'][m] for m in model_names},
+            'source': 'batch',
+            'run_date': batch['run_date'],
+            'prediction_timestamp': batch['prediction_timestamp'],
+            'model_version': model_version(),
+            'latency_ms': (time.time() - start_time) * 1000
+        }
+
+    if 'customer_features' not in body:
+        metrics.put('ServingLookups', 1, 'Count', {'Source': 'not_found'})
+        raise CustomerNotFound(f"No batch predictions for customer {customer_id}; "
+                               "send customer_features to score live")
+
+    metrics.put('ServingLookups', 1, 'Count', {'Source': 'live'})
+    row = encode_features(body['customer_features'])
+    [(outputs, status)], _ = score_customers([row], model_names)
+    return {
+        'customer_id': customer_id,
+        'outputs': outputs,
+        'source': 'live',
+        'cache_status': status,
+        'model_version': model_version(),
+        'latency_ms': (time.time() - start_time) * 1000
+    }
+
+
+def predict_batch(body: dict, start_time: float) -> dict:
+    """Score up to MAX_BATCH_SIZE customers with one or more models"""
+    customers = body['customers']
+    if not isinstance(customers, list) or not customers:
+        raise RequestError("customers must be a non-empty list")
+    if len(customers) > MAX_BATCH_SIZE:
+        raise RequestError(f"At most {MAX_BATCH_SIZE} customers per request, got {len(customers)}")
+    if not all(isinstance(c, dict) for c in customers):
+        raise RequestError("Each entry in customers must be an object")
+    model_names = check_model_names(
+        body.get('model_names') or [body.get('model_name', 'engagement')])
+
+    rows = [encode_features(c.get('customer_features', {})) for c in customers]
+    scored, computed = score_customers(rows, model_names)
+    results = [
+        {'customer_id': customer.get('customer_id'), 'predictions': outputs, 'cache_status': status}
+        for customer, (outputs, status) in zip(customers, scored)
+    ]
+
+    latency = (time.time() - start_time) * 1000
+    logger.info(f"Batch of {len(customers)} scored in {latency:.2f}ms "
+                f"({computed} customers computed, "
+                f"cache hit ratios since cold start {cache_hit_ratios()})")
+    return {
+        'results': results,
+        'model_names': model_names,
+        'model_version': model_version(),
+        'count': len(results),
+        'cache_hits': sum(r['cache_status'] == 'hit' for r in results),
+        'latency_ms': latency
+    }
+
+
+def encode_features(features) -> tuple:
+    """(cache key, canonical values) of a raw feature dict, validated against the feature spec"""
+    if not isinstance(features, dict):
+        raise RequestError("customer_features must be an object")
+    try:
+        values = FEATURE_SPEC.encode_row(features)
+    except ValueError as e:
+        raise RequestError(str(e))
+    return FEATURE_SPEC.row_key(values), values
+
+
+def model_release() -> str:
+    """Model release of the current request (the active release outside a request)"""
+    return _request_release.get() or MODEL_RELEASE
+
+
+def model_version() -> str:
+    """Model version of the current request, as reported in responses"""
+    return model_release().split('@')[0]
+
+
+def pin_model_version():
+    """Swap in a reloaded release if one is ready, then pin the active release for this request"""
+    check_model_version()
+    return _request_release.set(MODEL_RELEASE)
+
+
+def unpin_model_version(token):
+    _request_release.reset(token)
+
+
+def check_model_version():
+    """Activate a release loaded in the background; check the pointer every MODEL_CHECK_SECONDS
+
+    Nothing here waits on S3: the pointer read and the new release's model
+    loads run on the reload thread, and the swap happens on the first
+    request after they finish.
+    """
+    global _version_check, _next_version_check
+    if not _version_lock.acquire(blocking=False):
+        return
+    try:
+        if _version_check is not None and _version_check.done():
+            check, _version_check = _version_check, None
+            try:
+                release = check.result()
+            except Exception as e:
+                logger.warning(f"Model reload failed, keeping {MODEL_RELEASE}: {e}")
+                metrics.put('ModelReloadFailures', 1, 'Count')
+            else:
+                if release:
+                    activate_model_version(release)
+        due = time.time() >= _next_version_check
+        if MODEL_POINTER_KEY and MODELS_BUCKET and _version_check is None and due:
+            _next_version_check = time.time() + MODEL_CHECK_SECONDS
+            _version_check = _reloader.submit(preload_pointer_version)
+    finally:
+        _version_lock.release()
+
+
+def preload_pointer_version():
+    """Read the pointer; if it names another release, load its models and return it (else None)"""
+    release, manifest_key = read_model_pointer()
+    if release == MODEL_RELEASE:
+        return None
+    _manifest_keys[release] = manifest_key
+    manifest = _load_manifest(release)
+    # The models this container serves now, plus EAGER_MODELS
+    _loaded_releases.setdefault(release, {})
+    for model_name in dict.fromkeys(EAGER_MODELS + list(_model_cache)):
+        if model_name in manifest['artifacts']:
+            _load_model(release, model_name)
+    logger.info(f"Loaded model release {release} in the background")
+    return release
+
+
+def read_model_pointer() -> tuple:
+    """(release, manifest key) named by the pointer"""
+    response = s3_client.get_object(Bucket=MODELS_BUCKET, Key=MODEL_POINTER_KEY)
+    pointer = json.loads(response['Body'].read())
+    version = pointer['model_version']
+    if 'training_run' not in pointer:  # written before pointers named a training run
+        return version, f"models/{version}/manifest.json"
+    return f"{version}@{pointer['training_run']}", pointer['manifest_key']
+
+
+def resolve_initial_model_version():
+    """At init, start on the pointer's release rather than the version in the environment"""
+    global MODEL_VERSION, MODEL_RELEASE, _model_cache
+    if not MODEL_POINTER_KEY or not MODELS_BUCKET:
+        return
+    try:
+        release, manifest_key = read_model_pointer()
+    except Exception as e:
+        logger.warning(f"Model version pointer not readable, serving {MODEL_VERSION}: {e}")
+        return
+    _manifest_keys[release] = manifest_key
+    _model_cache = _loaded_releases.setdefault(release, {})
+    MODEL_RELEASE = release
+    MODEL_VERSION = model_version()
+
+
+def activate_model_version(release: str):
+    """Atomically make a preloaded release the active one; keep the previous one for its requests"""
+    global MODEL_VERSION, MODEL_RELEASE, _model_cache
+    if release not in _loaded_releases:
+        logger.error(f"Model release {release} was not preloaded, keeping {MODEL_RELEASE}")
+        metrics.put('ModelReloadFailures', 1, 'Count')
+        return
+    previous = MODEL_RELEASE
+    _model_cache = _loaded_releases[release]
+    MODEL_RELEASE = release
+    MODEL_VERSION = model_version()
+    for stale in [r for r in list(_loaded_releases) if r not in (release, previous)]:
+        _loaded_releases.pop(stale, None)
+        _manifests.pop(stale, None)
+    logger.info(f"Model release {previous} -> {release}")
+    metrics.put('ModelVersionSwaps', 1, 'Count', {'ModelVersion': MODEL_VERSION})
+
+
+def load_manifest() -> dict:
+    """Model manifest of the request's release"""
+    return _load_manifest(model_release())
+
+
+def _load_manifest(release: str) -> dict:
+    """Load a release's manifest published by training (one GET per release and container)"""
+    if release not in _manifests:
+        version = release.split('@')[0]
+        manifest_key = _manifest_keys.get(release, f"models/{version}/manifest.json")
+        response = s3_client.get_object(Bucket=MODELS_BUCKET, Key=manifest_key)
+        manifest = json.loads(response['Body'].read())
+        FEATURE_SPEC.check_schema(manifest['feature_columns'])
+        _manifests[release] = manifest
+    return _manifests[release]
+
+
+def model_artifact(model_name: str, manifest: dict = None) -> dict:
+    """Manifest entry to load: the compiled artifact when MODEL_FORMAT=compiled and one exists"""
+    manifest = manifest or load_manifest()
+    if model_name not in manifest['artifacts']:
+        raise ValueError(f"Unknown model: {model_name}")
+    if MODEL_FORMAT == 'compiled':
+        compiled = manifest.get('compiled_artifacts', {})
+        return compiled.get(model_name, manifest['artifacts'][model_name])
+    return manifest['artifacts'][model_name]
 
 
 def load_model(model_name: str):
-    """Load model from S3 with caching"""
-    if model_name in _model_cache:
-        return _model_cache[model_name]
+    """Model of the request's release, from S3 on first use"""
+    return _load_model(model_release(), model_name)
+
+
+def _load_model(release: str, model_name: str):
+    """Load a release's model from S3 with caching; concurrent first loads share one download"""
+    models = _loaded_releases.setdefault(release, {})
+    if model_name in models:
+        return models[model_name]
+    return model_loads.do((release, model_name),
+                          lambda: _fetch_model(release, model_name, models))
+
+
+def _fetch_model(release: str, model_name: str, models: dict):
+    if model_name in models:  # finished loading since the caller looked
+        return models[model_name]
     
-    # Download from S3 to /tmp
-    model_key = f"models/{MODEL_VERSION}/{model_name}_latest.pkl"
-    model_path = f"/tmp/{model_name}.pkl"
+    artifact = model_artifact(model_name, _load_manifest(release))
     
-    s3_client.download_file(MODELS_BUCKET, model_key, model_path)
-    model = joblib.load(model_path)
+    # Download from S3 to /tmp; a partial file never sits at the final path
+    extension = os.path.splitext(artifact['key'])[1]
+    model_path = f"/tmp/{model_name}_{artifact['sha256'][:16]}{extension}"
+    if not os.path.exists(model_path):
+        partial_path = f"{model_path}.{os.getpid()}.{threading.get_ident()}.part"
+        s3_client.download_file(MODELS_BUCKET, artifact['key'], partial_path)
+        os.replace(partial_path, model_path)
+    if artifact.get('format') == 'compiled-npz':
+        model = CompiledTreeEnsemble.load(model_path)
+    elif artifact.get('format') == 'scaler-json':
+        model = ScalerParams.load(model_path)
+    else:
+        # Deferred: only pickled artifacts need joblib (and sklearn/xgboost behind it)
+        import joblib
+        model = joblib.load(model_path)
     
-    _model_cache[model_name] = model
+    models[model_name] = model
     return model
 
 
-def prepare_features(features: dict) -> list:
-    """Convert feature dict to vector (simplified)"""
-    # In production, apply proper feature engineering and scaling
-    return list(features.values())
+def load_models_eagerly():
+    """Load EAGER_MODELS during init, in parallel; failures fall back to loading on first use"""
+    if not MODELS_BUCKET or not EAGER_MODELS:
+        return
+    try:
+        load_manifest()
+        with ThreadPoolExecutor(max_workers=len(EAGER_MODELS)) as executor:
+            list(executor.map(load_model, EAGER_MODELS))
+    except Exception as e:
+        logger.warning(f"Eager model load failed, models will load on first use: {e}")
+
+
+def _unexpired(item: dict, now: int) -> bool:
+    """TTL deletion is lazy, so expired DynamoDB items can still be read"""
+    return int(item.get('ttl', now + 1)) > now
+
+
+def _usable_item(item: dict, now: int) -> bool:
+    """A DynamoDB cache item counts only for the request's model release and before its TTL"""
+    return item.get('model_release') == model_release() and _unexpired(item, now)
+
+
+def record_cache_lookups(memory: int = 0, dynamodb_hits: int = 0, misses: int = 0):
+    """Count lookups per tier for hit ratios and CloudWatch"""
+    _cache_lookups.update(memory=memory, dynamodb=dynamodb_hits, miss=misses)
+    metrics.put('CacheHits', memory, 'Count', {'Tier': 'memory'})
+    metrics.put('CacheHits', dynamodb_hits, 'Count', {'Tier': 'dynamodb'})
+    metrics.put('CacheMisses', misses, 'Count')
 
 
-def get_cached_prediction(feature_hash: str, model_name: str):
-    """Get cached prediction from DynamoDB"""
+def cache_hit_ratios() -> dict:
+    """Share of lookups since cold start answered by each tier"""
+    total = sum(_cache_lookups.values())
+    if not total:
+        return {'memory': 0.0, 'dynamodb': 0.0, 'overall': 0.0}
+    return {
+        'memory': _cache_lookups['memory'] / total,
+        'dynamodb': _cache_lookups['dynamodb'] / total,
+        'overall': (_cache_lookups['memory'] + _cache_lookups['dynamodb']) / total
+    }
+
+
+def cache_key(feature_hash: str) -> str:
+    """Partition key of a feature hash's cache items, qualified by the request's model release"""
+    return f"{model_release()}#{feature_hash}"
+
+
+def _batch_get_cache_items(feature_hashes: list, sort_key: str, projection: str):
+    """(feature_hash, item) for (feature_hash, sort_key) keys
+
+    BatchGetItem in chunks of BATCH_GET_LIMIT, retrying unprocessed keys.
+    """
+    hashes_by_key = {cache_key(h): h for h in feature_hashes}
+    keys = list(hashes_by_key)
+    for start in range(0, len(keys), BATCH_GET_LIMIT):
+        request = {DYNAMODB_TABLE: {
+            'Keys': [{'customer_id': key, 'feature_hash': sort_key}
+                     for key in keys[start:start + BATCH_GET_LIMIT]],
+            'ProjectionExpression': projection,
+            'ExpressionAttributeNames': {'#ttl': 'ttl'}
+        }}
+        for attempt in range(BATCH_GET_RETRIES):
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response['Responses'].get(DYNAMODB_TABLE, []):
+                yield hashes_by_key[item['customer_id']], item
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+            time.sleep(0.05 * 2 ** attempt)
+
+
+def get_cached_predictions(feature_hashes: list, model_name: str) -> dict:
+    """Cached (prediction, tier) of one model per feature hash: LRU first, then BatchGetItem"""
+    found = {}
+    remote = []
+    for feature_hash in feature_hashes:
+        prediction = local_cache.get((model_release(), feature_hash, model_name))
+        if prediction is not None:
+            found[feature_hash] = (prediction, 'memory')
+        else:
+            remote.append(feature_hash)
+    memory_hits = len(found)
+
+    now = int(time.time())
     try:
-        response = table.get_item(
-            Key={'customer_id': feature_hash, 'feature_hash': model_name}
-        )
-        if 'Item' in response:
-            return response['Item'].get('prediction')
-    except:
-        pass
-    return None
+        items = _batch_get_cache_items(remote, model_name,
+                                       'customer_id, prediction, model_release, #ttl')
+        for feature_hash, item in items:
+            if _usable_item(item, now):
+                prediction = float(item['prediction'])
+                found[feature_hash] = (prediction, 'dynamodb')
+                local_cache.put((model_release(), feature_hash, model_name), prediction,
+                                int(item['ttl']))
+    except Exception as e:
+        logger.warning(f"Cache lookup failed: {e}")
+
+    record_cache_lookups(memory_hits, len(found) - memory_hits, len(feature_hashes) - len(found))
+    return found
+
+
+def _outputs_from_item(outputs: dict) -> dict:
+    return {
+        model_name: {
+            name: int(v) if name in LABEL_OUTPUTS else float(v) for name, v in values.items()
+        }
+        for model_name, values in outputs.items()
+    }
+
+
+def get_cached_outputs(feature_hashes: list) -> dict:
+    """Cached {model_name: outputs} per feature hash: LRU first, then BatchGetItem"""
+    found = {}
+    remote = []
+    for feature_hash in feature_hashes:
+        outputs = local_cache.get((model_release(), feature_hash, OUTPUTS_KEY))
+        if outputs is not None:
+            found[feature_hash] = outputs
+        else:
+            remote.append(feature_hash)
+    memory_hits = len(found)
 
+    now = int(time.time())
+    try:
+        items = _batch_get_cache_items(remote, OUTPUTS_KEY,
+                                       'customer_id, outputs, model_release, #ttl')
+        for feature_hash, item in items:
+            if _usable_item(item, now):
+                outputs = _outputs_from_item(item['outputs'])
+                found[feature_hash] = outputs
+                local_cache.put((model_release(), feature_hash, OUTPUTS_KEY), outputs,
+                                int(item['ttl']))
+    except Exception as e:
+        logger.warning(f"Batch cache lookup failed: {e}")
+
+    record_cache_lookups(memory_hits, len(found) - memory_hits, len(feature_hashes) - len(found))
+    return found
 
-def cache_prediction(feature_hash: str, model_name: str, prediction: float):
-    """Cache prediction in DynamoDB"""
+
+def get_batch_predictions(customer_id: str):
+    """Latest batch run's item for a customer (outputs, run_date, prediction_timestamp), or None"""
+    local_key = (model_version(), customer_id, BATCH_KEY)
+    batch = local_cache.get(local_key)
+    if batch is not None or serving_table is None:
+        return batch
     try:
-        table.put_item(
-            Item={
-                'customer_id': feature_hash,
-                'feature_hash': model_name,
-                'prediction': prediction,
-                'model_version': MODEL_VERSION,
-                'timestamp': int(time.time()),
-                'ttl': int(time.time()) + CACHE_TTL_SECONDS
-            }
-        )
+        item = serving_table.get_item(Key={'customer_id': customer_id}).get('Item')
     except Exception as e:
-        logger.warning(f"Failed to cache prediction: {e}")
+        logger.warning(f"Serving table lookup failed: {e}")
+        return None
+    if not item or not _unexpired(item, int(time.time())):
+        return None
+    if item.get('model_version') != model_version():  # batch runs are labelled by version only
+        return None
+    batch = {
+        'outputs': _outputs_from_item(item['outputs']),
+        'run_date': item['run_date'],
+        'prediction_timestamp': item['prediction_timestamp']
+    }
+    local_cache.put(local_key, batch, int(item['ttl']))
+    return batch
+
+
+def cache_predictions(model_name: str, predictions_by_hash: dict):
+    """Cache {feature_hash: prediction} of one model: LRU now, DynamoDB after the response"""
+    now = int(time.time())
+    for feature_hash, prediction in predictions_by_hash.items():
+        local_cache.put((model_release(), feature_hash, model_name), prediction)
+    cache_writer.put({
+        'customer_id': cache_key(feature_hash),
+        'feature_hash': model_name,
+        'prediction': Decimal(str(prediction)),
+        'model_version': model_version(),
+        'model_release': model_release(),
+        'timestamp': now,
+        'ttl': now + CACHE_TTL_SECONDS
+    } for feature_hash, prediction in predictions_by_hash.items())
+
+
+def cache_outputs(outputs_by_hash: dict):
+    """Cache {feature_hash: {model_name: outputs}}: LRU now, DynamoDB after the response"""
+    now = int(time.time())
+    for feature_hash, outputs in outputs_by_hash.items():
+        local_cache.put((model_release(), feature_hash, OUTPUTS_KEY), outputs)
+    cache_writer.put({
+        'customer_id': cache_key(feature_hash),
+        'feature_hash': OUTPUTS_KEY,
+        'outputs': {
+            model_name: {name: Decimal(str(v)) for name, v in values.items()}
+            for model_name, values in outputs.items()
+        },
+        'model_version': model_version(),
+        'model_release': model_release(),
+        'timestamp': now,
+        'ttl': now + CACHE_TTL_SECONDS
+    } for feature_hash, outputs in outputs_by_hash.items())
+
+
+def record_cache_writes(written: int, failed: int, dropped: int):
+    metrics.put('CacheWrites', written, 'Count')
+    metrics.put('CacheWriteFailures', failed, 'Count')
+    metrics.put('CacheWritesDropped', dropped, 'Count')
+    if failed or dropped:
+        logger.warning(f"Cache writes: {failed} failed, {dropped} dropped (buffer full)")
+
+
+def flush_cache_writes():
+    """After-response work of an invocation: write the buffered cache items and their metrics"""
+    cache_writer.flush()
+    metrics.flush()
+
+
+def start_cache_writer():
+    """Lambda: flush after each response through an internal extension; elsewhere: a thread"""
+    runtime_api = os.getenv('AWS_LAMBDA_RUNTIME_API')
+    if runtime_api:
+        try:
+            return AfterResponse(runtime_api, flush_cache_writes)
+        except Exception as e:
+            logger.warning(f"Extension registration failed, writing the cache from a background "
+                           f"thread: {e}")
+    cache_writer.start()
+    return None
 
 
 def format_response(status_code: int, body: dict) -> dict:
@@ -139,3 +844,12 @@ def format_response(status_code: int, body: dict) -> dict:
         'body': json.dumps(body)
     }
 
+
+# Cache items are written to DynamoDB off the response path, see cache_writer.py
+cache_writer = CacheWriter(DYNAMODB_TABLE, boto3.resource('dynamodb'),
+                           max_pending=CACHE_WRITE_BUFFER, on_flush=record_cache_writes)
+after_response = start_cache_writer()
+
+resolve_initial_model_version()
+load_models_eagerly()
+INIT_DURATION_MS = (time.perf_counter() - _INIT_STARTED) * 1000
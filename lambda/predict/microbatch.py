@@ -0,0 +1,122 @@
+"""
+Dynamic micro-batching for the long-running prediction server
+
+Requests are queued as they arrive. A worker takes the first waiting
+request, keeps collecting until max_batch_size requests are queued or
+max_wait_ms has passed since it took the first, and hands the whole batch to
+one call of the batch function (in a thread, so the event loop keeps
+accepting requests). Requests arriving while a batch is being scored form
+the next batch, so under load batches grow without waiting for the window.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class ServingStats:
+    """Request latency percentiles, batch sizes and throughput since start"""
+
+    def __init__(self, window: int = 10000):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)  # seconds, most recent requests
+        self._lock = threading.Lock()
+
+    def record_batch(self, latencies: List[float], errors: int = 0):
+        with self._lock:
+            self.batches += 1
+            self.requests += len(latencies)
+            self.errors += errors
+            self._latencies.extend(latencies)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            requests, batches, errors = self.requests, self.batches, self.errors
+        elapsed = time.perf_counter() - self.started
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            'requests': requests,
+            'batches': batches,
+            'errors': errors,
+            'mean_batch_size': requests / batches if batches else 0.0,
+            'p50_ms': float(p50),
+            'p99_ms': float(p99),
+            'throughput_rps': requests / elapsed if elapsed else 0.0
+        }
+
+
+class MicroBatcher:
+    """Coalesce concurrent submissions into calls of score_batch(items) -> results (same order)
+
+    max_batch_size=1 scores every request on its own (the per-request baseline).
+    """
+
+    def __init__(self, score_batch: Callable[[list], list], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0, workers: int = 1, stats: Optional[ServingStats] = None):
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.stats = stats or ServingStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, item):
+        """Result of item, scored together with whatever else arrives in the same window"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.score_batch, items)
+            except Exception as e:
+                results, error = None, e
+            finished = time.perf_counter()
+            for i, (_, future, queued) in enumerate(batch):
+                if future.done():  # client went away
+                    continue
+                if results is None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[i])
+            self.stats.record_batch([finished - queued for _, _, queued in batch],
+                                    errors=len(batch) if results is None else 0)
@@ -0,0 +1,201 @@
+"""
+Prediction server: the predict Lambda's API as a long-running HTTP endpoint
+
+Runs the same request handling, model loading and cache tiers as
+handler.py (imported, so configuration is the same environment variables),
+for hosting in a container instead of Lambda. Single-customer requests
+(customer_features with model_name or model_names) are micro-batched:
+concurrent requests arriving within MAX_WAIT_MS, up to MAX_BATCH_ROWS, are
+scored with one vectorized predict per model and fanned back out. Batch
+and customer_id requests go through lambda_handler unchanged.
+
+Endpoints:
+- POST /predict: request bodies as for the Lambda API
+- GET /stats: p50/p99 latency, throughput and mean batch size since start
+- GET /health
+
+Usage:
+    python server.py --port 8080 --max-batch-rows 64 --max-wait-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+
+import handler
+from microbatch import MicroBatcher, ServingStats
+
+logger = logging.getLogger(__name__)
+
+PORT = int(os.getenv('PORT', '8080'))
+MAX_BATCH_ROWS = int(os.getenv('MAX_BATCH_ROWS', '64'))  # 1 scores every request on its own
+MAX_WAIT_MS = float(os.getenv('MAX_WAIT_MS', '2'))
+STATS_INTERVAL_SECONDS = float(os.getenv('STATS_INTERVAL_SECONDS', '60'))
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+
+
+def is_single_customer(body: dict) -> bool:
+    return 'customer_features' in body and 'customers' not in body and 'customer_id' not in body
+
+
+def score_requests(requests: list) -> list:
+    """(status, body) per (request body, start time), with one scoring call per model set"""
+    version_token = handler.pin_model_version()
+    try:
+        return _score_requests(requests)
+    finally:
+        handler.unpin_model_version(version_token)
+
+
+def _score_requests(requests: list) -> list:
+    results = [None] * len(requests)
+    encoded = [None] * len(requests)
+    groups = defaultdict(list)
+    for i, (body, _) in enumerate(requests):
+        try:
+            if 'model_names' in body:
+                key = tuple(handler.check_model_names(body['model_names']))
+            else:
+                key = handler.check_model_names([body.get('model_name', 'engagement')])[0]
+            encoded[i] = handler.encode_features(body.get('customer_features', {}))
+        except handler.RequestError as e:
+            results[i] = (400, {'error': str(e)})
+            continue
+        groups[key].append(i)
+
+    for key, indices in groups.items():
+        rows = [encoded[i] for i in indices]
+        try:
+            if isinstance(key, tuple):
+                scored, _ = handler.score_customers(rows, list(key))
+                for i, (outputs, status) in zip(indices, scored):
+                    response = handler.models_response(list(key), outputs, status, requests[i][1])
+                    results[i] = (200, response)
+            else:
+                for i, (prediction, tier) in zip(indices, handler.predict_rows(rows, key)):
+                    response = handler.single_response(prediction, tier, key, requests[i][1])
+                    results[i] = (200, response)
+        except Exception as e:
+            logger.error(f"Scoring {len(indices)} requests failed: {e}", exc_info=True)
+            for i in indices:
+                results[i] = (500, {'error': str(e)})
+    handler.metrics.put('BatchSize', len(requests), 'Count')
+    handler.metrics.flush()
+    return results
+
+
+class PredictionServer:
+    """Minimal HTTP/1.1 (keep-alive, JSON only) in front of the micro-batcher"""
+
+    def __init__(self, max_batch_rows: int = MAX_BATCH_ROWS, max_wait_ms: float = MAX_WAIT_MS):
+        self.stats = ServingStats()
+        self.batcher = MicroBatcher(score_requests, max_batch_rows, max_wait_ms, stats=self.stats)
+
+    async def predict(self, raw: bytes):
+        start_time = time.time()
+        try:
+            body = json.loads(raw or b'{}')
+        except ValueError:
+            return 400, {'error': 'Request body must be JSON'}
+        if isinstance(body, dict) and is_single_customer(body):
+            return await self.batcher.submit((body, start_time))
+        # Batch and customer_id requests: the Lambda code path as is
+        response = await asyncio.get_running_loop().run_in_executor(
+            None, handler.lambda_handler, {'body': raw.decode()}, None)
+        return response['statusCode'], json.loads(response['body'])
+
+    async def route(self, method: str, path: str, raw: bytes):
+        if path == '/health':
+            return 200, {'status': 'ok', 'model_version': handler.MODEL_VERSION,
+                         'model_release': handler.MODEL_RELEASE}
+        if path == '/stats':
+            return 200, {**self.stats.snapshot(), 'cache_hit_ratios': handler.cache_hit_ratios()}
+        if path == '/predict':
+            if method != 'POST':
+                return 405, {'error': 'POST required'}
+            return await self.predict(raw)
+        return 404, {'error': f"No route for {path}"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path = request_line.decode('latin-1').split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                try:
+                    status, payload = await self.route(method, path.split('?')[0], raw)
+                except Exception as e:
+                    logger.error(f"Request failed: {e}", exc_info=True)
+                    status, payload = 500, {'error': str(e)}
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def report_stats(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats.snapshot()
+            logger.info(f"Serving stats: {stats}")
+            handler.metrics.put('LatencyP50', stats['p50_ms'], 'Milliseconds')
+            handler.metrics.put('LatencyP99', stats['p99_ms'], 'Milliseconds')
+            handler.metrics.put('Throughput', stats['throughput_rps'], 'Count/Second')
+            handler.metrics.flush()
+
+    async def serve(self, host: str = '0.0.0.0', port: int = PORT, ready: asyncio.Event = None):
+        await self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        reporter = asyncio.create_task(self.report_stats(STATS_INTERVAL_SECONDS))
+        logger.info(f"Serving on {host}:{port} (max batch {self.batcher.max_batch_size} rows, "
+                    f"window {self.batcher.max_wait * 1000:.1f}ms)")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reporter.cancel()
+            await self.batcher.stop()
+            handler.flush_cache_writes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--max-batch-rows', type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    asyncio.run(PredictionServer(args.max_batch_rows, args.max_wait_ms).serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Single-flight deduplication of concurrent work within a serving process
+
+The first caller for a key computes it; callers arriving for the same key
+while that computation is in flight wait for it and share its result (or
+its exception) instead of repeating it. Once it finishes the key is
+released, so later callers go back to the caches.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+
+
+class SingleFlight:
+    """In-flight computations by key; shared counts callers served by another's computation"""
+
+    def __init__(self):
+        self.shared = 0
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, keys: Iterable[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, Future]]:
+        """Claim keys: (keys to compute and then finish(), futures of keys in flight elsewhere)
+
+        A caller finishes its own keys before waiting on the others, so two
+        callers each waiting on the other cannot deadlock.
+        """
+        leading, waiting = [], {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                if key in self._calls:
+                    waiting[key] = self._calls[key]
+                else:
+                    self._calls[key] = Future()
+                    leading.append(key)
+            self.shared += len(waiting)
+        return leading, waiting
+
+    def finish(self, results: Dict[Hashable, object], error: BaseException = None):
+        """Release claimed keys, handing their results (or error) to the waiters"""
+        with self._lock:
+            calls = [(key, self._calls.pop(key)) for key in results if key in self._calls]
+        for key, call in calls:
+            if error is not None:
+                call.set_exception(error)
+            else:
+                call.set_result(results[key])
+
+    def do(self, key: Hashable, fn: Callable[[], object]):
+        """fn() for key, run once however many threads ask for it concurrently"""
+        _, waiting = self.begin([key])
+        if waiting:
+            return waiting[key].result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish({key: None}, e)
+            raise
+        self.finish({key: result})
+        return result
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Benchmark the predict Lambda's cold start: init duration vs first invoke
+
+Trains production-shaped models (200 trees, depth 6), writes both the
+pickled and the compiled (npz + scaler JSON) artifacts with a manifest,
+then starts a fresh interpreter per run that serves them from a mocked S3
+bucket and DynamoDB table (moto) and times:
+
+- init: importing lambda/predict/handler.py (module-level work, including
+  eager model loading), as Lambda's Init phase would
+- first invoke: the first multi-model request after init
+- warm invoke: a second request with different features
+
+Configurations:
+- pickle-lazy: the previous behaviour (pickles, everything on the first request)
+- pickle-eager: pickles loaded at init
+- compiled-eager: NumPy-only artifacts loaded at init (the default)
+
+S3 and DynamoDB are in-process mocks, so absolute numbers exclude network
+time; the split between init and first invoke is what this measures.
+
+Usage:
+    python scripts/benchmarks/benchmark_cold_start.py
+    python scripts/benchmarks/benchmark_cold_start.py --repeats 5 --output cold_start.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fargate"))
+
+from common.features import FEATURE_SPEC, ScalerParams  # noqa: E402
+from common.tree_ensemble import compile_xgboost  # noqa: E402
+
+CONFIGS = {
+    "pickle-lazy": {"MODEL_FORMAT": "pickle", "EAGER_MODELS": ""},
+    "pickle-eager": {"MODEL_FORMAT": "pickle", "EAGER_MODELS": "scaler,engagement,churn,ltv"},
+    "compiled-eager": {"MODEL_FORMAT": "compiled", "EAGER_MODELS": "scaler,engagement,churn,ltv"},
+}
+HEAVY_MODULES = ["joblib", "sklearn", "xgboost"]
+
+# Runs in a fresh interpreter so every import and model load is cold
+CHILD = r"""
+import json, os, sys, time
+from pathlib import Path
+
+artifacts_dir = Path(sys.argv[1])
+sys.path[:0] = [sys.argv[2], sys.argv[3]]
+
+from moto import mock_aws
+import boto3
+
+with mock_aws():
+    s3 = boto3.client('s3')
+    s3.create_bucket(Bucket='models')
+    for path in artifacts_dir.rglob('*'):
+        if path.is_file():
+            s3.upload_file(str(path), 'models', str(path.relative_to(artifacts_dir)))
+    boto3.client('dynamodb').create_table(
+        TableName='cache',
+        KeySchema=[{'AttributeName': 'customer_id', 'KeyType': 'HASH'},
+                   {'AttributeName': 'feature_hash', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'customer_id', 'AttributeType': 'S'},
+                              {'AttributeName': 'feature_hash', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST')
+    for name in os.listdir('/tmp'):
+        if (name.startswith(('scaler_', 'engagement_', 'churn_', 'ltv_', 'anomaly_'))
+                and name.endswith(('.pkl', '.npz', '.json'))):
+            os.remove(os.path.join('/tmp', name))
+    preloaded = {m for m in json.loads(sys.argv[4]) if m in sys.modules}
+
+    start = time.perf_counter()
+    import handler
+    init_ms = (time.perf_counter() - start) * 1000
+    imported_at_init = [m for m in json.loads(sys.argv[4])
+                        if m in sys.modules and m not in preloaded]
+
+    requests = json.loads(sys.argv[5])
+    latencies = []
+    for request in requests:
+        start = time.perf_counter()
+        response = handler.lambda_handler({'body': json.dumps(request)}, None)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response['statusCode'] == 200, response
+    print(json.dumps({
+        'init_ms': init_ms,
+        'handler_init_ms': handler.INIT_DURATION_MS,
+        'first_invoke_ms': latencies[0],
+        'warm_invoke_ms': latencies[1],
+        'imported_at_init': imported_at_init,
+        'imported_by_first_invoke': [
+            m for m in json.loads(sys.argv[4])
+            if m in sys.modules and m not in preloaded and m not in imported_at_init
+        ],
+    }))
+"""
+
+
+def write_artifacts(root: Path, train_rows: int, seed: int):
+    """Train production-shaped models and write pickled and compiled artifacts plus a manifest"""
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame(
+        {col: rng.integers(0, 100, train_rows) for col in FEATURE_SPEC.input_columns}
+    )
+    X = pd.DataFrame(FEATURE_SPEC.transform(raw), columns=FEATURE_SPEC.columns)
+    scaler = StandardScaler().fit(X)
+    X = pd.DataFrame(scaler.transform(X), columns=X.columns)
+    y = X.iloc[:, :5].sum(axis=1) + rng.normal(scale=0.5, size=train_rows)
+    params = dict(
+        n_estimators=200,
+        max_depth=6,
+        learning_rate=0.1,
+        subsample=0.8,
+        colsample_bytree=0.8,
+        random_state=42,
+    )
+    models = {
+        "engagement": xgb.XGBRegressor(objective="reg:squarederror", **params).fit(X, y),
+        "churn": xgb.XGBClassifier(objective="binary:logistic", **params).fit(
+            X, (y > 0).astype(int)
+        ),
+        "ltv": xgb.XGBRegressor(objective="reg:squarederror", **params).fit(X, y * 100),
+    }
+
+    def entry(path: Path, **extra) -> dict:
+        return {
+            "key": str(path.relative_to(root)),
+            "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+            **extra,
+        }
+
+    (root / "models" / "v1.0").mkdir(parents=True)
+    artifacts, compiled_artifacts = {}, {}
+    for name, model in {**models, "scaler": scaler}.items():
+        path = root / "models" / "v1.0" / f"{name}.pkl"
+        joblib.dump(model, path)
+        artifacts[name] = entry(path)
+    for name, model in models.items():
+        path = root / "models" / "v1.0" / f"{name}.npz"
+        compile_xgboost(model).save(str(path))
+        compiled_artifacts[name] = entry(path, format="compiled-npz")
+    path = root / "models" / "v1.0" / "scaler.json"
+    ScalerParams.from_scaler(scaler).save(str(path))
+    compiled_artifacts["scaler"] = entry(path, format="scaler-json")
+
+    manifest = {
+        "training_run": "bench",
+        "feature_columns": FEATURE_SPEC.columns,
+        "artifacts": artifacts,
+        "compiled_artifacts": compiled_artifacts,
+    }
+    (root / "models" / "v1.0" / "manifest.json").write_text(json.dumps(manifest))
+
+
+def run_child(artifacts_dir: Path, config: dict, requests: list) -> dict:
+    env = {
+        **os.environ,
+        **config,
+        "MODELS_BUCKET": "models",
+        "DYNAMODB_TABLE": "cache",
+        "METRICS_SINK": "none",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            CHILD,
+            str(artifacts_dir),
+            str(ROOT / "fargate"),
+            str(ROOT / "lambda" / "predict"),
+            json.dumps(HEAVY_MODULES),
+            json.dumps(requests),
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Cold start run failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeats", type=int, default=3, help="Cold starts per configuration")
+    parser.add_argument(
+        "--train-rows", type=int, default=20_000, help="Rows used to train the models"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Optional path for JSON results")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    requests = [
+        {
+            "customer_features": {
+                c: int(v) for c, v in zip(FEATURE_SPEC.input_columns, rng.integers(0, 100, 99))
+            },
+            "model_names": ["engagement", "churn", "ltv"],
+        }
+        for _ in range(2)
+    ]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        write_artifacts(Path(tmp), args.train_rows, args.seed)
+        print(
+            f"{'config':<16}{'init ms':>10}{'first ms':>10}{'init+first':>12}{'warm ms':>10}"
+            "  imported at init / first invoke"
+        )
+        for name, config in CONFIGS.items():
+            runs = [run_child(Path(tmp), config, requests) for _ in range(args.repeats)]
+            summary = {
+                key: float(np.median([r[key] for r in runs]))
+                for key in ["init_ms", "handler_init_ms", "first_invoke_ms", "warm_invoke_ms"]
+            }
+            summary["imported_at_init"] = runs[0]["imported_at_init"]
+            summary["imported_by_first_invoke"] = runs[0]["imported_by_first_invoke"]
+            results[name] = summary
+            print(
+                f"{name:<16}{summary['init_ms']:>10.1f}{summary['first_invoke_ms']:>10.1f}"
+                f"{summary['init_ms'] + summary['first_invoke_ms']:>12.1f}"
+                f"{summary['warm_invoke_ms']:>10.1f}  {summary['imported_at_init'] or '-'} / "
+                f"{summary['imported_by_first_invoke'] or '-'}"
+            )
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"repeats": args.repeats, "results": results}, indent=2)
+        )
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
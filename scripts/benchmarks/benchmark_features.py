@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+r"""
+Benchmark the shared feature kernel against the pandas feature engineering
+
+Compares FeatureSpec.transform() (fargate/common/features.py), with the
+scaler folded in, against the previous pandas implementation followed by
+scaler.transform(), and times the single-row Lambda path. Outputs are
+checked for equality before timings are reported.
+
+Usage:
+    python scripts/benchmarks/benchmark_features.py
+    python scripts/benchmarks/benchmark_features.py --rows 100000 10000000 \
+        --output features_bench.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "fargate"))
+
+from common.features import FEATURE_SPEC  # noqa: E402
+
+DEFAULT_ROWS = [100_000, 10_000_000]
+
+
+def make_raw(n: int, seed: int) -> pd.DataFrame:
+    """Synthetic customers table with every column the spec reads"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({col: rng.integers(0, 1000, n) for col in FEATURE_SPEC.raw_features})
+    df["engagement_score"] = rng.random(n)
+    df["customer_id"] = np.arange(n).astype(str)
+    for col in ["gender", "location", "content_category_primary", "social_influence_tier"]:
+        df[col] = "x"
+    df["churn_30_day"] = rng.integers(0, 2, n)
+    df["lifetime_value_usd"] = rng.random(n)
+    return df
+
+
+def pandas_features(df: pd.DataFrame, scaler) -> np.ndarray:
+    """The pandas implementation previously duplicated in training and inference"""
+    df = df.copy()
+    df["engagement_per_session"] = df["engagement_score"] / (df["sessions_last_7_days"] + 1)
+    df["avg_session_value"] = df["session_duration_avg_minutes"] * df["engagement_score"]
+    df["follower_following_ratio"] = df["followers_count"] / (df["following_count"] + 1)
+    df["content_activity_rate"] = (df["posts_last_30_days"] + df["stories_last_30_days"]) / 30
+    df["match_efficiency"] = df["matches_last_30_days"] / (df["swipes_right_last_30_days"] + 1)
+    df["connection_rate"] = df["total_connections"] / (df["tenure_months"] + 1)
+    df["gig_success_rate"] = df["active_gigs_count"] / (df["gig_applications_sent"] + 1)
+    df["revenue_per_gig"] = df["transaction_revenue_last_90_days"] / (df["active_gigs_count"] + 1)
+    df = df.replace([float("inf"), float("-inf")], 0).fillna(0)
+    X = df[FEATURE_SPEC.columns]
+    return pd.DataFrame(scaler.transform(X), columns=X.columns, index=X.index).to_numpy()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="Table sizes to time"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Optional path for JSON results")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rows':>11} {'pandas s':>10} {'kernel s':>10} {'speedup':>8}")
+    for n in args.rows:
+        df = make_raw(n, args.seed)
+        sample = pd.DataFrame(
+            FEATURE_SPEC.transform(df.head(100_000)), columns=FEATURE_SPEC.columns
+        )
+        scaler = StandardScaler().fit(sample)
+
+        expected, pandas_seconds = timed(pandas_features, df, scaler)
+        actual, kernel_seconds = timed(FEATURE_SPEC.transform, df, scaler)
+        if not np.allclose(actual, expected, rtol=1e-4, atol=1e-4):
+            raise SystemExit(f"❌ Kernel output differs from pandas at {n} rows")
+        del expected, actual
+
+        speedup = pandas_seconds / kernel_seconds
+        print(f"{n:>11,} {pandas_seconds:>10.3f} {kernel_seconds:>10.3f} {speedup:>7.1f}x")
+        results.append(
+            {
+                "rows": n,
+                "pandas_seconds": pandas_seconds,
+                "kernel_seconds": kernel_seconds,
+                "speedup": speedup,
+            }
+        )
+
+    record = make_raw(1, args.seed).iloc[0].to_dict()
+    repeats = 10_000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        FEATURE_SPEC.transform_row(record, scaler)
+    row_us = (time.perf_counter() - start) / repeats * 1e6
+    print(f"\nSingle-row path (Lambda): {row_us:.1f} µs per customer")
+    results.append({"rows": 1, "single_row_microseconds": row_us})
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+r"""
+End-to-end benchmark of batch inference at 100K to 100M customers
+
+Generates customers with data/generate_dummy_data.py (chunked, cached as
+local Parquet), trains production-shaped models once, then runs the
+streaming inference path of fargate/inference/predict.py with local files
+in place of Athena and S3:
+
+    load -> features -> engagement -> churn -> ltv -> anomaly -> write
+
+Each stage reports wall time, CPU time, peak RSS and rows/sec. Results are
+written as JSON; pass an earlier file with --baseline to print per-stage
+throughput ratios against another commit.
+
+Usage:
+    python scripts/benchmarks/benchmark_inference.py
+    python scripts/benchmarks/benchmark_inference.py --rows 100000 1000000 10000000 \
+        --output inference_bench.json
+    python scripts/benchmarks/benchmark_inference.py --rows 100000000 --workdir /mnt/bench \
+        --baseline main.json
+
+Generated inputs are cached in --workdir (about 8 GB per 100M rows) and
+reused by later runs with the same row count and seed.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost as xgb
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fargate"))
+sys.path.insert(0, str(ROOT / "fargate" / "inference"))
+sys.path.insert(0, str(ROOT / "data"))
+
+import predict  # noqa: E402
+from common.features import FEATURE_SPEC  # noqa: E402
+from common.loader import LocalParquetReader  # noqa: E402
+from generate_dummy_data import generate_customers  # noqa: E402
+from utils.output import PartitionedPredictionWriter  # noqa: E402
+
+DEFAULT_ROWS = [100_000, 1_000_000]
+STAGES = ["load", "features", "engagement", "churn", "ltv", "anomaly", "write"]
+PREDICTION_TIMESTAMP = "2025-01-01T00:00:00"
+
+
+def current_rss() -> int:
+    """Resident set size in bytes (process peak where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler(threading.Thread):
+    """Background thread tracking the peak RSS since the last reset()"""
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def reset(self) -> int:
+        self.peak = current_rss()
+        return self.peak
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class StageRecorder:
+    """Accumulates wall time, CPU time, peak RSS and rows per pipeline stage"""
+
+    def __init__(self, sampler: RssSampler):
+        self.sampler = sampler
+        self.stages = {
+            name: {"wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_rss_bytes": 0, "rows": 0}
+            for name in STAGES
+        }
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows: int = 0):
+        self.sampler.reset()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record = self.stages[name]
+            record["wall_seconds"] += time.perf_counter() - wall
+            record["cpu_seconds"] += time.process_time() - cpu
+            record["peak_rss_bytes"] = max(
+                record["peak_rss_bytes"], self.sampler.peak, current_rss()
+            )
+            record["rows"] += rows
+
+    def timer(self, rows: int):
+        """timer(stage) callable for predict.score_batch covering one batch of rows"""
+        return lambda name: self.stage(name, rows)
+
+    def summary(self) -> dict:
+        out = {}
+        for name, record in self.stages.items():
+            wall = record["wall_seconds"]
+            out[name] = dict(record, rows_per_second=record["rows"] / wall if wall else None)
+        return out
+
+
+def generate_input(rows: int, path: Path, chunk_rows: int, seed: int) -> float:
+    """Write rows generated customers to path/part-*.parquet, reusing an existing dataset"""
+    marker = path / "_SUCCESS"
+    if marker.exists():
+        return 0.0
+
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+    start = time.perf_counter()
+    for part, offset in enumerate(range(0, rows, chunk_rows)):
+        n = min(chunk_rows, rows - offset)
+        np.random.seed(seed + part)
+        # Sequential hex ids instead of Faker UUIDs, which dominate generation time at scale
+        ids = [f"{i:032x}" for i in range(offset, offset + n)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = generate_customers(n, customer_ids=ids)
+        df.to_parquet(path / f"part-{part:05d}.parquet", index=False, compression="snappy")
+        print(f"  generated {offset + n:,}/{rows:,} rows", end="\r", flush=True)
+    marker.touch()
+    print()
+    return time.perf_counter() - start
+
+
+def iter_input(path: Path, batch_size: int):
+    """DataFrames of the columns inference reads, through the production loader's local backend"""
+    reader = LocalParquetReader(str(path.parent))
+    return reader.iter_batches(path.name, predict.INPUT_COLUMNS, batch_size)
+
+
+def build_models(train_rows: int, seed: int, n_jobs: int) -> dict:
+    """Train models with the production hyperparameters from fargate/training/train.py"""
+    np.random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = generate_customers(train_rows, customer_ids=[str(i) for i in range(train_rows)])
+
+    X = pd.DataFrame(FEATURE_SPEC.transform(df), columns=FEATURE_SPEC.columns)
+    scaler = StandardScaler().fit(X)
+    X = pd.DataFrame(scaler.transform(X), columns=X.columns)
+    boost = dict(
+        learning_rate=0.1, subsample=0.8, colsample_bytree=0.8, random_state=42, n_jobs=n_jobs
+    )
+    churn = df["churn_30_day"]
+
+    return {
+        "scaler": scaler,
+        "engagement": xgb.XGBRegressor(
+            objective="reg:squarederror", n_estimators=200, max_depth=6, **boost
+        ).fit(X, df["engagement_score"]),
+        "churn": xgb.XGBClassifier(
+            objective="binary:logistic",
+            n_estimators=200,
+            max_depth=5,
+            scale_pos_weight=(churn == 0).sum() / max(1, (churn == 1).sum()),
+            **boost,
+        ).fit(X, churn),
+        "ltv": xgb.XGBRegressor(
+            objective="reg:squarederror", n_estimators=200, max_depth=6, **boost
+        ).fit(X, df["lifetime_value_usd"]),
+        "anomaly": IsolationForest(
+            n_estimators=100, contamination=0.05, random_state=42, n_jobs=n_jobs
+        ).fit(X),
+    }
+
+
+def run_pipeline(input_path: Path, output_path: Path, models: dict, batch_size: int) -> dict:
+    """Stream the generated input through scoring and the partitioned writer"""
+    sampler = RssSampler()
+    sampler.start()
+    recorder = StageRecorder(sampler)
+    batches = iter_input(input_path, batch_size)
+    wall, cpu = time.perf_counter(), time.process_time()
+    rows = 0
+
+    writer = PartitionedPredictionWriter(
+        str(output_path),
+        predict.MODEL_VERSION,
+        "2025-01-01",
+        "bench",
+        num_buckets=predict.OUTPUT_BUCKETS,
+        row_group_rows=predict.OUTPUT_ROW_GROUP_ROWS,
+    )
+    try:
+        while True:
+            with recorder.stage("load"):
+                df = next(batches, None)
+            if df is None:
+                break
+            recorder.stages["load"]["rows"] += len(df)
+
+            results = predict.score_batch(
+                df, models, PREDICTION_TIMESTAMP, timer=recorder.timer(len(df))
+            )
+            with recorder.stage("write", len(results)):
+                writer.write(results)
+            rows += len(df)
+            del df, results
+
+        # Flushing the last partial row groups belongs to the write stage
+        with recorder.stage("write"):
+            writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        sampler.stop()
+
+    total_wall = time.perf_counter() - wall
+    return {
+        "rows": rows,
+        "rows_written": writer.rows_written,
+        "stages": recorder.summary(),
+        "total": {
+            "wall_seconds": total_wall,
+            "cpu_seconds": time.process_time() - cpu,
+            "peak_rss_bytes": max(s["peak_rss_bytes"] for s in recorder.stages.values()),
+            "rows_per_second": rows / total_wall if total_wall else None,
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_run(run: dict, baseline: dict = None):
+    print(f"{'stage':<11} {'wall s':>9} {'cpu s':>9} {'peak MB':>9} {'rows/s':>13} {'vs base':>8}")
+    for name, stats in list(run["stages"].items()) + [("total", run["total"])]:
+        ratio = ""
+        if baseline:
+            base = baseline["total"] if name == "total" else baseline["stages"].get(name)
+            if base and base.get("rows_per_second") and stats["rows_per_second"]:
+                ratio = f"{stats['rows_per_second'] / base['rows_per_second']:.2f}x"
+        rate = f"{stats['rows_per_second']:,.0f}" if stats["rows_per_second"] else "-"
+        print(
+            f"{name:<11} {stats['wall_seconds']:>9.2f} {stats['cpu_seconds']:>9.2f} "
+            f"{stats['peak_rss_bytes'] / 2**20:>9.0f} {rate:>13} {ratio:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="Customer counts to benchmark"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=predict.BATCH_SIZE, help="Rows per scoring batch"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=1_000_000, help="Rows per generated input file"
+    )
+    parser.add_argument(
+        "--train-rows", type=int, default=50_000, help="Rows used to train the models"
+    )
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Threads per model (-1 = all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--workdir", default="benchmark_data", help="Directory for generated inputs and outputs"
+    )
+    parser.add_argument("--keep-output", action="store_true", help="Keep the written predictions")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--output", help="Optional path for JSON results")
+    args = parser.parse_args()
+
+    predict.logger.setLevel("WARNING")
+    workdir = Path(args.workdir)
+    baseline = {}
+    if args.baseline:
+        baseline = {run["rows"]: run for run in json.loads(Path(args.baseline).read_text())["runs"]}
+
+    print(f"Training models on {args.train_rows:,} rows...")
+    models = build_models(args.train_rows, args.seed, args.n_jobs)
+
+    runs = []
+    for rows in args.rows:
+        input_path = workdir / f"customers_{rows}_seed{args.seed}"
+        output_path = workdir / f"predictions_{rows}"
+        print(f"\n=== {rows:,} customers ===")
+        generation_seconds = generate_input(rows, input_path, args.chunk_rows, args.seed)
+
+        run = run_pipeline(input_path, output_path, models, args.batch_size)
+        run["generation_seconds"] = generation_seconds
+        run["output_bytes"] = sum(f.stat().st_size for f in output_path.rglob("*.parquet"))
+        if run["rows_written"] != rows:
+            raise SystemExit(f"❌ Wrote {run['rows_written']} predictions for {rows} customers")
+        if not args.keep_output:
+            shutil.rmtree(output_path)
+
+        print_run(run, baseline.get(rows))
+        runs.append(run)
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(
+                {
+                    "meta": {
+                        "commit": git_commit(),
+                        "created_at": datetime.utcnow().isoformat(),
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "cpu_count": os.cpu_count(),
+                        "versions": {
+                            "numpy": np.__version__,
+                            "pandas": pd.__version__,
+                            "xgboost": xgb.__version__,
+                            "sklearn": sklearn.__version__,
+                        },
+                        "batch_size": args.batch_size,
+                        "output_buckets": predict.OUTPUT_BUCKETS,
+                        "output_row_group_rows": predict.OUTPUT_ROW_GROUP_ROWS,
+                        "train_rows": args.train_rows,
+                        "n_jobs": args.n_jobs,
+                        "seed": args.seed,
+                    },
+                    "runs": runs,
+                },
+                indent=2,
+            )
+        )
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+r"""
+Load test the prediction server: micro-batching vs per-request scoring
+
+Starts lambda/predict/server.py in a child process per configuration,
+serving production-shaped compiled models (see benchmark_cold_start.py) from
+a mocked S3 bucket and DynamoDB table (moto), then drives it with
+--concurrency keep-alive clients, each sending single-customer requests
+back to back. Every request has distinct features, so each one is a cache
+miss and reaches the models.
+
+Configurations:
+- per-request: MAX_BATCH_ROWS=1, one predict per request (the Lambda's behaviour)
+- micro-batch: up to --max-batch-rows requests within --max-wait-ms per predict
+
+Client-side throughput and p50/p99 latency are reported with the server's
+own /stats (mean batch size). DynamoDB is an in-process mock, so cache
+round trips are cheaper than in AWS; the comparison is what this measures.
+
+Usage:
+    python scripts/benchmarks/benchmark_microbatch.py
+    python scripts/benchmarks/benchmark_microbatch.py --concurrency 128 --requests 5000 \
+        --output microbatch.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_cold_start import ROOT, write_artifacts  # noqa: E402
+from common.features import FEATURE_SPEC  # noqa: E402
+
+# Serves the artifacts from moto in a fresh interpreter
+CHILD = r"""
+import asyncio, logging, os, sys
+from pathlib import Path
+
+artifacts_dir = Path(sys.argv[1])
+sys.path[:0] = [sys.argv[2], sys.argv[3]]
+
+from moto import mock_aws
+import boto3
+
+with mock_aws():
+    s3 = boto3.client('s3')
+    s3.create_bucket(Bucket='models')
+    for path in artifacts_dir.rglob('*'):
+        if path.is_file():
+            s3.upload_file(str(path), 'models', str(path.relative_to(artifacts_dir)))
+    boto3.client('dynamodb').create_table(
+        TableName='cache',
+        KeySchema=[{'AttributeName': 'customer_id', 'KeyType': 'HASH'},
+                   {'AttributeName': 'feature_hash', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'customer_id', 'AttributeType': 'S'},
+                              {'AttributeName': 'feature_hash', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST')
+    import server
+    logging.getLogger().setLevel(logging.WARNING)
+    prediction_server = server.PredictionServer(int(sys.argv[5]), float(sys.argv[6]))
+    asyncio.run(prediction_server.serve('127.0.0.1', int(sys.argv[4])))
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def http_request(reader, writer, method: str, path: str, body: bytes = b""):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def wait_ready(port: int, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await http_request(reader, writer, "GET", "/health")
+            writer.close()
+            return
+        except (ConnectionError, OSError):
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+async def drive(port: int, bodies: list, concurrency: int) -> dict:
+    """Send bodies over concurrency keep-alive connections; client-side latencies and throughput"""
+    latencies = []
+    statuses = []
+    next_body = iter(bodies)
+
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for body in next_body:
+            start = time.perf_counter()
+            status, _ = await http_request(reader, writer, "POST", "/predict", body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.append(status)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, server_stats = await http_request(reader, writer, "GET", "/stats")
+    writer.close()
+    return {
+        "requests": len(latencies),
+        "errors": sum(s != 200 for s in statuses),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_batch_size": server_stats["mean_batch_size"],
+    }
+
+
+def run_config(
+    artifacts_dir: Path, max_batch_rows: int, max_wait_ms: float, bodies: list, args
+) -> dict:
+    port = free_port()
+    env = {
+        **os.environ,
+        "MODELS_BUCKET": "models",
+        "DYNAMODB_TABLE": "cache",
+        "METRICS_SINK": "none",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }
+    child = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            CHILD,
+            str(artifacts_dir),
+            str(ROOT / "fargate"),
+            str(ROOT / "lambda" / "predict"),
+            str(port),
+            str(max_batch_rows),
+            str(max_wait_ms),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        asyncio.run(wait_ready(port))
+        warm_up = args.concurrency * 2
+        asyncio.run(drive(port, bodies[:warm_up], args.concurrency))
+        return asyncio.run(drive(port, bodies[warm_up:], args.concurrency))
+    except Exception:
+        child.kill()
+        raise RuntimeError(f"Server run failed:\n{child.communicate()[1]}")
+    finally:
+        child.kill()
+        child.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=3000, help="Requests per configuration")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent keep-alive clients")
+    parser.add_argument("--max-batch-rows", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument(
+        "--model-names", default="engagement,churn,ltv", help="Models scored per request"
+    )
+    parser.add_argument(
+        "--train-rows", type=int, default=20_000, help="Rows used to train the models"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Optional path for JSON results")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    model_names = args.model_names.split(",")
+    bodies = [
+        json.dumps(
+            {
+                "customer_features": {c: int(v) for c, v in zip(FEATURE_SPEC.input_columns, row)},
+                "model_names": model_names,
+            }
+        ).encode()
+        for row in rng.integers(
+            0, 100, (args.requests + args.concurrency * 2, len(FEATURE_SPEC.input_columns))
+        )
+    ]
+
+    configs = {"per-request": (1, 0.0), "micro-batch": (args.max_batch_rows, args.max_wait_ms)}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        write_artifacts(Path(tmp), args.train_rows, args.seed)
+        print(f"{'config':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'batch':>8}{'errors':>8}")
+        for name, (max_batch_rows, max_wait_ms) in configs.items():
+            result = run_config(Path(tmp), max_batch_rows, max_wait_ms, bodies, args)
+            results[name] = result
+            print(
+                f"{name:<14}{result['throughput_rps']:>10.0f}{result['p50_ms']:>10.1f}"
+                f"{result['p99_ms']:>10.1f}{result['mean_batch_size']:>8.1f}{result['errors']:>8}"
+            )
+    speedup = results["micro-batch"]["throughput_rps"] / results["per-request"]["throughput_rps"]
+    print(f"Micro-batching throughput: {speedup:.1f}x per-request scoring")
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"concurrency": args.concurrency, "results": results}, indent=2)
+        )
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
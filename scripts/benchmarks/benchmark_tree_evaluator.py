@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+r"""
+Benchmark the compiled NumPy tree evaluator against XGBoost predict()
+
+Trains boosters with the production shape (200 trees, depth 6), compiles
+them with fargate/common/tree_ensemble.py and times both paths for batch
+sizes from 1 to 1M rows. Every timing run also checks that the compiled
+predictions match the booster within float tolerance.
+
+Usage:
+    python scripts/benchmarks/benchmark_tree_evaluator.py
+    python scripts/benchmarks/benchmark_tree_evaluator.py --sizes 1 100 10000 \
+        --output tree_bench.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "fargate"))
+
+from common.features import FEATURE_SPEC  # noqa: E402
+from common.tree_ensemble import compile_xgboost  # noqa: E402
+
+DEFAULT_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+N_FEATURES = FEATURE_SPEC.n_features  # model inputs after feature engineering
+TOLERANCE = 1e-4
+
+
+def time_call(fn, X, min_seconds: float = 0.5, max_repeats: int = 1000) -> float:
+    """Median seconds per call, repeating small batches to get a stable number"""
+    timings = []
+    deadline = time.perf_counter() + min_seconds
+    while len(timings) < max_repeats and (len(timings) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def build_models(n_train: int, seed: int):
+    """Train regression and classification boosters shaped like production"""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        rng.normal(size=(n_train, N_FEATURES)), columns=[f"f{i}" for i in range(N_FEATURES)]
+    )
+    y = X.iloc[:, :5].sum(axis=1) + rng.normal(scale=0.5, size=n_train)
+    params = dict(
+        n_estimators=200,
+        max_depth=6,
+        learning_rate=0.1,
+        subsample=0.8,
+        colsample_bytree=0.8,
+        random_state=42,
+        n_jobs=-1,
+    )
+    regressor = xgb.XGBRegressor(objective="reg:squarederror", **params).fit(X, y)
+    classifier = xgb.XGBClassifier(objective="binary:logistic", **params).fit(
+        X, (y > 0).astype(int)
+    )
+    return X.columns, {"regressor": regressor, "classifier": classifier}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Batch sizes to time"
+    )
+    parser.add_argument(
+        "--train-rows", type=int, default=20_000, help="Rows used to train the boosters"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Optional path for JSON results")
+    args = parser.parse_args()
+
+    columns, models = build_models(args.train_rows, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    results = []
+
+    print(
+        f"{'model':<11} {'rows':>9} {'xgboost ms':>12} {'compiled ms':>12} {'speedup':>8} "
+        f"{'max diff':>10}"
+    )
+    for name, model in models.items():
+        compiled = compile_xgboost(model)
+        if name == "classifier":
+            reference_fn, compiled_fn = model.predict_proba, compiled.predict_proba
+        else:
+            reference_fn, compiled_fn = model.predict, compiled.predict
+
+        for size in args.sizes:
+            X = pd.DataFrame(
+                rng.normal(size=(size, N_FEATURES)).astype(np.float32), columns=columns
+            )
+            max_diff = float(np.abs(compiled_fn(X) - reference_fn(X)).max())
+            if max_diff > TOLERANCE:
+                raise SystemExit(f"❌ {name} at {size} rows deviates by {max_diff}")
+
+            xgb_seconds = time_call(reference_fn, X)
+            compiled_seconds = time_call(compiled_fn, X)
+            speedup = xgb_seconds / compiled_seconds
+            print(
+                f"{name:<11} {size:>9,} {xgb_seconds * 1e3:>12.3f} {compiled_seconds * 1e3:>12.3f} "
+                f"{speedup:>7.1f}x {max_diff:>10.1e}"
+            )
+            results.append(
+                {
+                    "model": name,
+                    "rows": size,
+                    "xgboost_seconds": xgb_seconds,
+                    "compiled_seconds": compiled_seconds,
+                    "speedup": speedup,
+                    "max_abs_diff": max_diff,
+                }
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -147,10 +147,10 @@ echo_step "TEST 6: Docker Build Test"
 
 # Test that Dockerfiles are valid
 echo "Validating Dockerfiles..."
-docker build -t test-training -f fargate/training/Dockerfile --target builder fargate/training/ --quiet
+docker build -t test-training -f fargate/training/Dockerfile --target builder fargate/ --quiet
 check_success "Training Dockerfile valid"
 
-docker build -t test-inference -f fargate/inference/Dockerfile --target builder fargate/inference/ --quiet
+docker build -t test-inference -f fargate/inference/Dockerfile --target builder fargate/ --quiet
 check_success "Inference Dockerfile valid"
 
 # Cleanup test images
@@ -173,9 +173,12 @@ CREATE EXTERNAL TABLE IF NOT EXISTS predictions (
     is_anomaly INT COMMENT 'Anomaly flag (0/1)',
     
     -- Metadata
-    model_version STRING COMMENT 'Model version',
     prediction_timestamp STRING COMMENT 'Prediction timestamp (ISO 8601)'
 )
+PARTITIONED BY (
+    model_version STRING COMMENT 'Model version',
+    run_date STRING COMMENT 'Inference run date (YYYY-MM-DD, UTC)'
+)
 STORED AS PARQUET
 LOCATION 's3://engagement-prediction-results-dev/predictions/'
 TBLPROPERTIES (
@@ -198,6 +201,7 @@ FROM (
         *,
         NTILE(4) OVER (ORDER BY predicted_engagement_score) AS quartile
     FROM predictions
+    WHERE model_version = 'v1.0' AND run_date = '2025-01-01'
 )
 WHERE MOD(ABS(xxhash64(customer_id)), 10) = 0
 LIMIT 400;
@@ -224,7 +228,9 @@ SELECT
     p.prediction_timestamp
 FROM customers c
 LEFT JOIN predictions p
-    ON c.customer_id = p.customer_id;
+    ON c.customer_id = p.customer_id
+    AND p.model_version = 'v1.0'
+    AND p.run_date = '2025-01-01';
 
 -- ========================================
 -- 7. MODEL METRICS TABLE (Performance Tracking)
@@ -82,8 +82,35 @@ resource "aws_api_gateway_model" "predict_request" {
         enum = ["engagement", "churn", "ltv", "recommendations", "anomaly"]
         default = "engagement"
       }
+      customers = {
+        type        = "array"
+        description = "Batch request: customers to score (instead of customer_features)"
+        minItems    = 1
+        maxItems    = 500
+        items = {
+          type = "object"
+          properties = {
+            customer_id       = { type = "string" }
+            customer_features = { type = "object" }
+          }
+          required = ["customer_features"]
+        }
+      }
+      customer_id = {
+        type        = "string"
+        description = "Lookup request: serve this customer's latest batch predictions"
+      }
+      model_names = {
+        type        = "array"
+        description = "Models to return (multi-model, batch and lookup requests)"
+        items       = { type = "string", enum = ["engagement", "churn", "ltv", "recommendations", "anomaly"] }
+      }
     }
-    required = ["customer_features"]
+    anyOf = [
+      { required = ["customer_features"] },
+      { required = ["customers"] },
+      { required = ["customer_id"] }
+    ]
   })
 }
 
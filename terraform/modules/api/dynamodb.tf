@@ -55,6 +55,33 @@ resource "aws_dynamodb_table" "predictions_cache" {
   })
 }
 
+# DynamoDB Table serving the latest batch predictions by customer_id
+# (bulk loaded by the inference task, read by the predict Lambda)
+resource "aws_dynamodb_table" "batch_predictions" {
+  name         = "${var.project_name}-batch-predictions-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "customer_id"
+
+  attribute {
+    name = "customer_id"
+    type = "S"
+  }
+
+  # Items expire a few days after their batch run if no newer run replaces them
+  ttl {
+    attribute_name = "ttl"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = true
+  }
+
+  tags = merge(var.tags, {
+    Name = "${var.project_name}-batch-predictions"
+  })
+}
+
 # DynamoDB Auto Scaling (optional, for on-demand we don't need this)
 # But keeping configuration ready if switching to provisioned capacity
 
@@ -60,6 +60,11 @@ output "dynamodb_table_id" {
   value       = aws_dynamodb_table.predictions_cache.id
 }
 
+output "batch_predictions_table_name" {
+  description = "Name of the DynamoDB table serving batch predictions by customer_id"
+  value       = aws_dynamodb_table.batch_predictions.name
+}
+
 output "dynamodb_gsi_name" {
   description = "Name of the DynamoDB GSI"
   value       = "model_version-timestamp-index"
@@ -101,6 +101,7 @@ resource "aws_lambda_function" "create_qa_table" {
   runtime       = "python3.11"
   timeout       = 600
   memory_size   = 1024
+  layers        = [aws_lambda_layer_version.common.arn]
 
   environment {
     variables = {
@@ -128,6 +129,7 @@ resource "aws_lambda_function" "create_results_table" {
   runtime       = "python3.11"
   timeout       = 600
   memory_size   = 1024
+  layers        = [aws_lambda_layer_version.common.arn]
 
   environment {
     variables = {
@@ -186,11 +188,19 @@ resource "aws_lambda_function" "predict" {
 
   environment {
     variables = {
-      ENV                = var.environment
-      MODELS_BUCKET      = var.data_buckets.models
-      DYNAMODB_TABLE     = "${var.project_name}-predictions-cache-${var.environment}"
-      MODEL_VERSION      = "v1.0"
-      CACHE_TTL_SECONDS  = "3600"
+      ENV                 = var.environment
+      MODELS_BUCKET       = var.data_buckets.models
+      DYNAMODB_TABLE      = "${var.project_name}-predictions-cache-${var.environment}"
+      MODEL_VERSION       = "v1.0"
+      MODEL_POINTER_KEY   = "models/current.json"
+      MODEL_CHECK_SECONDS = "60"
+      CACHE_TTL_SECONDS   = "3600"
+      MAX_BATCH_SIZE      = "500"
+      LOCAL_CACHE_SIZE    = "10000"
+      CACHE_WRITE_BUFFER  = "10000"
+      MODEL_FORMAT        = "compiled"
+      EAGER_MODELS        = "scaler,engagement,churn,ltv"
+      SERVING_TABLE       = "${var.project_name}-batch-predictions-${var.environment}"
     }
   }
 
@@ -168,6 +168,15 @@ resource "aws_sfn_state_machine" "ml_pipeline" {
                   {
                     Name  = "RESULTS_BUCKET"
                     Value = var.data_buckets.results
+                  },
+                  {
+                    Name  = "INFERENCE_MODE"
+                    Value = "checkpointed"
+                  },
+                  {
+                    # Retries of this state resume the same run from its last checkpoint
+                    Name      = "RUN_ID"
+                    "Value.$" = "$$.Execution.Name"
                   }
                 ]
               }
@@ -202,6 +211,10 @@ resource "aws_sfn_state_machine" "ml_pipeline" {
               Create-QA-Table = {
                 Type     = "Task"
                 Resource = aws_lambda_function.create_qa_table.arn
+                Parameters = {
+                  # The partition the inference run wrote is read from its run record
+                  "run_id.$" = "$$.Execution.Name"
+                }
                 Comment  = "Create 400-row QA sample table"
                 Retry = [
                   {
@@ -221,6 +234,10 @@ resource "aws_sfn_state_machine" "ml_pipeline" {
               Create-Results-Table = {
                 Type     = "Task"
                 Resource = aws_lambda_function.create_results_table.arn
+                Parameters = {
+                  # The partition the inference run wrote is read from its run record
+                  "run_id.$" = "$$.Execution.Name"
+                }
                 Comment  = "Create final 100K results table"
                 Retry = [
                   {
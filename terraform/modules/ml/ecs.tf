@@ -92,6 +92,10 @@ resource "aws_ecs_task_definition" "training" {
           name  = "MODELS_BUCKET"
           value = var.data_buckets.models
         },
+        {
+          name  = "ATHENA_RESULTS_BUCKET"
+          value = var.data_buckets.athena_results
+        },
         {
           name  = "GLUE_DATABASE_RAW"
           value = var.glue_databases.raw
@@ -163,6 +167,10 @@ resource "aws_ecs_task_definition" "inference" {
           name  = "RESULTS_BUCKET"
           value = var.data_buckets.results
         },
+        {
+          name  = "ATHENA_RESULTS_BUCKET"
+          value = var.data_buckets.athena_results
+        },
         {
           name  = "GLUE_DATABASE_RAW"
           value = var.glue_databases.raw
@@ -170,6 +178,10 @@ resource "aws_ecs_task_definition" "inference" {
         {
           name  = "GLUE_DATABASE_ML"
           value = var.glue_databases.ml
+        },
+        {
+          name  = "SERVING_TABLE"
+          value = "${var.project_name}-batch-predictions-${var.environment}"
         }
       ]
 
@@ -134,6 +134,15 @@ resource "aws_iam_role_policy" "ecs_task" {
         ]
         Resource = "*"
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:BatchWriteItem",
+          "dynamodb:PutItem",
+          "dynamodb:DescribeTable"
+        ]
+        Resource = "arn:aws:dynamodb:${var.aws_region}:*:table/${var.project_name}-batch-predictions-${var.environment}"
+      },
       {
         Effect = "Allow"
         Action = [
@@ -0,0 +1,498 @@
+"""
+Test suite for the batch inference pipeline (fargate/inference)
+"""
+
+import os
+import sys
+import json
+
+import boto3
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+import xgboost as xgb
+from moto import mock_aws
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "fargate"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "fargate", "inference"))
+
+import predict  # noqa: E402
+from common.anomaly import score_anomalies  # noqa: E402
+from common.features import FEATURE_SPEC  # noqa: E402
+from common.loader import LocalParquetReader  # noqa: E402
+from utils.artifact_cache import ArtifactCache, file_sha256  # noqa: E402
+from utils.incremental import (  # noqa: E402
+    build_state,
+    changed_rows,
+    feature_fingerprints,
+    merge_predictions,
+)
+from utils.output import PartitionedPredictionWriter  # noqa: E402
+from utils.pipeline import run_pipelined  # noqa: E402
+from utils.serving import ServingTableLoader  # noqa: E402
+from utils.sharding import ShardedScorer, shard_assignments  # noqa: E402
+from utils.summary import PredictionSummary  # noqa: E402
+
+
+def make_customers(n: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic customers with the columns the feature pipeline needs"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {col: rng.integers(0, 100, n).astype(float) for col in FEATURE_SPEC.raw_features}
+    )
+    df["engagement_score"] = rng.random(n)
+    df.insert(0, "customer_id", [f"cust-{seed}-{i:07d}" for i in range(n)])
+    df["gender"] = rng.choice(["M", "F"], n)
+    df["location"] = "US-CA"
+    df["content_category_primary"] = "music"
+    df["churn_30_day"] = rng.integers(0, 2, n)
+    df["lifetime_value_usd"] = rng.random(n) * 500
+    return df
+
+
+def make_models(train_df: pd.DataFrame) -> dict:
+    """Fit small versions of the four production models plus the scaler"""
+    X = pd.DataFrame(FEATURE_SPEC.transform(train_df), columns=FEATURE_SPEC.columns)
+    scaler = StandardScaler().fit(X)
+    X_scaled = pd.DataFrame(scaler.transform(X), columns=X.columns)
+    params = dict(n_estimators=10, max_depth=3, n_jobs=1, random_state=42)
+    return {
+        "scaler": scaler,
+        "engagement": xgb.XGBRegressor(**params).fit(X_scaled, train_df["engagement_score"]),
+        "churn": xgb.XGBClassifier(**params).fit(X_scaled, train_df["churn_30_day"]),
+        "ltv": xgb.XGBRegressor(**params).fit(X_scaled, train_df["lifetime_value_usd"]),
+        "anomaly": IsolationForest(n_estimators=20, contamination=0.05, random_state=42).fit(
+            X_scaled
+        ),
+    }
+
+
+_CUSTOMERS = make_customers(600)
+_MODELS = make_models(_CUSTOMERS)
+
+
+def test_streaming_matches_full_batch(tmp_path):
+    """Scoring and writing in small batches produces the same predictions as one full batch"""
+    timestamp = "2025-01-01T00:00:00"
+    expected = predict.score_batch(_CUSTOMERS, _MODELS, timestamp)
+
+    with PartitionedPredictionWriter(
+        str(tmp_path), "v1.0", "2025-01-01", "run1", num_buckets=2
+    ) as writer:
+        for start in range(0, len(_CUSTOMERS), 128):
+            writer.write(
+                predict.score_batch(_CUSTOMERS.iloc[start : start + 128], _MODELS, timestamp)
+            )
+
+    assert writer.rows_written == len(_CUSTOMERS)
+    streamed = pd.concat(pd.read_parquet(path) for path in writer.files)
+    streamed = streamed.set_index("customer_id").loc[expected["customer_id"]].reset_index()
+    pd.testing.assert_frame_equal(
+        streamed, expected.drop(columns=["model_version"]).reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_partitioned_output_layout(tmp_path):
+    """Batches land in sorted bucket files under model_version/run_date; a rerun replaces them"""
+    timestamp = "2025-01-01T00:00:00"
+    expected = predict.score_batch(_CUSTOMERS, _MODELS, timestamp)
+
+    def run(run_id):
+        with PartitionedPredictionWriter(
+            str(tmp_path), "v1.0", "2025-01-01", run_id, num_buckets=4, row_group_rows=64
+        ) as writer:
+            for start in range(0, len(expected), 100):
+                writer.write(expected.iloc[start : start + 100])
+        return writer
+
+    run("20250101_000000")
+    writer = run("20250101_120000")
+    partition = tmp_path / "model_version=v1.0" / "run_date=2025-01-01"
+    files = sorted(partition.iterdir())
+    assert writer.rows_written == len(expected)
+    assert [f.name for f in files] == [f"bucket-{b:04d}-20250101_120000.parquet" for b in range(4)]
+
+    for path in files:
+        parquet = pq.ParquetFile(path)
+        assert "model_version" not in parquet.schema_arrow.names
+        for i in range(parquet.metadata.num_row_groups):
+            ids = parquet.read_row_group(i, columns=["customer_id"]).column(0).to_pylist()
+            assert ids == sorted(ids)
+
+    written = pd.concat(pd.read_parquet(path) for path in files)
+    written = written.set_index("customer_id").loc[expected["customer_id"]].reset_index()
+    pd.testing.assert_frame_equal(
+        written, expected.drop(columns=["model_version"]).reset_index(drop=True), check_dtype=False
+    )
+
+
+class ThrottlingClient:
+    """DynamoDB client that leaves half of each of the first few batches unprocessed"""
+
+    def __init__(self, client, throttled_calls: int):
+        self.client = client
+        self.throttled_calls = throttled_calls
+
+    def batch_write_item(self, RequestItems):
+        ((table, requests),) = RequestItems.items()
+        if self.throttled_calls > 0 and len(requests) > 1:
+            self.throttled_calls -= 1
+            half = len(requests) // 2
+            self.client.batch_write_item(RequestItems={table: requests[:half]})
+            return {"UnprocessedItems": {table: requests[half:]}}
+        return self.client.batch_write_item(RequestItems=RequestItems)
+
+
+@mock_aws
+def test_serving_table_load_retries_unprocessed_items(tmp_path):
+    """Every prediction reaches the serving table, grouped by model, despite unprocessed items"""
+    expected = predict.score_batch(_CUSTOMERS, _MODELS, "2025-01-01T00:00:00")
+    with PartitionedPredictionWriter(
+        str(tmp_path), "v1.0", "2025-01-01", "run1", num_buckets=4
+    ) as writer:
+        writer.write(expected)
+
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName="serving",
+        KeySchema=[{"AttributeName": "customer_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "customer_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    loader = ServingTableLoader(
+        "serving", segments=3, base_backoff=0.001, client=ThrottlingClient(client, 5)
+    )
+    stats = loader.load_files(writer.files, "v1.0", "2025-01-01", "run1")
+    assert stats.items == len(expected) and stats.failed == 0 and stats.retried > 0
+
+    items = boto3.resource("dynamodb").Table("serving").scan()["Items"]
+    assert len(items) == len(expected)
+    row = expected.iloc[7]
+    item = next(i for i in items if i["customer_id"] == row["customer_id"])
+    assert item["model_version"] == "v1.0" and item["run_id"] == "run1"
+    assert float(item["outputs"]["churn"]["predicted_churn_probability"]) == pytest.approx(
+        row["predicted_churn_probability"]
+    )
+    assert int(item["outputs"]["anomaly"]["is_anomaly"]) == row["is_anomaly"]
+
+
+@mock_aws
+def test_serving_table_load_keeps_last_item_of_a_repeated_customer(tmp_path):
+    """A customer_id repeated within one batch is written once, with its last prediction"""
+    scored = predict.score_batch(_CUSTOMERS.iloc[:10], _MODELS, "2025-01-01T00:00:00")
+    repeat = scored.iloc[[3]].assign(predicted_ltv_usd=123.0)
+    predictions = pd.concat([scored, repeat], ignore_index=True)
+    with PartitionedPredictionWriter(str(tmp_path), "v1.0", "2025-01-01", "run1") as writer:
+        writer.write(predictions)
+
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName="serving",
+        KeySchema=[{"AttributeName": "customer_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "customer_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    stats = ServingTableLoader("serving", client=client).load_files(
+        writer.files, "v1.0", "2025-01-01", "run1"
+    )
+    assert stats.items == len(scored) and stats.failed == 0
+
+    items = boto3.resource("dynamodb").Table("serving").scan()["Items"]
+    assert len(items) == len(scored)
+    item = next(i for i in items if i["customer_id"] == repeat["customer_id"].iloc[0])
+    assert float(item["outputs"]["ltv"]["predicted_ltv_usd"]) == 123.0
+
+
+def test_pipelined_scoring_matches_sequential():
+    """Pipelined load/score/write delivers every batch's results in order"""
+    timestamp = "2025-01-01T00:00:00"
+    expected = predict.score_batch(_CUSTOMERS, _MODELS, timestamp)
+    batches = (_CUSTOMERS.iloc[start : start + 128] for start in range(0, len(_CUSTOMERS), 128))
+    written = []
+
+    stats = run_pipelined(
+        batches, lambda df: predict.score_batch(df, _MODELS, timestamp), written.append
+    )
+
+    assert stats.chunks == 5
+    pd.testing.assert_frame_equal(pd.concat(written), expected)
+
+
+def test_pipeline_stops_and_raises_on_sink_failure():
+    """A failing writer stops the loader (bounded queues) and its error reaches the caller"""
+    pulled = []
+
+    def source():
+        for i in range(1000):
+            pulled.append(i)
+            yield i
+
+    def sink(item):
+        raise IOError("upload failed")
+
+    with pytest.raises(IOError, match="upload failed"):
+        run_pipelined(source(), lambda item: item, sink, queue_size=2)
+    assert len(pulled) < 10
+
+
+def test_checkpointed_run_resumes_after_failure(tmp_path, monkeypatch):
+    """A restart with the same run ID scores only unfinished chunks and yields the full snapshot"""
+    monkeypatch.setattr(predict, "RESULTS_PATH", str(tmp_path / "results"))
+    monkeypatch.setattr(predict, "BATCH_SIZE", 100)
+    monkeypatch.setattr(predict, "register_partition", lambda *args: None)
+    monkeypatch.setattr(predict, "publish_metric", lambda *args, **kwargs: None)
+    os.makedirs(tmp_path / "raw" / "customers")
+    for i, start in enumerate(range(0, len(_CUSTOMERS), 300)):
+        _CUSTOMERS.iloc[start : start + 300].to_parquet(
+            tmp_path / "raw" / "customers" / f"part-{i}.parquet"
+        )
+    reader = LocalParquetReader(str(tmp_path / "raw"))
+    models = dict(_MODELS, manifest={"training_run": "20250101_000000"})
+    scored = []
+
+    class FlakyScorer:
+        def __init__(self, fail_after):
+            self.fail_after = fail_after
+
+        def score(self, df, prediction_timestamp=None):
+            if len(scored) == self.fail_after:
+                raise RuntimeError("task interrupted")
+            scored.append(len(df))
+            return predict.score_batch(df, models, prediction_timestamp)
+
+    with pytest.raises(RuntimeError):
+        predict.run_checkpointed_inference(
+            FlakyScorer(fail_after=4), models, run_id="run-1", reader=reader
+        )
+    progress_path = (
+        tmp_path / "results" / "runs" / predict.MODEL_VERSION / "run-1" / "progress.json"
+    )
+    completed = len(json.loads(progress_path.read_text())["chunks"])
+    assert 0 < completed <= 4
+
+    del scored[:]
+    rows = predict.run_checkpointed_inference(
+        FlakyScorer(fail_after=None), models, run_id="run-1", reader=reader
+    )
+    assert rows == len(_CUSTOMERS)
+    assert len(scored) == 6 - completed
+
+    checkpoint = json.loads(progress_path.read_text())
+    assert checkpoint["status"] == "complete"
+    # The QA and results Lambdas read the partition from the run record, not today's date
+    record = json.loads((tmp_path / "results" / "run_outputs" / "run-1.json").read_text())
+    assert (record["model_version"], record["run_date"], record["rows"]) == (
+        predict.MODEL_VERSION,
+        checkpoint["run_date"],
+        len(_CUSTOMERS),
+    )
+    summary_dir = tmp_path / "results" / "summaries" / f"model_version={predict.MODEL_VERSION}"
+    summary = json.loads(next(summary_dir.glob("*/summary-run-1.json")).read_text())
+    assert summary["rows"] == len(_CUSTOMERS)
+    partition = tmp_path / "results" / "predictions" / f"model_version={predict.MODEL_VERSION}"
+    written = pd.read_parquet(next(partition.iterdir()))
+    expected = predict.score_batch(_CUSTOMERS, _MODELS, checkpoint["prediction_timestamp"])
+    written = written.set_index("customer_id").loc[expected["customer_id"]].reset_index()
+    pd.testing.assert_frame_equal(
+        written, expected.drop(columns=["model_version"]).reset_index(drop=True), check_dtype=False
+    )
+
+    assert (
+        predict.run_checkpointed_inference(
+            FlakyScorer(fail_after=0), models, run_id="run-1", reader=reader
+        )
+        == rows
+    )
+
+
+def test_prediction_summary_merges_chunks():
+    """Chunk summaries merge into the full-run summary; sketch quantiles stay within 1%"""
+    results = predict.score_batch(_CUSTOMERS, _MODELS, "2025-01-01T00:00:00")
+    merged = PredictionSummary()
+    for start in range(0, len(results), 128):
+        part = PredictionSummary()
+        part.update(results.iloc[start : start + 128])
+        merged.merge(part)
+    whole = PredictionSummary()
+    whole.update(results)
+
+    merged_doc, whole_doc = merged.to_dict(), whole.to_dict()
+    assert merged_doc["segments"] == whole_doc["segments"]
+    assert sum(merged_doc["segments"].values()) == len(results)
+    assert np.isclose(merged_doc["churn_rate"], results["predicted_churn"].mean())
+    for name, column in merged_doc["columns"].items():
+        assert column["histogram"] == whole_doc["columns"][name]["histogram"]
+        assert column["sketch"] == whole_doc["columns"][name]["sketch"]
+        assert np.isclose(column["mean"], results[name].mean())
+        histogram = column["histogram"]
+        assert histogram["underflow"] + sum(histogram["counts"]) + histogram["overflow"] == len(
+            results
+        )
+
+        values = np.sort(results[name].to_numpy(dtype=float))
+        exact = values[int(0.5 * (len(values) - 1))]
+        assert abs(column["quantiles"]["p50"] - exact) <= 0.01 * abs(exact) + 1e-9
+    json.dumps(merged_doc)
+
+
+def test_shard_assignments_are_stable():
+    """The same customer_id always lands in the same shard"""
+    ids = _CUSTOMERS["customer_id"]
+    first = shard_assignments(ids, 4)
+    assert (first == shard_assignments(ids.iloc[::-1], 4)[::-1]).all()
+    assert set(first) == {0, 1, 2, 3}
+
+
+def test_sharded_scoring_preserves_order():
+    """Scoring in a process pool returns the in-process results in input order"""
+    timestamp = "2025-01-01T00:00:00"
+    expected = predict.score_batch(_CUSTOMERS, _MODELS, timestamp)
+
+    with ShardedScorer(
+        _MODELS, predict.score_batch, max_workers=2, num_shards=3, model_n_jobs=1
+    ) as scorer:
+        sharded = scorer.score(_CUSTOMERS, timestamp)
+
+    pd.testing.assert_frame_equal(sharded, expected)
+
+
+@mock_aws
+def test_artifact_cache_downloads_once_per_etag(tmp_path):
+    """Unchanged objects are served from disk; a re-upload gets a new entry"""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="models")
+    s3.put_object(Bucket="models", Key="models/v1.0/churn_1.pkl", Body=b"first")
+    cache = ArtifactCache(s3, str(tmp_path))
+
+    first = cache.fetch("models", "models/v1.0/churn_1.pkl")
+    second = cache.fetch("models", "models/v1.0/churn_1.pkl")
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    s3.put_object(Bucket="models", Key="models/v1.0/churn_1.pkl", Body=b"second")
+    third = cache.fetch("models", "models/v1.0/churn_1.pkl")
+    assert third != first
+    assert open(third, "rb").read() == b"second"
+    assert cache.misses == 2
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".download-")]
+
+
+@mock_aws
+def test_load_models_resolves_through_manifest(tmp_path, monkeypatch):
+    """Models are located with one manifest GET and verified by checksum"""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="models")
+    artifacts = {}
+    for name in ["engagement", "churn", "ltv", "anomaly", "scaler"]:
+        local_path = tmp_path / f"{name}.pkl"
+        joblib.dump(_MODELS[name], local_path)
+        key = f"models/v1.0/{name}_20250101_000000.pkl"
+        s3.upload_file(str(local_path), "models", key)
+        artifacts[name] = {
+            "key": key,
+            "sha256": file_sha256(str(local_path)),
+            "etag": s3.head_object(Bucket="models", Key=key)["ETag"].strip('"'),
+        }
+    s3.put_object(
+        Bucket="models",
+        Key="models/v1.0/manifest.json",
+        Body=json.dumps(
+            {
+                "model_version": "v1.0",
+                "training_run": "20250101_000000",
+                "feature_columns": FEATURE_SPEC.columns,
+                "artifacts": artifacts,
+            }
+        ),
+    )
+
+    monkeypatch.setattr(predict, "s3_client", s3)
+    monkeypatch.setattr(predict, "MODELS_BUCKET", "models")
+    monkeypatch.setattr(predict, "MODEL_CACHE_DIR", str(tmp_path / "cache"))
+    models = predict.load_models_from_s3()
+
+    assert set(models) == {"engagement", "churn", "ltv", "anomaly", "scaler", "manifest"}
+    assert models["manifest"]["training_run"] == "20250101_000000"
+    X = predict.prepare_features(_CUSTOMERS.head(5), models["scaler"])[1]
+    assert np.allclose(models["ltv"].predict(X), _MODELS["ltv"].predict(X))
+
+
+def test_incremental_rescoring_matches_full_run():
+    """Only changed/new rows are rescored and the snapshot equals a full rescore"""
+    timestamp = "2025-01-01T00:00:00"
+    yesterday = _CUSTOMERS.iloc[:550]
+    previous = build_state(
+        predict.score_batch(yesterday, _MODELS, timestamp), feature_fingerprints(yesterday)
+    )
+
+    today = _CUSTOMERS.sample(frac=1.0, random_state=1).reset_index(drop=True)
+    today.loc[:9, "sessions_last_7_days"] += 3
+    fingerprints = feature_fingerprints(today)
+    changed = changed_rows(today["customer_id"], fingerprints, previous)
+
+    expected_changed = ~today["customer_id"].isin(yesterday["customer_id"]).to_numpy()
+    expected_changed[:10] = True
+    assert (changed == expected_changed).all()
+
+    scored = predict.score_batch(today[changed], _MODELS, timestamp)
+    snapshot = merge_predictions(today["customer_id"], changed, scored, previous)
+    expected = predict.score_batch(today, _MODELS, timestamp).reset_index(drop=True)
+    pd.testing.assert_frame_equal(snapshot, expected, check_dtype=False, atol=1e-6)
+
+
+def test_incremental_state_keeps_one_row_per_customer():
+    """Customers duplicated in an earlier run are stored once, so the next run stays aligned"""
+    timestamp = "2025-01-01T00:00:00"
+    yesterday = pd.concat([_CUSTOMERS.iloc[:100], _CUSTOMERS.iloc[[5, 7]]])
+    previous = build_state(
+        predict.score_batch(yesterday, _MODELS, timestamp), feature_fingerprints(yesterday)
+    )
+    assert len(previous) == 100 and previous["customer_id"].is_unique
+
+    today = _CUSTOMERS.iloc[:120]
+    changed = changed_rows(today["customer_id"], feature_fingerprints(today), previous)
+    assert changed.tolist() == [False] * 100 + [True] * 20
+    scored = predict.score_batch(today[changed], _MODELS, timestamp)
+    snapshot = merge_predictions(today["customer_id"], changed, scored, previous)
+    expected = predict.score_batch(today, _MODELS, timestamp).reset_index(drop=True)
+    pd.testing.assert_frame_equal(snapshot, expected, check_dtype=False, atol=1e-6)
+
+
+def test_incremental_run_keeps_state_under_results_path(tmp_path, monkeypatch):
+    """The incremental state lives under RESULTS_PATH, so a local run reuses the previous one"""
+    monkeypatch.setattr(predict, "RESULTS_PATH", str(tmp_path / "results"))
+    monkeypatch.setattr(predict, "register_partition", lambda *args: None)
+    monkeypatch.setattr(predict, "publish_metric", lambda *args, **kwargs: None)
+    models = dict(_MODELS, manifest={"training_run": "20250101_000000"})
+    scored = []
+
+    class RecordingScorer:
+        def score(self, df, prediction_timestamp=None):
+            scored.append(len(df))
+            return predict.score_batch(df, models, prediction_timestamp)
+
+    predict.run_incremental_inference(RecordingScorer(), models, _CUSTOMERS.iloc[:500])
+    state_dir = tmp_path / "results" / "state" / predict.MODEL_VERSION
+    assert sorted(p.name for p in state_dir.iterdir()) == [
+        "incremental_state.json",
+        "incremental_state.parquet",
+    ]
+
+    results = predict.run_incremental_inference(RecordingScorer(), models, _CUSTOMERS)
+    assert scored == [500, 100] and len(results) == len(_CUSTOMERS)
+
+
+def test_single_pass_anomaly_scoring_matches_sklearn():
+    """One traversal gives the same score, decision value and label as sklearn's separate calls"""
+    forest = _MODELS["anomaly"]
+    X = predict.prepare_features(_CUSTOMERS, _MODELS["scaler"])[1]
+    anomalies = score_anomalies(forest, X)
+
+    assert np.array_equal(anomalies.score, forest.score_samples(X))
+    assert np.allclose(anomalies.decision, forest.decision_function(X))
+    assert np.array_equal(anomalies.is_anomaly, (forest.predict(X) == -1).astype(int))
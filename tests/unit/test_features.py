@@ -0,0 +1,121 @@
+"""
+Test suite for the shared feature spec (fargate/common/features.py)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "fargate"))
+
+from common.features import FEATURE_SPEC, FeatureSpec  # noqa: E402
+
+
+def make_raw(n: int = 500, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {col: rng.integers(0, 50, n).astype(float) for col in FEATURE_SPEC.raw_features}
+    )
+    df["engagement_score"] = rng.random(n)
+    df.loc[::11, "followers_count"] = np.nan
+    df.loc[::13, "gig_applications_sent"] = -1  # division by zero -> inf -> 0
+    df["customer_id"] = [f"c{i}" for i in range(n)]
+    df["gender"] = "F"
+    return df
+
+
+def legacy_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The pandas implementation the spec replaced"""
+    df = df.copy()
+    df["engagement_per_session"] = df["engagement_score"] / (df["sessions_last_7_days"] + 1)
+    df["avg_session_value"] = df["session_duration_avg_minutes"] * df["engagement_score"]
+    df["follower_following_ratio"] = df["followers_count"] / (df["following_count"] + 1)
+    df["content_activity_rate"] = (df["posts_last_30_days"] + df["stories_last_30_days"]) / 30
+    df["match_efficiency"] = df["matches_last_30_days"] / (df["swipes_right_last_30_days"] + 1)
+    df["connection_rate"] = df["total_connections"] / (df["tenure_months"] + 1)
+    df["gig_success_rate"] = df["active_gigs_count"] / (df["gig_applications_sent"] + 1)
+    df["revenue_per_gig"] = df["transaction_revenue_last_90_days"] / (df["active_gigs_count"] + 1)
+    return df.replace([float("inf"), float("-inf")], 0).fillna(0)[FEATURE_SPEC.columns]
+
+
+def test_kernel_matches_pandas_implementation():
+    """The float32 kernel reproduces the old pandas feature engineering"""
+    df = make_raw()
+    X = FEATURE_SPEC.transform(df)
+
+    assert X.dtype == np.float32
+    assert X.shape == (len(df), FEATURE_SPEC.n_features)
+    assert np.allclose(X, legacy_features(df).to_numpy(), rtol=1e-6)
+
+
+def test_scaler_is_folded_in():
+    """Passing the scaler gives the same result as scaler.transform()"""
+    df = make_raw()
+    X = pd.DataFrame(FEATURE_SPEC.transform(df), columns=FEATURE_SPEC.columns)
+    scaler = StandardScaler().fit(X)
+
+    assert np.allclose(FEATURE_SPEC.transform(df, scaler), scaler.transform(X), atol=1e-5)
+
+
+def test_single_row_path_matches_batch_path():
+    """transform_row() on a dict equals the batch kernel, whatever the key order"""
+    df = make_raw(n=20)
+    X = FEATURE_SPEC.transform(df)
+    for i in range(len(df)):
+        record = df.iloc[i].to_dict()
+        shuffled = dict(reversed(list(record.items())))
+        assert np.allclose(FEATURE_SPEC.transform_row(shuffled), X[i : i + 1], rtol=1e-6)
+
+
+def test_nullable_integer_columns():
+    """Athena-style nullable Int64 columns with NA are accepted"""
+    df = make_raw(n=10)
+    df["age"] = pd.array([None] + [30] * 9, dtype="Int64")
+    X = FEATURE_SPEC.transform(df)
+    assert X[0, FEATURE_SPEC.columns.index("age")] == 0
+    assert X[1, FEATURE_SPEC.columns.index("age")] == 30
+
+
+def test_schema_check():
+    """A model trained on another column order is rejected"""
+    FEATURE_SPEC.check_schema(list(FEATURE_SPEC.columns))
+    with pytest.raises(ValueError):
+        FEATURE_SPEC.check_schema(FEATURE_SPEC.columns[::-1])
+    with pytest.raises(ValueError):
+        FEATURE_SPEC.check_inputs(["customer_id", "age"])
+
+
+def test_canonical_encoding_and_cache_key():
+    """Key order, extra keys and int vs float leave the encoded row and its key unchanged; bad
+    values raise"""
+    df = make_raw(n=5)
+    records = [df.iloc[i].to_dict() for i in range(len(df))]
+    encoded = [FEATURE_SPEC.encode_row(r) for r in records]
+    assert np.allclose(
+        FEATURE_SPEC.transform_values(encoded),
+        FEATURE_SPEC.transform(df),
+        rtol=1e-6,
+        equal_nan=True,
+    )
+
+    record = {k: v for k, v in records[1].items() if k in FEATURE_SPEC.input_columns and v == v}
+    variant = {**dict(reversed(list(record.items()))), "gender": "M", "age": int(record["age"])}
+    assert FEATURE_SPEC.row_key(FEATURE_SPEC.encode_row(variant)) == FEATURE_SPEC.row_key(
+        FEATURE_SPEC.encode_row(record)
+    )
+    assert len(FEATURE_SPEC.row_key(FEATURE_SPEC.encode_row(record))) == 16
+
+    changed = {**record, "age": record["age"] + 1}
+    assert FEATURE_SPEC.row_key(FEATURE_SPEC.encode_row(changed)) != FEATURE_SPEC.row_key(
+        FEATURE_SPEC.encode_row(record)
+    )
+    other_schema = FeatureSpec(FEATURE_SPEC.raw_features[::-1])
+    assert other_schema.row_key(other_schema.encode_row(record)) != FEATURE_SPEC.row_key(
+        FEATURE_SPEC.encode_row(record)
+    )
+    with pytest.raises(ValueError):
+        FEATURE_SPEC.encode_row({**record, "age": "thirty"})
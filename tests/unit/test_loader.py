@@ -0,0 +1,56 @@
+"""
+Test suite for the column-projected table readers (fargate/common/loader.py)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "fargate"))
+
+from common.features import FEATURE_SPEC  # noqa: E402
+from common.loader import LocalParquetReader, make_reader, projected_columns  # noqa: E402
+
+
+def write_customers(root, n: int = 1000, files: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({col: rng.integers(0, 50, n) for col in FEATURE_SPEC.input_columns})
+    df.insert(0, "customer_id", [f"c{i:05d}" for i in range(n)])
+    df["location"] = "US-CA"
+    df["content_category_primary"] = "music"
+    os.makedirs(root / "customers")
+    for i, part in enumerate(np.array_split(df, files)):
+        part.to_parquet(root / "customers" / f"part-{i}.parquet", index=False)
+    return df
+
+
+def test_projected_columns_cover_the_feature_spec():
+    """Projection is customer_id, the spec's inputs and extras, without duplicates"""
+    columns = projected_columns("gender", "engagement_score")
+    assert columns[0] == "customer_id"
+    assert set(FEATURE_SPEC.input_columns) <= set(columns)
+    assert "gender" in columns and "location" not in columns
+    assert len(columns) == len(set(columns))
+
+
+def test_local_reader_projects_and_batches(tmp_path):
+    """read() and iter_batches() return only the requested columns, in file order"""
+    expected = write_customers(tmp_path)
+    columns = projected_columns()
+    reader = LocalParquetReader(str(tmp_path))
+
+    full = reader.read("customers", columns)
+    assert list(full.columns) == columns
+    pd.testing.assert_frame_equal(full, expected[columns])
+
+    batches = list(reader.iter_batches("customers", columns, batch_size=150))
+    assert max(len(b) for b in batches) <= 150
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), expected[columns])
+
+    with pytest.raises(FileNotFoundError):
+        reader.read("missing", columns)
+    with pytest.raises(ValueError):
+        make_reader("jdbc", "raw")
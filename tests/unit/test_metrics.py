@@ -0,0 +1,76 @@
+"""
+Test suite for the buffered metrics publisher (fargate/common/metrics.py)
+"""
+
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "fargate"))
+
+from common.metrics import CloudWatchSink, EmfSink, MetricsPublisher, make_publisher  # noqa: E402
+
+
+class RecordingClient:
+    def __init__(self):
+        self.calls = []
+
+    def put_metric_data(self, Namespace, MetricData):
+        self.calls.append((Namespace, MetricData))
+
+
+def test_cloudwatch_sink_batches_1000_per_call():
+    """put() only buffers; close() sends 2500 data points in three calls with dimensions"""
+    client = RecordingClient()
+    publisher = MetricsPublisher(
+        "Test/NS",
+        CloudWatchSink(client),
+        dimensions={"Env": "dev"},
+        batch_size=5000,
+        background=False,
+    )
+    for i in range(2500):
+        publisher.put("Latency", i, "Milliseconds", dimensions={"Route": "predict"})
+    assert client.calls == []
+
+    publisher.close()
+    assert [len(data) for _, data in client.calls] == [1000, 1000, 500]
+    namespace, data = client.calls[0]
+    assert namespace == "Test/NS"
+    assert data[0]["Dimensions"] == [
+        {"Name": "Env", "Value": "dev"},
+        {"Name": "Route", "Value": "predict"},
+    ]
+    assert publisher.published == 2500
+
+
+def test_emf_and_file_sinks(tmp_path):
+    """EMF groups values per dimension set; the file sink writes one JSON line per data point"""
+    stream = io.StringIO()
+    publisher = MetricsPublisher("Test/NS", EmfSink(stream), background=False)
+    publisher.put("Count", 1, "Count")
+    publisher.put("Count", 2, "Count")
+    publisher.put("Rate", 0.5, dimensions={"Model": "churn"})
+    publisher.flush()
+
+    documents = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(documents) == 2
+    plain = next(d for d in documents if "Count" in d)
+    assert plain["Count"] == [1.0, 2.0]
+    assert plain["_aws"]["CloudWatchMetrics"][0]["Metrics"] == [{"Name": "Count", "Unit": "Count"}]
+    tagged = next(d for d in documents if "Rate" in d)
+    assert tagged["Model"] == "churn" and tagged["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [
+        ["Model"]
+    ]
+
+    path = tmp_path / "metrics.jsonl"
+    with make_publisher("Test/NS", "file", path=str(path)) as publisher:
+        publisher.put("Count", 3, "Count")
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines[0]["name"] == "Count" and lines[0]["value"] == 3.0
+
+    with pytest.raises(ValueError):
+        make_publisher("Test/NS", "statsd")
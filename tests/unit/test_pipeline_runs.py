@@ -0,0 +1,51 @@
+"""
+Test suite for the common Lambda layer's run helpers (lambda/common_layer/python/pipeline_runs.py)
+"""
+
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda", "common_layer", "python")
+)
+
+from pipeline_runs import run_partition  # noqa: E402
+
+
+@mock_aws
+def test_run_partition_reads_the_run_record():
+    """The pipeline's run ID resolves to the partition inference recorded"""
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="results")
+    record = {"run_id": "exec-1", "model_version": "v1.0", "run_date": "2025-01-01"}
+    s3.put_object(Bucket="results", Key="run_outputs/exec-1.json", Body=json.dumps(record))
+
+    assert run_partition({"run_id": "exec-1"}, s3, "results") == ("v1.0", "2025-01-01")
+    assert run_partition({"model_version": "v2.1.3", "run_date": "2025-02-03"}, s3, "results") == (
+        "v2.1.3",
+        "2025-02-03",
+    )
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        {},
+        {"model_version": "v1.0"},
+        {"model_version": "v1.0' OR '1'='1", "run_date": "2025-01-01"},
+        {"model_version": "latest", "run_date": "2025-01-01"},
+        {"model_version": "v1.0", "run_date": "2025-01-01' --"},
+        {"model_version": "v1.0", "run_date": "20250101"},
+        {"model_version": ["v1.0"], "run_date": "2025-01-01"},
+    ],
+)
+def test_run_partition_rejects_values_that_are_not_a_partition(event):
+    """Anything but a vN.N[.N] version and a YYYY-MM-DD date is refused before it reaches SQL"""
+    with pytest.raises(ValueError):
+        run_partition(event, None, "results")
@@ -0,0 +1,632 @@
+"""
+Test suite for the real-time Predict Lambda (lambda/predict/handler.py)
+"""
+
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+import numpy as np
+import pandas as pd
+import pytest
+from moto import mock_aws
+from sklearn.ensemble import IsolationForest
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "fargate"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda", "predict"))
+
+from common.features import FEATURE_SPEC  # noqa: E402
+
+TABLE = "predictions-cache-test"
+
+
+class CountingModel:
+    """Wraps a fitted model and records the batch size of every predict call"""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return self.model.predict(X)
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        return self.model.predict_proba(X)
+
+
+def make_customer(seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    return {name: int(rng.integers(1, 50)) for name in FEATURE_SPEC.input_columns}
+
+
+def fit_models() -> dict:
+    rows = [make_customer(i) for i in range(200)]
+    X = FEATURE_SPEC.transform(pd.DataFrame(rows))
+    scaler = StandardScaler().fit(X)
+    X = scaler.transform(X)
+    y = X[:, 0] * 0.5 + X[:, 1]
+    return {
+        "scaler": scaler,
+        "engagement": CountingModel(LinearRegression().fit(X, y)),
+        "churn": CountingModel(LogisticRegression().fit(X, (y > 0).astype(int))),
+        "anomaly": IsolationForest(n_estimators=10, random_state=0).fit(X),
+    }
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "DYNAMODB_TABLE": TABLE,
+    }.items():
+        monkeypatch.setenv(name, value)
+    with mock_aws():
+        boto3.client("dynamodb").create_table(
+            TableName=TABLE,
+            KeySchema=[
+                {"AttributeName": "customer_id", "KeyType": "HASH"},
+                {"AttributeName": "feature_hash", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "customer_id", "AttributeType": "S"},
+                {"AttributeName": "feature_hash", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        module = importlib.reload(importlib.import_module("handler"))
+        models = fit_models()
+        monkeypatch.setattr(module, "load_model", lambda name: models[name])
+        monkeypatch.setattr(module, "load_manifest", lambda: {"artifacts": dict.fromkeys(models)})
+        yield module, models
+        module.flush_cache_writes()
+
+
+def invoke(module, body: dict):
+    response = module.lambda_handler({"body": json.dumps(body)}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_batch_request_scores_only_cache_misses(handler, monkeypatch):
+    """Misses are scored in one predict per model; repeated customers come back as cache hits"""
+    module, models = handler
+    customers = [{"customer_id": f"c{i}", "customer_features": make_customer(i)} for i in range(3)]
+    customers.append({"customer_id": "c0-again", "customer_features": make_customer(0)})
+
+    status, body = invoke(module, {"customers": customers, "model_names": ["engagement", "churn"]})
+    assert status == 200
+    assert [r["cache_status"] for r in body["results"]] == ["miss"] * 4
+    assert models["engagement"].calls == [3] and models["churn"].calls == [3]
+    X = FEATURE_SPEC.transform_row(customers[1]["customer_features"], models["scaler"])
+    engagement = body["results"][1]["predictions"]["engagement"]["predicted_engagement_score"]
+    assert engagement == pytest.approx(float(models["engagement"].predict(X)[0]), rel=1e-5)
+    assert body["results"][3]["predictions"] == body["results"][0]["predictions"]
+
+    customers = [customers[1], {"customer_id": "c9", "customer_features": make_customer(9)}]
+    status, body = invoke(module, {"customers": customers, "model_names": ["engagement", "churn"]})
+    assert [r["cache_status"] for r in body["results"]] == ["hit", "miss"]
+    assert body["cache_hits"] == 1
+    assert models["engagement"].calls[-1] == 1 and models["churn"].calls[-1] == 1
+
+    status, body = invoke(
+        module, {"customers": [customers[1]], "model_names": ["engagement", "ltv"]}
+    )
+    assert status == 400
+    monkeypatch.setattr(module, "MAX_BATCH_SIZE", 1)
+    status, body = invoke(module, {"customers": customers})
+    assert status == 400
+
+
+def test_two_tier_cache_promotes_and_respects_model_version(handler, monkeypatch):
+    """Repeats hit the in-process tier; DynamoDB hits are promoted; another model version misses"""
+    module, models = handler
+    request = {"customer_features": make_customer(1), "model_name": "engagement"}
+
+    assert invoke(module, request)[1]["cached"] is False
+    assert invoke(module, request)[1]["cache_tier"] == "memory"
+
+    module.cache_writer.flush()
+    module.local_cache.clear()
+    assert invoke(module, request)[1]["cache_tier"] == "dynamodb"
+    assert invoke(module, request)[1]["cache_tier"] == "memory"
+    assert module.cache_hit_ratios() == {"memory": 0.5, "dynamodb": 0.25, "overall": 0.75}
+
+    monkeypatch.setattr(module, "MODEL_RELEASE", "v2.0")
+    assert invoke(module, request)[1]["cached"] is False
+    assert len(models["engagement"].calls) == 2
+
+    cache = module.LocalCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.evictions == 1
+    cache.put("d", 4, expires_at=0)
+    assert cache.get("d") is None
+
+
+def test_multi_model_request_shares_one_feature_vector_and_cache_item(handler):
+    """All requested models come back from one call, with churn probability and anomaly score"""
+    module, models = handler
+    request = {
+        "customer_features": make_customer(3),
+        "model_names": ["engagement", "churn", "anomaly"],
+    }
+
+    status, body = invoke(module, request)
+    assert status == 200 and body["cache_status"] == "miss"
+    X = FEATURE_SPEC.transform_row(request["customer_features"], models["scaler"])
+    churn = body["outputs"]["churn"]
+    assert churn["predicted_churn_probability"] == pytest.approx(
+        float(models["churn"].model.predict_proba(X)[0, 1]), rel=1e-5
+    )
+    assert churn["predicted_churn"] == int(churn["predicted_churn_probability"] > 0.5)
+    anomaly = body["outputs"]["anomaly"]
+    assert anomaly["anomaly_score"] == pytest.approx(
+        float(models["anomaly"].score_samples(X)[0]), rel=1e-5
+    )
+    assert anomaly["is_anomaly"] in (0, 1)
+
+    module.cache_writer.flush()
+    items = module.table.scan()["Items"]
+    assert [item["feature_hash"] for item in items] == ["outputs"]
+
+    module.local_cache.clear()
+    shuffled = dict(reversed(list(request["customer_features"].items())))
+    status, again = invoke(
+        module, {"customer_features": shuffled, "model_names": ["churn", "engagement"]}
+    )
+    assert again["cache_status"] == "hit" and again["outputs"]["churn"] == churn
+
+    status, body = invoke(module, {**request, "customer_features": {"age": "thirty"}})
+    assert status == 400
+
+    status, body = invoke(module, {**request, "model_names": ["engagement", "ltv"]})
+    assert status == 400
+    for model_name in ("ltv", "scaler", ["churn"]):
+        single = {"customer_features": request["customer_features"], "model_name": model_name}
+        assert invoke(module, single)[0] == 400
+    status, body = invoke(module, {"customers": [request["customer_features"], "c1"]})
+    assert status == 400 and "customers" in body["error"]
+
+
+def test_cold_start_loads_compiled_models_at_init(handler, monkeypatch, tmp_path):
+    """With compiled artifacts the scaler and tree models load during init, without joblib"""
+    import xgboost as xgb
+    from common.features import ScalerParams
+    from common.tree_ensemble import CompiledTreeEnsemble, compile_xgboost
+
+    module, models = handler
+    rows = pd.DataFrame([make_customer(i) for i in range(200)])
+    X = pd.DataFrame(
+        models["scaler"].transform(FEATURE_SPEC.transform(rows)), columns=FEATURE_SPEC.columns
+    )
+    boosters = {
+        "engagement": xgb.XGBRegressor(n_estimators=10, max_depth=3).fit(X, X.iloc[:, 0]),
+        "churn": xgb.XGBClassifier(n_estimators=10, max_depth=3).fit(
+            X, (X.iloc[:, 1] > 0).astype(int)
+        ),
+    }
+
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="models")
+    compiled_artifacts = {}
+    for name, booster in boosters.items():
+        compile_xgboost(booster).save(str(tmp_path / f"{name}.npz"))
+        s3.upload_file(str(tmp_path / f"{name}.npz"), "models", f"models/v1.0/{name}.npz")
+        compiled_artifacts[name] = {
+            "key": f"models/v1.0/{name}.npz",
+            "sha256": name * 4,
+            "format": "compiled-npz",
+        }
+    ScalerParams.from_scaler(models["scaler"]).save(str(tmp_path / "scaler.json"))
+    s3.upload_file(str(tmp_path / "scaler.json"), "models", "preprocessing/scaler.json")
+    compiled_artifacts["scaler"] = {
+        "key": "preprocessing/scaler.json",
+        "sha256": "scaler" * 3,
+        "format": "scaler-json",
+    }
+    manifest = {
+        "feature_columns": FEATURE_SPEC.columns,
+        "artifacts": {
+            name: {"key": f"models/v1.0/{name}.pkl", "sha256": "x" * 16}
+            for name in compiled_artifacts
+        },
+        "compiled_artifacts": compiled_artifacts,
+    }
+    s3.put_object(Bucket="models", Key="models/v1.0/manifest.json", Body=json.dumps(manifest))
+
+    monkeypatch.setenv("MODELS_BUCKET", "models")
+    monkeypatch.setenv("EAGER_MODELS", "scaler,engagement,churn")
+    monkeypatch.setattr("builtins.__import__", _forbid_import("joblib", __import__))
+    module = importlib.reload(module)
+    assert isinstance(module._model_cache["engagement"], CompiledTreeEnsemble)
+    assert isinstance(module._model_cache["scaler"], ScalerParams)
+    assert module.INIT_DURATION_MS > 0
+
+    features = make_customer(5)
+    status, body = invoke(
+        module, {"customer_features": features, "model_names": ["engagement", "churn"]}
+    )
+    assert status == 200 and module._first_invoke is False
+    x = FEATURE_SPEC.transform_row(features, models["scaler"])
+    assert body["outputs"]["churn"]["predicted_churn_probability"] == pytest.approx(
+        float(boosters["churn"].predict_proba(x)[0, 1]), rel=1e-4
+    )
+
+
+def _forbid_import(name: str, real_import):
+    def guarded(module_name, *args, **kwargs):
+        if module_name == name:
+            raise ImportError(f"{name} imported on the compiled path")
+        return real_import(module_name, *args, **kwargs)
+
+    return guarded
+
+
+def test_customer_id_lookup_serves_batch_predictions_then_falls_back(handler, monkeypatch):
+    """A loaded customer is answered from the serving table; others are scored live or 404"""
+    module, models = handler
+    boto3.client("dynamodb").create_table(
+        TableName="serving",
+        KeySchema=[{"AttributeName": "customer_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "customer_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    serving = boto3.resource("dynamodb").Table("serving")
+    serving.put_item(
+        Item={
+            "customer_id": "c1",
+            "model_version": "v1.0",
+            "run_date": "2025-01-01",
+            "run_id": "run1",
+            "prediction_timestamp": "2025-01-01T00:00:00",
+            "ttl": 4102444800,
+            "outputs": {
+                "engagement": {"predicted_engagement_score": Decimal("0.25")},
+                "churn": {"predicted_churn_probability": Decimal("0.75"), "predicted_churn": 1},
+            },
+        }
+    )
+    monkeypatch.setattr(module, "serving_table", serving)
+
+    status, body = invoke(module, {"customer_id": "c1", "model_names": ["engagement", "churn"]})
+    assert status == 200 and body["source"] == "batch" and body["run_date"] == "2025-01-01"
+    assert body["outputs"]["churn"] == {"predicted_churn_probability": 0.75, "predicted_churn": 1}
+    assert models["engagement"].calls == []
+
+    status, body = invoke(module, {"customer_id": "c2", "model_names": ["engagement"]})
+    assert status == 404
+    status, body = invoke(
+        module,
+        {"customer_id": "c2", "model_names": ["engagement"], "customer_features": make_customer(2)},
+    )
+    assert status == 200 and body["source"] == "live" and models["engagement"].calls == [1]
+
+    monkeypatch.setattr(module, "MODEL_RELEASE", "v2.0")
+    status, body = invoke(module, {"customer_id": "c1", "model_names": ["engagement"]})
+    assert status == 404
+
+
+def test_server_micro_batches_concurrent_single_customer_requests(handler):
+    """Concurrent requests are scored together, up to max_batch_rows per predict, and fanned
+    back out"""
+    module, models = handler
+    import server
+
+    bodies = [{"customer_features": make_customer(i), "model_name": "engagement"} for i in range(5)]
+    bodies.append({"customer_features": make_customer(0), "model_names": ["engagement", "ltv"]})
+
+    async def run():
+        prediction_server = server.PredictionServer(max_batch_rows=4, max_wait_ms=50)
+        await prediction_server.batcher.start()
+        try:
+            return await asyncio.gather(
+                *(prediction_server.predict(json.dumps(b).encode()) for b in bodies)
+            )
+        finally:
+            await prediction_server.batcher.stop()
+            assert prediction_server.stats.snapshot()["batches"] == 2
+
+    results = asyncio.run(run())
+    assert models["engagement"].calls == [4, 1]
+    for (status, body), request in zip(results[:5], bodies):
+        X = FEATURE_SPEC.transform_row(request["customer_features"], models["scaler"])
+        assert status == 200 and body["cached"] is False
+        assert body["prediction"] == pytest.approx(
+            float(models["engagement"].model.predict(X)[0]), rel=1e-5
+        )
+    assert results[5][0] == 400
+
+    assert invoke(module, bodies[2])[1]["cache_tier"] == "memory"
+
+
+def test_cache_writes_happen_after_the_response(handler, monkeypatch):
+    """Misses are answered before their items reach DynamoDB; the buffer is bounded and failures
+    counted"""
+    module, models = handler
+    writer = module.CacheWriter(
+        TABLE, boto3.resource("dynamodb"), max_pending=3, on_flush=module.record_cache_writes
+    )
+    monkeypatch.setattr(module, "cache_writer", writer)
+
+    customers = [{"customer_features": make_customer(i)} for i in range(5)]
+    status, body = invoke(module, {"customers": customers, "model_names": ["engagement"]})
+    assert status == 200 and module.table.scan()["Items"] == []
+    assert len(writer) == 3 and writer.dropped == 2
+    assert writer.flush() == (3, 0)
+    assert len(module.table.scan()["Items"]) == 3
+
+    writer.table_name = "missing-table"
+    invoke(module, {"customer_features": make_customer(9), "model_name": "engagement"})
+    assert writer.flush() == (0, 1) and writer.failed == 1
+
+
+def test_after_response_extension_runs_between_invocations():
+    """The extension runs its callback once the handler is done and only then asks for the next
+    event"""
+    from cache_writer import AfterResponse
+
+    calls = []
+    events = queue.Queue()
+
+    class ExtensionsApi(BaseHTTPRequestHandler):
+        def reply(self, body: bytes, headers: dict):
+            self.send_response(200)
+            for name, value in {**headers, "Content-Length": str(len(body))}.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            calls.append("register")
+            self.reply(b"{}", {"Lambda-Extension-Identifier": "ext-1"})
+
+        def do_GET(self):
+            calls.append("next")
+            self.reply(json.dumps(events.get()).encode(), {})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ExtensionsApi)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    flushed = threading.Event()
+    extension = AfterResponse(
+        f"127.0.0.1:{server.server_port}", lambda: (calls.append("flush"), flushed.set())
+    )
+
+    events.put({"eventType": "INVOKE"})
+    assert not flushed.wait(0.2)
+    extension.invocation_done()
+    assert flushed.wait(5)
+    for _ in range(50):
+        if calls.count("next") == 2:
+            break
+        time.sleep(0.02)
+    assert calls == ["register", "next", "flush", "next"]
+    server.shutdown()
+
+
+def publish_release(tmp_path, models: dict, version: str, training_run: str, slope: float) -> dict:
+    """Upload an engagement model (slope * first feature) and its manifest as training would"""
+    import joblib
+
+    s3 = boto3.client("s3")
+    rows = models["scaler"].transform(
+        FEATURE_SPEC.transform(pd.DataFrame([make_customer(i) for i in range(200)]))
+    )
+    release_models = {
+        "scaler": models["scaler"],
+        "engagement": LinearRegression().fit(rows, slope * rows[:, 0]),
+    }
+    artifacts = {}
+    for name, model in release_models.items():
+        path = tmp_path / f"{version}_{training_run}_{name}.pkl"
+        joblib.dump(model, path)
+        key = f"models/{version}/{name}_{training_run}.pkl"
+        s3.upload_file(str(path), "models", key)
+        artifacts[name] = {"key": key, "sha256": hashlib.sha256(path.read_bytes()).hexdigest()}
+    manifest_key = f"models/{version}/manifests/manifest_{training_run}.json"
+    body = json.dumps({"feature_columns": FEATURE_SPEC.columns, "artifacts": artifacts})
+    for key in (manifest_key, f"models/{version}/manifest.json"):
+        s3.put_object(Bucket="models", Key=key, Body=body)
+    return {
+        "model_version": version,
+        "training_run": training_run,
+        "manifest_key": manifest_key,
+        "models": release_models,
+    }
+
+
+def point_to(release: dict):
+    pointer = {k: v for k, v in release.items() if k != "models"}
+    boto3.client("s3").put_object(
+        Bucket="models", Key="models/current.json", Body=json.dumps(pointer)
+    )
+
+
+def reload_with_pointer(module, monkeypatch):
+    monkeypatch.setenv("MODELS_BUCKET", "models")
+    monkeypatch.setenv("MODEL_VERSION", "v0.9")
+    monkeypatch.setenv("MODEL_CHECK_SECONDS", "0")
+    monkeypatch.setenv("EAGER_MODELS", "scaler,engagement")
+    return importlib.reload(module)
+
+
+def test_model_version_pointer_reloads_in_the_background(handler, monkeypatch, tmp_path):
+    """A moved pointer is loaded off the request path, swapped in between requests, and never hits
+    old cache entries"""
+    module, models = handler
+    boto3.client("s3").create_bucket(Bucket="models")
+    releases = [
+        publish_release(tmp_path, models, "v1.0", "20250101_000000", 1.0),
+        publish_release(tmp_path, models, "v2.0", "20250102_000000", -3.0),
+    ]
+    point_to(releases[0])
+    module = reload_with_pointer(module, monkeypatch)
+    assert module.MODEL_VERSION == "v1.0"
+
+    request = {"customer_features": make_customer(7), "model_name": "engagement"}
+    x = FEATURE_SPEC.transform_row(request["customer_features"], models["scaler"])
+    expected = [
+        pytest.approx(float(r["models"]["engagement"].predict(x)[0]), rel=1e-5) for r in releases
+    ]
+    status, body = invoke(module, request)
+    assert body["model_version"] == "v1.0" and body["prediction"] == expected[0]
+
+    module._version_check.result(timeout=10)  # the first check, still on v1.0
+    point_to(releases[1])
+    status, body = invoke(module, request)
+    assert body["cache_tier"] == "memory" and module.MODEL_VERSION == "v1.0"
+    module._version_check.result(timeout=10)
+
+    status, body = invoke(module, request)
+    assert module.MODEL_VERSION == "v2.0"
+    assert body["cached"] is False and body["model_version"] == "v2.0"
+    assert body["prediction"] == expected[1]
+    assert invoke(module, request)[1]["cache_tier"] == "memory"
+    module.cache_writer.flush()
+    assert {item["customer_id"].split("@")[0] for item in module.table.scan()["Items"]} == {
+        "v1.0",
+        "v2.0",
+    }
+
+
+def test_retrain_under_the_same_model_version_is_swapped_in(handler, monkeypatch, tmp_path):
+    """A new training run published under an unchanged MODEL_VERSION is a new release: its models
+    replace the old ones and neither cache tier serves the old run's predictions"""
+    module, models = handler
+    boto3.client("s3").create_bucket(Bucket="models")
+    first = publish_release(tmp_path, models, "v1.0", "20250101_000000", 1.0)
+    point_to(first)
+    module = reload_with_pointer(module, monkeypatch)
+    request = {"customer_features": make_customer(7), "model_name": "engagement"}
+    status, body = invoke(module, request)
+    module._version_check.result(timeout=10)
+    module.cache_writer.flush()
+
+    retrained = publish_release(tmp_path, models, "v1.0", "20250102_000000", -3.0)
+    point_to(retrained)
+    invoke(module, request)
+    module._version_check.result(timeout=10)
+
+    status, retrained_body = invoke(module, request)
+    assert module.MODEL_RELEASE == "v1.0@20250102_000000" and module.MODEL_VERSION == "v1.0"
+    assert retrained_body["cached"] is False and retrained_body["model_version"] == "v1.0"
+    x = FEATURE_SPEC.transform_row(request["customer_features"], models["scaler"])
+    expected = float(retrained["models"]["engagement"].predict(x)[0])
+    assert retrained_body["prediction"] == pytest.approx(expected, rel=1e-5)
+    assert retrained_body["prediction"] != pytest.approx(body["prediction"], rel=1e-5)
+
+    # A new container: the DynamoDB tier must not serve the old run either
+    module.local_cache.clear()
+    assert invoke(module, request)[1]["prediction"] == pytest.approx(expected, rel=1e-5)
+
+
+def test_failed_release_swap_still_answers_and_ends_the_invocation(handler, monkeypatch):
+    """A release that was never preloaded is not swapped in, and an error while pinning the
+    release is a 500 that still tells the extension the invocation is done"""
+    module, models = handler
+    done = []
+    monkeypatch.setattr(
+        module,
+        "after_response",
+        type("Ext", (), {"invocation_done": lambda self: done.append(True)})(),
+    )
+    request = {"customer_features": make_customer(7), "model_name": "engagement"}
+    release = module.MODEL_RELEASE
+
+    module.activate_model_version("v9.9@20250101_000000")
+    assert module.MODEL_RELEASE == release
+    assert invoke(module, request)[0] == 200 and len(done) == 1
+
+    def fail():
+        raise KeyError("v9.9@20250101_000000")
+
+    monkeypatch.setattr(module, "check_model_version", fail)
+    status, body = invoke(module, request)
+    assert status == 500 and len(done) == 2
+    assert module.model_release() == release
+
+
+def _wait_until(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_concurrent_identical_work_runs_once(handler, monkeypatch, tmp_path):
+    """Identical in-flight predictions and first-time model loads are computed once and shared"""
+    import joblib
+
+    module, models = handler
+    slow = models["engagement"]
+    real_predict = slow.predict
+    monkeypatch.setattr(
+        slow,
+        "predict",
+        lambda X: (_wait_until(lambda: module.in_flight.shared == 3), real_predict(X))[1],
+    )
+    request = {"customer_features": make_customer(3), "model_name": "engagement"}
+    results = queue.Queue()
+    threads = [
+        threading.Thread(target=lambda: results.put(invoke(module, request))) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    bodies = [results.get_nowait() for _ in threads]
+    assert slow.calls == [1] and len(module.in_flight) == 0
+    assert {(status, body["prediction"]) for status, body in bodies} == {
+        (200, bodies[0][1]["prediction"])
+    }
+
+    path = tmp_path / "churn.pkl"
+    joblib.dump(models["churn"].model, path)
+    boto3.client("s3").create_bucket(Bucket="models")
+    boto3.client("s3").upload_file(str(path), "models", "models/v9/churn.pkl")
+    artifact = {"key": "models/v9/churn.pkl", "sha256": hashlib.sha256(os.urandom(8)).hexdigest()}
+    monkeypatch.setattr(module, "MODELS_BUCKET", "models")
+    monkeypatch.setattr(
+        module, "_load_manifest", lambda version: {"artifacts": {"churn": artifact}}
+    )
+    downloads = []
+    real_download = module.s3_client.download_file
+
+    def slow_download(*args):
+        downloads.append(args)
+        _wait_until(lambda: module.model_loads.shared == 3)
+        real_download(*args)
+
+    monkeypatch.setattr(module.s3_client, "download_file", slow_download)
+    loaded = queue.Queue()
+    threads = [
+        threading.Thread(target=lambda: loaded.put(module._load_model("v9", "churn")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert len(downloads) == 1 and downloads[0][2].endswith(".part")
+    assert len({id(loaded.get_nowait()) for _ in threads}) == 1
+    os.remove(f"/tmp/churn_{artifact['sha256'][:16]}.pkl")
@@ -0,0 +1,60 @@
+"""
+Test suite for the compiled tree ensemble evaluator (fargate/common)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "fargate"))
+
+from common.tree_ensemble import CompiledTreeEnsemble, compile_xgboost  # noqa: E402
+
+
+def make_data(n: int = 2000, n_features: int = 12, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, n_features)), columns=[f"f{i}" for i in range(n_features)])
+    X.iloc[::9, 2] = np.nan
+    y = 2 * X["f0"].fillna(0) - X["f1"] + rng.normal(scale=0.3, size=n)
+    return X, y
+
+
+def test_regressor_matches_booster():
+    """Compiled regressor output matches XGBRegressor.predict, including missing values"""
+    X, y = make_data()
+    model = xgb.XGBRegressor(n_estimators=50, max_depth=6, subsample=0.8, random_state=42).fit(X, y)
+    compiled = compile_xgboost(model)
+
+    assert compiled.n_trees == 50
+    assert compiled.max_depth <= 6
+    assert np.allclose(compiled.predict(X), model.predict(X), atol=1e-5)
+    assert np.allclose(compiled.predict(X.head(1)), model.predict(X.head(1)), atol=1e-5)
+
+
+def test_classifier_matches_booster(tmp_path):
+    """Compiled classifier probabilities and labels survive a save/load round trip"""
+    X, y = make_data(seed=1)
+    labels = (y > 0).astype(int)
+    model = xgb.XGBClassifier(
+        n_estimators=40, max_depth=5, scale_pos_weight=2.0, random_state=42
+    ).fit(X, labels)
+
+    path = str(tmp_path / "churn.npz")
+    compile_xgboost(model).save(path)
+    compiled = CompiledTreeEnsemble.load(path)
+
+    assert np.allclose(compiled.predict_proba(X), model.predict_proba(X), atol=1e-6)
+    assert (compiled.predict(X) == model.predict(X)).all()
+
+
+def test_rejects_reordered_columns():
+    """Scoring a frame whose columns are in a different order is an error, not a silent mismatch"""
+    X, y = make_data(n=200)
+    compiled = compile_xgboost(xgb.XGBRegressor(n_estimators=5, max_depth=3).fit(X, y))
+
+    with pytest.raises(ValueError):
+        compiled.predict(X[X.columns[::-1]])